@@ -0,0 +1,69 @@
+import time
+from unittest.mock import patch
+
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from django.core.management.base import BaseCommand, CommandError
+
+from temba.api.v2.serializers import ContactReadSerializer, FlowRunReadSerializer, MsgReadSerializer
+from temba.api.v2.views import ContactsEndpoint, MessagesEndpoint, RunsEndpoint
+from temba.orgs.models import Org, OrgRole
+
+ENDPOINTS = (
+    ("contacts", ContactsEndpoint, ContactReadSerializer),
+    ("messages", MessagesEndpoint, MsgReadSerializer),
+    ("runs", RunsEndpoint, FlowRunReadSerializer),
+)
+
+
+class Command(BaseCommand):  # pragma: no cover
+    help = "Benchmarks serializing and rendering pages of high volume API list endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, action="store", dest="org_id", required=True)
+        parser.add_argument("--requests", type=int, action="store", dest="num_requests", default=20)
+
+    def handle(self, org_id: int, num_requests: int, *args, **kwargs):
+        org = Org.objects.filter(id=org_id, is_active=True).first()
+        if not org:
+            raise CommandError(f"no such org with id {org_id}")
+
+        user = org.get_users(roles=[OrgRole.ADMINISTRATOR]).first()
+        factory = APIRequestFactory()
+
+        for name, endpoint, serializer_class in ENDPOINTS:
+            view = endpoint.as_view()
+
+            def request():
+                req = factory.get(f"/api/v2/{name}.json")
+                req.org = org
+                force_authenticate(req, user=user)
+                response = view(req, format="json")
+                response.render()
+                return response
+
+            request()  # warm up caches and connections
+            fast = self._bench(request, num_requests)
+
+            # the generic DRF field machinery is what serializers use without a fast path
+            with patch.object(serializer_class, "to_representation", serializers.Serializer.to_representation):
+                reference = self._bench(request, num_requests)
+
+            identical = "identical" if fast[1] == reference[1] else "DIFFERENT"
+
+            self.stdout.write(
+                f" > {name:<10} objects/sec fast={fast[0]:>10.0f} drf={reference[0]:>10.0f} "
+                f"speedup={fast[0] / reference[0]:>5.2f}x output={identical}"
+            )
+
+    def _bench(self, request, num_requests: int) -> tuple:
+        num_objects = 0
+        start = time.perf_counter()
+
+        for r in range(num_requests):
+            response = request()
+            num_objects += len(response.data["results"])
+
+        elapsed = time.perf_counter() - start
+        return num_objects / elapsed, response.content
@@ -1,4 +1,8 @@
+import copy
 import logging
+import threading
+import time
+from collections import OrderedDict
 
 from django_redis import get_redis_connection
 from rest_framework.permissions import BasePermission
@@ -6,10 +10,15 @@ from smartmin.models import SmartModel
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from temba.orgs.models import Org, OrgRole
+from temba.users.models import User
+from temba.utils import on_transaction_commit
 from temba.utils.models import JSONAsTextField
 from temba.utils.text import generate_secret
 
@@ -209,6 +218,11 @@ class APIToken(models.Model):
 
     ALLOWED_ROLES = (OrgRole.ADMINISTRATOR, OrgRole.EDITOR)
 
+    CACHE_TTL = 60  # how long each process caches resolved tokens for
+    CACHE_MAX_SIZE = 1000
+    CACHE_VERSION_KEY = "api_token_version:{key}"
+    RECORD_USED_INTERVAL = 60  # how often each process records that a token has been used
+
     key = models.CharField(max_length=40, primary_key=True)
     org = models.ForeignKey(Org, on_delete=models.PROTECT, related_name="api_tokens")
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name="api_tokens")
@@ -226,7 +240,59 @@ class APIToken(models.Model):
 
         return cls.objects.create(user=user, org=org, key=generate_secret(40))
 
+    @classmethod
+    def lookup(cls, key: str):
+        """
+        Looks up an active token with its user, org and org parent. Resolved tokens are cached in each process, and
+        those are invalidated by changes to the token, its user or its org via a version number in redis.
+        """
+        version_key = cls.CACHE_VERSION_KEY.format(key=key)
+        version = get_redis_connection().get(version_key)
+        now = time.monotonic()
+
+        with _token_cache_lock:
+            cached = _token_cache.get(key)
+            if cached:
+                _token_cache.move_to_end(key)
+
+        if cached and cached[0] > now and cached[1] == version:
+            return _restore_token(cached[2])
+
+        token = cls.objects.select_related("user", "org", "org__parent").filter(is_active=True, key=key).first()
+        if token:
+            with _token_cache_lock:
+                _token_cache[key] = (now + cls.CACHE_TTL, version, _snapshot_token(token))
+                _token_cache.move_to_end(key)
+                while len(_token_cache) > cls.CACHE_MAX_SIZE:
+                    _token_cache.popitem(last=False)
+
+        return token
+
+    @classmethod
+    def invalidate_cache(cls, keys):
+        """
+        Invalidates any cached copies of the given tokens in all processes
+        """
+        r = get_redis_connection()
+        with r.pipeline() as pipe:
+            for key in keys:
+                version_key = cls.CACHE_VERSION_KEY.format(key=key)
+                pipe.incr(version_key)
+                pipe.expire(version_key, cls.CACHE_TTL * 2)
+            pipe.execute()
+
     def record_used(self):
+        # we only need to know roughly when a token was last used, so each process records it at most once per interval
+        now = time.monotonic()
+        with _token_cache_lock:
+            if _token_last_recorded.get(self.key, -self.RECORD_USED_INTERVAL) > now - self.RECORD_USED_INTERVAL:
+                return
+
+            _token_last_recorded[self.key] = now
+            _token_last_recorded.move_to_end(self.key)
+            while len(_token_last_recorded) > self.CACHE_MAX_SIZE:
+                _token_last_recorded.popitem(last=False)
+
         r = get_redis_connection()
         r.sadd("api_tokens_used", self.key)
 
@@ -241,3 +307,66 @@ class APIToken(models.Model):
 
     def __str__(self):
         return self.key
+
+
+# fields of users and orgs which when changed invalidate cached tokens
+TOKEN_USER_FIELDS = {"is_active", "email"}
+TOKEN_ORG_FIELDS = {"is_active", "is_suspended", "is_flagged", "is_anon", "api_rates"}
+
+# per-process caches of resolved tokens and when each token was last recorded as used
+_token_cache = OrderedDict()
+_token_last_recorded = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+
+def _snapshot(obj) -> tuple:
+    names = [f.attname for f in obj._meta.concrete_fields]
+    return names, [getattr(obj, n) for n in names]
+
+
+def _restore(model, snapshot: tuple):
+    # values are copied so that nothing mutable is shared between requests
+    names, values = snapshot
+    return model.from_db("default", names, copy.deepcopy(values))
+
+
+def _snapshot_token(token) -> tuple:
+    parent = token.org.parent
+    return _snapshot(token), _snapshot(token.user), _snapshot(token.org), _snapshot(parent) if parent else None
+
+
+def _restore_token(snapshot: tuple):
+    token_snap, user_snap, org_snap, parent_snap = snapshot
+    token = _restore(APIToken, token_snap)
+    token.user = _restore(User, user_snap)
+    token.org = _restore(Org, org_snap)
+    token.org.parent = _restore(Org, parent_snap) if parent_snap else None
+    return token
+
+
+@receiver(post_save, sender=APIToken)
+def _invalidate_token(sender, instance, **kwargs):
+    on_transaction_commit(lambda: APIToken.invalidate_cache([instance.key]))
+
+
+@receiver(post_save, sender=User)
+def _invalidate_user_tokens(sender, instance, created, update_fields, **kwargs):
+    if created or (update_fields and not update_fields & TOKEN_USER_FIELDS):
+        return
+
+    def invalidate():
+        APIToken.invalidate_cache(APIToken.objects.filter(user=instance).values_list("key", flat=True))
+
+    on_transaction_commit(invalidate)
+
+
+@receiver(post_save, sender=Org)
+def _invalidate_org_tokens(sender, instance, created, update_fields, **kwargs):
+    if created or (update_fields and not update_fields & TOKEN_ORG_FIELDS):
+        return
+
+    def invalidate():
+        tokens = APIToken.objects.filter(Q(org=instance) | Q(org__parent=instance))
+        APIToken.invalidate_cache(tokens.values_list("key", flat=True))
+
+    on_transaction_commit(invalidate)
@@ -4,7 +4,7 @@ from rest_framework import exceptions, status
 from rest_framework.authentication import BasicAuthentication, SessionAuthentication, TokenAuthentication
 from rest_framework.exceptions import APIException
 from rest_framework.pagination import CursorPagination
-from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 from rest_framework.throttling import ScopedRateThrottle
 
 from django.conf import settings
@@ -45,12 +45,10 @@ class APITokenAuthentication(RequestAttributesMixin, TokenAuthentication):
     """
 
     model = APIToken
-    select_related = ("user", "org", "org__parent")
 
     def authenticate_credentials(self, key):
-        try:
-            token = self.model.objects.select_related(*self.select_related).get(is_active=True, key=key)
-        except self.model.DoesNotExist:
+        token = self.model.lookup(key)
+        if not token:
             raise exceptions.AuthenticationFailed("Invalid token")
 
         if token.user.is_active:
@@ -70,9 +68,8 @@ class APIBasicAuthentication(RequestAttributesMixin, BasicAuthentication):
     """
 
     def authenticate_credentials(self, userid, password, request=None):
-        try:
-            token = APIToken.objects.get(is_active=True, key=password)
-        except APIToken.DoesNotExist:
+        token = APIToken.lookup(password)
+        if not token:
             raise exceptions.AuthenticationFailed("Invalid token or email")
 
         if token.user.email != userid:
@@ -152,6 +149,19 @@ class DocumentationRenderer(BrowsableAPIRenderer):
         }
 
 
+class NDJSONRenderer(JSONRenderer):
+    """
+    Renderer for endpoints which can stream their objects as newline delimited JSON. Streamed responses aren't rendered
+    by this, so it only renders other responses such as errors, as a single line.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(data, accepted_media_type, renderer_context) + b"\n"
+
+
 class CreatedOnCursorPagination(CursorPagination):
     ordering = ("-created_on", "-id")
     offset_cutoff = 100000
@@ -1,10 +1,10 @@
-import itertools
-
 from django.conf import settings
 from django.utils import timezone
 
 from temba.api.models import APIToken
 from temba.utils.crons import cron_task
+from temba.utils.db import partitions
+from temba.utils.models import delete_in_batches
 
 from .models import WebHookEvent
 
@@ -29,12 +29,11 @@ def trim_webhook_events():
     Trims old webhook events
     """
 
-    num_deleted = 0
+    num_deleted, num_dropped = 0, 0
 
     if settings.RETENTION_PERIODS["webhookevent"]:
         trim_before = timezone.now() - settings.RETENTION_PERIODS["webhookevent"]
-        event_ids = WebHookEvent.objects.filter(created_on__lte=trim_before).values_list("id", flat=True)
-        for batch in itertools.batched(event_ids, 1000):
-            num_deleted, _ = WebHookEvent.objects.filter(id__in=batch).delete()
+        num_dropped = partitions.drop_partitions(WebHookEvent._meta.db_table, before=trim_before)
+        num_deleted = delete_in_batches(WebHookEvent.objects.filter(created_on__lte=trim_before))
 
-    return {"deleted": num_deleted}
+    return {"deleted": num_deleted, "partitions_dropped": num_dropped}
@@ -1,3 +1,8 @@
+import time
+from unittest.mock import patch
+
+from django_redis import get_redis_connection
+
 from django.contrib.auth.models import Group
 
 from temba.api.models import APIToken
@@ -30,12 +35,72 @@ class APITokenTest(TembaTest):
         # can't create tokens for agent users
         self.assertRaises(AssertionError, APIToken.create, self.org, self.agent)
 
+    def test_lookup(self):
+        token1 = APIToken.create(self.org, self.admin)
+        token2 = APIToken.create(self.org2, self.admin)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(token1, APIToken.lookup(token1.key))
+
+        # token is now cached so no more queries needed
+        with self.assertNumQueries(0):
+            token = APIToken.lookup(token1.key)
+            self.assertEqual(token1, token)
+            self.assertEqual(self.admin, token.user)
+            self.assertEqual(self.org, token.org)
+            self.assertIsNone(token.org.parent)
+
+        # but each lookup gets its own copies of the models
+        token.org.name = "Changed"
+        self.assertEqual("Nyaruka", APIToken.lookup(token1.key).org.name)
+
+        self.assertIsNone(APIToken.lookup("1234567890"))
+
+        # changing the org invalidates its tokens
+        self.org.suspend()
+
+        with self.assertNumQueries(1):
+            self.assertTrue(APIToken.lookup(token1.key).org.is_suspended)
+
+        # as does deactivating the user
+        self.admin.is_active = False
+        self.admin.save(update_fields=("is_active",))
+
+        with self.assertNumQueries(1):
+            self.assertFalse(APIToken.lookup(token1.key).user.is_active)
+        with self.assertNumQueries(1):
+            self.assertFalse(APIToken.lookup(token2.key).user.is_active)
+
+        # but other changes to the user don't
+        self.admin.save(update_fields=("last_login",))
+
+        with self.assertNumQueries(0):
+            APIToken.lookup(token1.key)
+
+        # releasing a token invalidates it
+        token1.release()
+
+        self.assertIsNone(APIToken.lookup(token1.key))
+
+        # cached tokens expire
+        with patch("temba.api.models.time.monotonic", return_value=time.monotonic() + 61):
+            with self.assertNumQueries(1):
+                APIToken.lookup(token2.key)
+
     def test_record_used(self):
         token1 = APIToken.create(self.org, self.admin)
         token2 = APIToken.create(self.org2, self.admin2)
 
         token1.record_used()
 
+        # recording again within the interval is a noop
+        get_redis_connection().delete("api_tokens_used")
+        token1.record_used()
+        self.assertEqual(0, get_redis_connection().scard("api_tokens_used"))
+
+        with patch("temba.api.models.time.monotonic", return_value=time.monotonic() + 61):
+            token1.record_used()
+
         update_tokens_used()
 
         token1.refresh_from_db()
@@ -2,12 +2,15 @@ import logging
 import numbers
 from collections import OrderedDict
 from datetime import timezone as tzone
+from decimal import Decimal
 
 import iso8601
 import pycountry
 import regex
 from rest_framework import serializers
 
+from django.utils.functional import cached_property
+
 from temba import mailroom
 from temba.archives.models import Archive
 from temba.campaigns.models import Campaign, CampaignEvent
@@ -22,7 +25,7 @@ from temba.msgs.models import Broadcast, Label, Media, Msg, OptIn
 from temba.orgs.models import Org, OrgRole
 from temba.tickets.models import Ticket, Topic
 from temba.users.models import User
-from temba.utils import json
+from temba.utils import format_number, json
 from temba.utils.fields import NameValidator
 
 from ..models import BulkActionFailure, Resthook, ResthookSubscriber, WebHookEvent
@@ -30,6 +33,7 @@ from ..validators import UniqueForOrgValidator
 from . import fields
 
 INVALID_EXTRA_KEY_CHARS = regex.compile(r"[^a-zA-Z0-9_]")
+UTC_DATETIME_REGEX = regex.compile(r"^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.(\d+))?Z$")
 FLOW_START_EXTRA_SIZE = 256  # used for extra passed to flow start API endpoint
 
 logger = logging.getLogger(__name__)
@@ -42,6 +46,32 @@ def format_datetime(value):
     return json.encode_datetime(value, micros=True) if value else None
 
 
+def format_iso_datetime(value):
+    """
+    Formats a datetime the same way as a DRF DateTimeField, i.e. in UTC with microseconds only if they're non-zero
+    """
+    return value.astimezone(tzone.utc).isoformat().removesuffix("+00:00") + "Z" if value else None
+
+
+def reformat_datetime(value: str):
+    """
+    Reformats an ISO8601 datetime string with microsecond accuracy. UTC values like those written by the engine are
+    handled without being parsed.
+    """
+    match = UTC_DATETIME_REGEX.match(value)
+    if match:
+        return f"{match[1]}.{(match[2] or '')[:6].ljust(6, '0')}Z"
+
+    return format_datetime(iso8601.parse_date(value))
+
+
+def serialize_ref(obj):
+    """
+    Serializes a reference to an object with a UUID and name, as per fields.TembaModelField
+    """
+    return {"uuid": str(obj.uuid), "name": obj.name} if obj else None
+
+
 def normalize_extra(extra):
     """
     Normalizes a dict of extra passed to the flow start endpoint. We need to do this for backwards compatibility with
@@ -92,7 +122,9 @@ def _normalize_extra(extra, count):
 
 class ReadSerializer(serializers.ModelSerializer):
     """
-    We deviate slightly from regular REST framework usage with distinct serializers for reading and writing
+    We deviate slightly from regular REST framework usage with distinct serializers for reading and writing. Serializers
+    for high volume endpoints override to_representation to build their output directly, and the declared fields are
+    then only used for documentation and as the reference that output is tested against.
     """
 
     def save(self, **kwargs):  # pragma: no cover
@@ -600,9 +632,15 @@ class ContactReadSerializer(ReadSerializer):
         if not obj.is_active:
             return {}
 
+        values = obj.fields or {}
         fields = {}
-        for contact_field in self.context["contact_fields"]:
-            fields[contact_field.key] = obj.get_field_serialized(contact_field)
+        for key, uuid, engine_type, is_number in self.contact_field_specs:
+            value_dict = values.get(uuid)
+            if value_dict and is_number:
+                value = value_dict.get(engine_type, value_dict.get("decimal"))
+                fields[key] = format_number(Decimal(value)) if value is not None else None
+            else:
+                fields[key] = value_dict.get(engine_type) if value_dict else None
         return fields
 
     def get_blocked(self, obj):
@@ -611,6 +649,37 @@ class ContactReadSerializer(ReadSerializer):
     def get_stopped(self, obj):
         return obj.status == Contact.STATUS_STOPPED if obj.is_active else None
 
+    @cached_property
+    def contact_field_specs(self) -> list[tuple]:
+        # (key, uuid, engine type, is number) for each field so that we're not looking them up for each contact
+        return [
+            (f.key, str(f.uuid), ContactField.ENGINE_TYPES[f.value_type], f.value_type == ContactField.TYPE_NUMBER)
+            for f in self.context["contact_fields"]
+        ]
+
+    def to_representation(self, obj):
+        rep = {"uuid": str(obj.uuid), "name": self.get_name(obj)}
+        if self.context["org"].is_anon:
+            rep["anon_display"] = obj.anon_display
+
+        rep.update(
+            {
+                "status": self.get_status(obj),
+                "language": self.get_language(obj),
+                "urns": self.get_urns(obj),
+                "groups": self.get_groups(obj),
+                "notes": self.get_notes(obj),
+                "fields": self.get_contact_fields(obj),
+                "flow": serialize_ref(obj.current_flow),
+                "created_on": format_iso_datetime(obj.created_on),
+                "modified_on": format_iso_datetime(obj.modified_on),
+                "last_seen_on": format_iso_datetime(obj.last_seen_on),
+                "blocked": self.get_blocked(obj),
+                "stopped": self.get_stopped(obj),
+            }
+        )
+        return rep
+
     class Meta:
         model = Contact
         fields = (
@@ -982,8 +1051,7 @@ class ContactBulkActionSerializer(WriteSerializer):
         elif action == self.UNBLOCK:
             Contact.bulk_change_status(user, contacts, modifiers.Status.ACTIVE)
         elif action == self.DELETE:
-            for contact in contacts:
-                contact.release(user)
+            Contact.bulk_release(user, contacts)
 
 
 class FlowReadSerializer(ReadSerializer):
@@ -1079,7 +1147,7 @@ class FlowRunReadSerializer(ReadSerializer):
                 "value": result["value"],
                 "category": result.get("category"),
                 "node": result["node_uuid"],
-                "time": format_datetime(iso8601.parse_date(result["created_on"])),
+                "time": reformat_datetime(result["created_on"]),
             }
 
         return {k: convert_result(r) for k, r in obj.results.items()}
@@ -1087,6 +1155,22 @@ class FlowRunReadSerializer(ReadSerializer):
     def get_exit_type(self, obj):
         return self.EXIT_TYPES.get(obj.status)
 
+    def to_representation(self, obj):
+        return {
+            "id": obj.id,
+            "uuid": str(obj.uuid),
+            "flow": serialize_ref(obj.flow),
+            "contact": self.fields["contact"].to_representation(obj.contact),
+            "start": self.get_start(obj),
+            "responded": obj.responded,
+            "path": self.get_path(obj),
+            "values": self.get_values(obj),
+            "created_on": format_iso_datetime(obj.created_on),
+            "modified_on": format_iso_datetime(obj.modified_on),
+            "exited_on": format_iso_datetime(obj.exited_on),
+            "exit_type": self.EXIT_TYPES.get(obj.status),
+        }
+
     class Meta:
         model = FlowRun
         fields = (
@@ -1391,6 +1475,29 @@ class MsgReadSerializer(ReadSerializer):
         else:
             return []
 
+    def to_representation(self, obj):
+        return {
+            "id": obj.id,
+            "broadcast": obj.broadcast_id,
+            "contact": serialize_ref(obj.contact),
+            "urn": None if self.context["org"].is_anon or not obj.contact_urn else str(obj.contact_urn),
+            "channel": serialize_ref(obj.channel),
+            "direction": "in" if obj.direction == Msg.DIRECTION_IN else "out",
+            "type": self.TYPES.get(obj.msg_type),
+            "status": self.STATUSES.get(obj.status),
+            "archived": obj.visibility == Msg.VISIBILITY_ARCHIVED,
+            "visibility": self.VISIBILITIES.get(obj.visibility),
+            "text": obj.text,
+            "labels": self.get_labels(obj),
+            "flow": serialize_ref(obj.flow),
+            "attachments": self.get_attachments(obj),
+            "quick_replies": self.get_quick_replies(obj),
+            "created_on": format_iso_datetime(obj.created_on),
+            "sent_on": format_iso_datetime(obj.sent_on),
+            "modified_on": format_iso_datetime(obj.modified_on),
+            "media": obj.attachments[0] if obj.attachments else None,
+        }
+
     class Meta:
         model = Msg
         fields = (
@@ -15,6 +15,7 @@ from temba.api.v2.serializers import normalize_extra
 from temba.contacts.models import Contact
 from temba.flows.models import FlowRun
 from temba.orgs.models import OrgRole
+from temba.utils import json
 
 from . import APITest
 
@@ -298,6 +299,81 @@ class EndpointsTest(APITest):
 
         self.assertEqual(returned_ids, actual_ids)  # ensure all results were returned and in correct order
 
+    @patch("temba.api.views.ListAPIMixin.stream_batch_size", 10)
+    def test_streaming(self):
+        endpoint_url = reverse("api.v2.runs")
+        self.login(self.admin)
+
+        flow = self.create_flow("Test")
+        FlowRun.objects.bulk_create(
+            [
+                FlowRun(org=self.org, flow=flow, contact=self.joe, status="C", exited_on=timezone.now())
+                for r in range(25)
+            ]
+        )
+        actual_ids = list(FlowRun.objects.order_by("-pk").values_list("pk", flat=True))
+
+        # give them all the same modified_on so that we're relying on ids to break ties
+        FlowRun.objects.all().update(modified_on=datetime(2015, 9, 15, 0, 0, 0, 0, tzone.utc))
+
+        def stream(url, **params) -> list:
+            with self.mockReadOnly():
+                response = self.client.get(url, params, HTTP_ACCEPT="application/x-ndjson")
+
+                self.assertEqual(200, response.status_code)
+                self.assertEqual("application/x-ndjson", response["Content-Type"])
+
+                return [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+        # all runs streamed in batches, each followed by a cursor, and a null cursor at the end
+        lines = stream(endpoint_url)
+
+        self.assertEqual(28, len(lines))
+        self.assertEqual(actual_ids, [line["id"] for line in lines if "id" in line])
+        self.assertEqual([10, 21, 27], [i for i, line in enumerate(lines) if "next" in line])
+        self.assertIsNotNone(lines[10]["next"])
+        self.assertIsNone(lines[27]["next"])
+
+        # stream can be limited and will end with the cursor to resume from
+        lines = stream(endpoint_url, limit=15)
+
+        self.assertEqual(17, len(lines))
+        self.assertEqual(actual_ids[:15], [line["id"] for line in lines if "id" in line])
+
+        lines = stream(endpoint_url, cursor=lines[-1]["next"])
+
+        self.assertEqual(actual_ids[15:], [line["id"] for line in lines if "id" in line])
+        self.assertEqual({"next": None}, lines[-1])
+
+        # stream respects ordering and filtering params
+        lines = stream(endpoint_url, reverse="true", limit=3)
+        self.assertEqual(list(reversed(actual_ids))[:3], [line["id"] for line in lines if "id" in line])
+
+        lines = stream(endpoint_url, flow=str(flow.uuid), before="2015-01-01T00:00:00Z")
+        self.assertEqual([{"next": None}], lines)
+
+        # invalid params
+        for params in ({"limit": "-1"}, {"limit": "10000000"}, {"cursor": "xyz"}):
+            response = self.client.get(endpoint_url, params, HTTP_ACCEPT="application/x-ndjson")
+            self.assertEqual(400, response.status_code)
+
+        # a stream can't be requested with the JSON format suffix
+        response = self.client.get(endpoint_url + ".json", HTTP_ACCEPT="application/x-ndjson")
+        self.assertEqual(406, response.status_code)
+
+        # other content types still get regular responses
+        response = self.client.get(endpoint_url + ".json", HTTP_ACCEPT="application/json")
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(25, len(response.json()["results"]))
+
+        response = self.client.get(endpoint_url, HTTP_ACCEPT="text/html")
+        self.assertEqual(200, response.status_code)
+        self.assertIn("text/html", response["Content-Type"])
+
+        # endpoints which don't support streaming don't accept the content type
+        response = self.client.get(reverse("api.v2.flows"), HTTP_ACCEPT="application/x-ndjson")
+        self.assertEqual(406, response.status_code)
+
     @patch("temba.flows.models.FlowStart.create")
     def test_transactions(self, mock_flowstart_create):
         """
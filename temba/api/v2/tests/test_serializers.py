@@ -1,10 +1,22 @@
+from contextlib import nullcontext
+from datetime import datetime, timezone as tzone
+
 from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
 
 from django.conf import settings
 
 from temba.api.v2 import fields
+from temba.api.v2.serializers import (
+    ContactReadSerializer,
+    FlowRunReadSerializer,
+    MsgReadSerializer,
+    format_iso_datetime,
+    reformat_datetime,
+)
 from temba.campaigns.models import Campaign, CampaignEvent
 from temba.contacts.models import Contact, ContactField, ContactURN
+from temba.tests.engine import MockSessionWriter
 
 from . import APITest
 
@@ -401,3 +413,63 @@ class FieldsTest(APITest):
                 },
                 fields.serialize_urn(self.org, urn_dict),
             )
+
+
+class ReadSerializersTest(APITest):
+    def assert_fast_path(self, serializer, objs):
+        renderer = JSONRenderer()
+
+        for obj in objs:
+            self.assertEqual(
+                renderer.render(serializers.Serializer.to_representation(serializer, obj)),
+                renderer.render(serializer.to_representation(obj)),
+                f"fast path mismatch for {obj}",
+            )
+
+    def test_datetimes(self):
+        self.assertIsNone(format_iso_datetime(None))
+        self.assertEqual(
+            "2024-08-14T10:20:30.123456Z", format_iso_datetime(datetime(2024, 8, 14, 10, 20, 30, 123456, tzone.utc))
+        )
+        self.assertEqual("2024-08-14T10:20:30Z", format_iso_datetime(datetime(2024, 8, 14, 10, 20, 30, 0, tzone.utc)))
+
+        self.assertEqual("2024-08-14T10:20:30.123456Z", reformat_datetime("2024-08-14T10:20:30.123456789Z"))
+        self.assertEqual("2024-08-14T10:20:30.120000Z", reformat_datetime("2024-08-14T10:20:30.12Z"))
+        self.assertEqual("2024-08-14T10:20:30.000000Z", reformat_datetime("2024-08-14T10:20:30Z"))
+        self.assertEqual("2024-08-14T08:20:30.123000Z", reformat_datetime("2024-08-14T10:20:30.123+02:00"))
+
+    def test_fast_paths(self):
+        self.create_field("age", "Age", value_type=ContactField.TYPE_NUMBER)
+        self.create_field("nickname", "Nickname")
+        flow = self.get_flow("color_v13")
+        color_split = flow.get_definition()["nodes"][4]
+
+        joe = self.create_contact("Joe", urns=["tel:+593999123456"])
+        self.set_contact_field(joe, "age", "35.50")
+        self.set_contact_field(joe, "nickname", "Jo")
+        ann = self.create_contact("Ann", urns=[], language="spa")
+        gone = self.create_contact("Gone", urns=["tel:+593999123457"])
+        Contact.objects.filter(id=gone.id).update(is_active=False)
+
+        run = (
+            MockSessionWriter(joe, flow)
+            .visit(color_split)
+            .set_result("Color", "blue", "Blue", "it is blue")
+            .complete()
+            .save()
+        )[0]
+        msgs = [
+            self.create_incoming_msg(joe, "hi", attachments=["image/jpeg:https://example.com/test.jpg"]),
+            self.create_outgoing_msg(ann, "hello", quick_replies=["yes", "no"]),
+        ]
+        self.create_label("Spam").toggle_label([msgs[0]], add=True)
+
+        contacts = Contact.objects.filter(org=self.org).order_by("id")
+        context = {"org": self.org, "contact_fields": ContactField.get_fields(self.org)}
+
+        for anon in (False, True):
+            with self.anonymous(self.org) if anon else nullcontext():
+                self.assert_fast_path(ContactReadSerializer(context=context), contacts)
+                self.assert_fast_path(MsgReadSerializer(context=context), msgs)
+                self.assert_fast_path(FlowRunReadSerializer(context={**context, "include_paths": True}), [run])
+                self.assert_fast_path(FlowRunReadSerializer(context={**context, "include_paths": False}), [run])
@@ -230,6 +230,15 @@ class RootView(BaseEndpoint):
     The rate limit for all endpoints is 2,500 requests per hour. It is important to honor the Retry-After header when
     encountering 429 responses as the limit is subject to change without notice.
 
+    ## Streaming
+
+    The contacts, messages and runs endpoints can also return all matching resources in a single response, which is
+    much faster than paging through results when you need to fetch large numbers of resources. To do this, make a
+    request with an `Accept: application/x-ndjson` header, and optionally a `limit` on the number of resources. The
+    response will contain one JSON object per line for each resource, and periodically a line like `{"next": "..."}`
+    whose value can be passed as the `cursor` parameter to resume from that point if you lose your connection. The
+    last line will be `{"next": null}` if there are no more resources.
+
     ## Date Values
 
     Many endpoints either return datetime values or can take datatime parameters. The values returned will always be in
@@ -1241,6 +1250,7 @@ class ContactsEndpoint(ListAPIMixin, WriteAPIMixin, DeleteAPIMixin, BaseEndpoint
     write_serializer_class = ContactWriteSerializer
     write_with_transaction = False
     pagination_class = ModifiedOnCursorPagination
+    streamable = True
     throttle_scope = "v2.contacts"
     lookup_params = {"uuid": "uuid", "urn": "urns__identity"}
 
@@ -2354,6 +2364,7 @@ class MessagesEndpoint(ListAPIMixin, WriteAPIMixin, BaseEndpoint):
     write_serializer_class = MsgWriteSerializer
     write_with_transaction = False
     pagination_class = Pagination
+    streamable = True
     exclusive_params = ("contact", "folder", "label", "broadcast")
     throttle_scope = "v2.messages"
 
@@ -2951,6 +2962,7 @@ class RunsEndpoint(ListAPIMixin, BaseEndpoint):
     model = FlowRun
     serializer_class = FlowRunReadSerializer
     pagination_class = ModifiedOnCursorPagination
+    streamable = True
     exclusive_params = ("contact", "flow")
     throttle_scope = "v2.runs"
 
@@ -1,18 +1,22 @@
+import base64
 import contextlib
+import json
 from uuid import UUID
 
 import iso8601
 from rest_framework import generics, mixins, status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from smartmin.views import SmartCRUDL
 
 from django.db import transaction
-from django.http import HttpResponseRedirect
+from django.db.models import Q
+from django.http import HttpResponseRedirect, StreamingHttpResponse
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
 from temba import mailroom
-from temba.api.support import InvalidQueryError
+from temba.api.support import InvalidQueryError, NDJSONRenderer
 from temba.contacts.models import URN
 from temba.orgs.views.base import BaseDeleteModal, BaseListView
 from temba.utils.models import TembaModel
@@ -106,10 +110,14 @@ class BaseAPIView(NonAtomicMixin, generics.GenericAPIView):
 
 class ListAPIMixin(mixins.ListModelMixin):
     """
-    Mixin for any endpoint which returns a list of objects from a GET request
+    Mixin for any endpoint which returns a list of objects from a GET request. Endpoints which are streamable can also
+    return all their objects as a single stream of newline delimited JSON if requested with that content type.
     """
 
     exclusive_params = ()
+    streamable = False
+    stream_batch_size = 1000
+    stream_max_limit = 5_000_000
 
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
@@ -117,12 +125,89 @@ class ListAPIMixin(mixins.ListModelMixin):
     def list(self, request, *args, **kwargs):
         self.check_query(self.request.query_params)
 
-        if self.is_docs():
+        if self.is_stream():
+            return self.stream(request)
+        elif self.is_docs():
             # if this is just a request to browse the endpoint docs, don't make a query
             return Response([])
         else:
             return super().list(request, *args, **kwargs)
 
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.streamable:
+            renderers.append(NDJSONRenderer())
+        return renderers
+
+    def is_stream(self) -> bool:
+        return isinstance(self.request.accepted_renderer, NDJSONRenderer)
+
+    def stream(self, request):
+        """
+        Streams up to limit objects as NDJSON, fetching them in batches using keyset pagination on the same ordering as
+        the regular paginator. Each batch is followed by a {"next": <cursor>} line that can be passed back as the cursor
+        param to resume the stream after that batch, and the stream ends with {"next": null} if there are no more.
+        """
+        limit = self.get_int_param("limit") or self.stream_max_limit
+        if not (0 < limit <= self.stream_max_limit):
+            raise InvalidQueryError(f"Value for limit must be between 1 and {self.stream_max_limit}")
+
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = self.paginator.get_ordering(request, queryset, self)
+        field, descending = ordering[0].lstrip("-"), ordering[0].startswith("-")
+        position = self.decode_stream_cursor(request.query_params.get("cursor"))
+
+        # keyset pagination can't page through nulls
+        queryset = queryset.filter(**{f"{field}__isnull": False}).order_by(*ordering)
+
+        def generate():
+            nonlocal position, limit
+
+            renderer = JSONRenderer()
+            lookup = "lt" if descending else "gt"
+
+            while limit > 0:
+                batch_qs = queryset
+                if position:
+                    value, last_id = position
+                    batch_qs = batch_qs.filter(
+                        Q(**{f"{field}__{lookup}": value}) | Q(**{field: value, f"id__{lookup}": last_id})
+                    )
+
+                batch_size = min(self.stream_batch_size, limit)
+                batch = list(batch_qs[:batch_size])
+
+                if batch:
+                    self.prepare_for_serialization(batch, using=queryset.db)
+
+                    for item in self.get_serializer(batch, many=True).data:
+                        yield renderer.render(item) + b"\n"
+
+                if len(batch) < batch_size:
+                    yield b'{"next":null}\n'
+                    return
+
+                position = (getattr(batch[-1], field), batch[-1].id)
+                limit -= len(batch)
+
+                yield renderer.render({"next": self.encode_stream_cursor(position)}) + b"\n"
+
+        return StreamingHttpResponse(generate(), content_type=NDJSONRenderer.media_type)
+
+    def encode_stream_cursor(self, position: tuple) -> str:
+        value, last_id = position
+        return base64.urlsafe_b64encode(json.dumps([value.isoformat(), last_id]).encode()).decode()
+
+    def decode_stream_cursor(self, cursor: str) -> tuple:
+        if not cursor:
+            return None
+
+        try:
+            value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return iso8601.parse_date(value), int(last_id)
+        except (ValueError, TypeError):
+            raise InvalidQueryError("Invalid cursor")
+
     def check_query(self, params):
         # check user hasn't provided values for more than one of any exclusive params
         if sum([(1 if params.get(p) else 0) for p in self.exclusive_params]) > 1:
@@ -0,0 +1,183 @@
+import base64
+import hashlib
+from datetime import datetime
+
+import iso8601
+
+# fields we summarize in archive indexes, keyed by the field name used in where dicts
+INDEXED_VALUES = {
+    "flow__uuid": lambda r: [(r.get("flow") or {}).get("uuid")],
+    "visibility": lambda r: [r.get("visibility")],
+    "direction": lambda r: [r.get("direction")],
+    "status": lambda r: [r.get("status")],
+    "labels__uuid": lambda r: [lb.get("uuid") for lb in r.get("labels") or []],
+}
+INDEXED_RANGES = {"created_on"}
+
+# fields with more distinct values than this are summarized with a bloom filter rather than a set of values
+MAX_EXACT_VALUES = 256
+
+INDEX_VERSION = 1
+
+
+class BloomFilter:
+    """
+    Simple bloom filter for summarizing high cardinality fields like UUIDs
+    """
+
+    def __init__(self, num_bits: int, num_hashes: int, bits: bytearray = None):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bits if bits is not None else bytearray((num_bits + 7) // 8)
+
+    @classmethod
+    def for_values(cls, values):
+        # 10 bits per value and 7 hashes gives a false positive rate of ~1%
+        bloom = cls(max(64, len(values) * 10), 7)
+        for v in values:
+            bloom.add(v)
+        return bloom
+
+    def _positions(self, value) -> list:
+        digest = hashlib.sha256(str(value).encode("utf-8")).digest()
+        h1, h2 = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:16], "big")
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, value):
+        for p in self._positions(value):
+            self.bits[p // 8] |= 1 << (p % 8)
+
+    def __contains__(self, value) -> bool:
+        return all(self.bits[p // 8] & (1 << (p % 8)) for p in self._positions(value))
+
+    def as_json(self) -> dict:
+        return {"bits": self.num_bits, "hashes": self.num_hashes, "data": base64.b64encode(self.bits).decode()}
+
+    @classmethod
+    def from_json(cls, data: dict):
+        return cls(data["bits"], data["hashes"], bytearray(base64.b64decode(data["data"])))
+
+
+class IndexBuilder:
+    """
+    Accumulates a summary of records as they're written to an archive
+    """
+
+    def __init__(self):
+        self.record_count = 0
+        self.values = {f: set() for f in INDEXED_VALUES}
+        self.ranges = {}
+        self.blocks = []
+
+    def add(self, record: dict):
+        self.record_count += 1
+
+        for field, extract in INDEXED_VALUES.items():
+            self.values[field].update(extract(record))
+
+        for field in INDEXED_RANGES:
+            value = record.get(field)
+            if value:
+                value = iso8601.parse_date(value)
+                current = self.ranges.get(field)
+                self.ranges[field] = (min(current[0], value), max(current[1], value)) if current else (value, value)
+
+    def add_block(self, size: int):
+        """
+        Records the compressed size of the next block of the archive
+        """
+        self.blocks.append(size)
+
+    def as_json(self) -> dict:
+        fields = {}
+        for field, values in self.values.items():
+            if len(values) <= MAX_EXACT_VALUES:
+                fields[field] = {"values": sorted(values, key=lambda v: (v is not None, v))}
+            else:
+                fields[field] = {"has_null": None in values, "bloom": BloomFilter.for_values(values - {None}).as_json()}
+
+        for field, (min_value, max_value) in self.ranges.items():
+            fields[field] = {"min": min_value.isoformat(), "max": max_value.isoformat()}
+
+        index = {"version": INDEX_VERSION, "record_count": self.record_count, "fields": fields}
+        if self.blocks:
+            index["blocks"] = self.blocks
+        return index
+
+
+def build_index(records) -> dict:
+    """
+    Builds an index for the given records
+    """
+    builder = IndexBuilder()
+    for record in records:
+        builder.add(record)
+    return builder.as_json()
+
+
+def may_match(index: dict, where: dict) -> bool:
+    """
+    Checks whether an archive with the given index could contain records matching the given where dict. This errs on
+    the side of returning true for any conditions that can't be answered from the index.
+    """
+    if index.get("version") != INDEX_VERSION:
+        return True
+    if index["record_count"] == 0:
+        return False
+
+    fields = index["fields"]
+
+    for key, val in where.items():
+        field, _, lookup = key.rpartition("__")
+        if lookup not in ("in", "isnull", "any", "gt", "gte", "lt", "lte"):
+            field, lookup = key, "eq"
+
+        if field == "flow" and lookup == "isnull":
+            field = "flow__uuid"
+
+        summary = fields.get(field)
+        if not summary:
+            continue
+
+        if lookup in ("eq", "any") and not _may_contain(summary, val):
+            return False
+        elif lookup == "in" and not any(_may_contain(summary, v) for v in val):
+            return False
+        elif lookup == "isnull" and not _may_contain_null(summary, val):
+            return False
+        elif lookup in ("gt", "gte", "lt", "lte") and not _may_be_in_range(summary, lookup, val):
+            return False
+
+    return True
+
+
+def _may_contain(summary: dict, value) -> bool:
+    if "values" in summary:
+        return value in summary["values"]
+    if "bloom" in summary:
+        return value is None and summary["has_null"] or str(value) in BloomFilter.from_json(summary["bloom"])
+    return True
+
+
+def _may_contain_null(summary: dict, isnull: bool) -> bool:
+    if "values" in summary:
+        values = summary["values"]
+        return None in values if isnull else any(v is not None for v in values)
+    if "bloom" in summary:
+        return summary["has_null"] if isnull else True
+    return True
+
+
+def _may_be_in_range(summary: dict, lookup: str, value) -> bool:
+    if "min" not in summary or not isinstance(value, datetime):
+        return True
+
+    min_value, max_value = iso8601.parse_date(summary["min"]), iso8601.parse_date(summary["max"])
+
+    if lookup == "gt":
+        return max_value > value
+    elif lookup == "gte":
+        return max_value >= value
+    elif lookup == "lt":
+        return min_value < value
+    return min_value <= value
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from temba.archives.models import Archive
+from temba.orgs.models import Org
+
+
+class Command(BaseCommand):
+    help = "Builds sidecar indexes for archives which don't have them"
+
+    def add_arguments(self, parser):
+        parser.add_argument("org_id", help="ID of the org whose archives will be indexed")
+        parser.add_argument(
+            "archive_type", choices=[Archive.TYPE_MSG, Archive.TYPE_FLOWRUN], help="The type of archives to index"
+        )
+
+    def handle(self, org_id: int, archive_type: str, **options):
+        org = Org.objects.filter(id=org_id).first()
+        if not org:
+            raise CommandError(f"No such org with id {org_id}")
+
+        archives = Archive._get_covering_period(org, archive_type).filter(has_index=False)
+
+        self.stdout.write(f"Indexing {archives.count()} {archive_type} archives for org '{org.name}'...")
+
+        for archive in archives:
+            archive.build_index()
+
+            self.stdout.write(f" > id={archive.id} start_date={archive.start_date.isoformat()} indexed")
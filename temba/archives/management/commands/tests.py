@@ -21,3 +21,22 @@ class SearchArchivesTest(TembaTest):
 
         self.assertIn('"id": 1', out.getvalue())
         self.assertIn("Fetched 2 records in", out.getvalue())
+
+
+class IndexArchivesTest(TembaTest):
+    def test_command(self):
+        archive = self.create_archive(
+            Archive.TYPE_MSG,
+            "D",
+            date(2020, 8, 1),
+            [{"id": 1, "created_on": "2020-07-30T10:00:00Z", "visibility": "visible"}],
+        )
+
+        out = StringIO()
+        call_command("index_archives", self.org.id, "message", stdout=out)
+
+        self.assertIn("Indexing 1 message archives", out.getvalue())
+
+        archive.refresh_from_db()
+        self.assertTrue(archive.has_index)
+        self.assertFalse(archive.may_match({"visibility": "archived"}))
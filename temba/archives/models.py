@@ -2,8 +2,14 @@ import base64
 import gzip
 import hashlib
 import io
+import itertools
+import queue
 import re
 import tempfile
+import threading
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
 from gettext import gettext as _
 
@@ -17,12 +23,27 @@ from django.utils import timezone
 from temba.utils import json, s3
 from temba.utils.s3 import EventStreamReader
 
+from .index import IndexBuilder, may_match
+
+# archives are written as a sequence of independently compressed gzip members (blocks) of this many records so that
+# they can be decompressed concurrently and rewritten without recompressing unchanged blocks
+BLOCK_RECORDS = 10_000
+BLOCK_MAX_COPY_BYTES = 64 * 1024 * 1024
+SCAN_CHUNK_SIZE = 64 * 1024
+
 KEY_PATTERN = re.compile(r"^(?P<org>\d+)/(?P<type>run|message)_(?P<period>(D|M)\d+)_(?P<hash>[0-9a-f]{32})\.jsonl\.gz$")
 
 
 class Archive(models.Model):
     DOWNLOAD_EXPIRES = 60 * 60 * 24  # Up to 24 hours
 
+    # limit on the number of decoded records buffered ahead of the reader for each archive being prefetched
+    PREFETCH_MAX_RECORDS = 10_000
+    PREFETCH_CHUNK_SIZE = 1_000
+
+    # number of threads used to decompress the blocks of a single archive
+    DECODE_WORKERS = 4
+
     TYPE_MSG = "message"
     TYPE_FLOWRUN = "run"
     TYPE_CHOICES = ((TYPE_MSG, _("Message")), (TYPE_FLOWRUN, _("Run")))
@@ -52,6 +73,9 @@ class Archive(models.Model):
     # when this archive's records where deleted (if any)
     deleted_on = models.DateTimeField(null=True)
 
+    # whether this archive has a sidecar index file in storage
+    has_index = models.BooleanField(default=False)
+
     @classmethod
     def storage(cls):
         return storages["archives"]
@@ -62,6 +86,13 @@ class Archive(models.Model):
         """
         return s3.split_url(self.url)
 
+    def get_index_location(self) -> tuple:
+        """
+        Returns a tuple of the storage bucket and key of the sidecar index for this archive
+        """
+        bucket, key = self.get_storage_location()
+        return bucket, _index_key(key)
+
     def get_end_date(self):
         """
         Gets the date this archive ends non-inclusive
@@ -72,13 +103,18 @@ class Archive(models.Model):
             return self.start_date + relativedelta(months=1)
 
     @classmethod
-    def delete_for_org(cls, org):
+    def delete_for_org(cls, org) -> int:
         """
-        Deletes all the archives for an org and any additional archive files in storage.
+        Deletes all the archives for an org and any additional archive files in storage, returning the number of files
+        deleted.
         """
 
-        for archive in Archive.objects.filter(org=org):
-            archive.delete()
+        archives = Archive.objects.filter(org=org)
+
+        num_deleted, _ = s3.delete_objects(itertools.chain.from_iterable(a._get_files() for a in archives))
+
+        archives.update(rollup=None)
+        archives.delete()
 
         # find any remaining S3 files and remove them for this org
         s3_bucket = cls.storage().bucket.name
@@ -88,9 +124,9 @@ class Archive(models.Model):
         for page in paginator.paginate(Bucket=s3_bucket, Prefix=f"{org.id}/"):
             archive_objs = page.get("Contents", [])
             if archive_objs:
-                s3_client.delete_objects(
-                    Bucket=s3_bucket, Delete={"Objects": [{"Key": o["Key"]} for o in archive_objs]}
-                )
+                num_deleted += s3.delete_objects([(s3_bucket, o["Key"]) for o in archive_objs])[0]
+
+        return num_deleted
 
     def get_download_link(self):
         if self.url:
@@ -138,10 +174,38 @@ class Archive(models.Model):
 
     @classmethod
     def iter_all_records(
-        cls, org, archive_type: str, after: datetime = None, before: datetime = None, where: dict = None
+        cls,
+        org,
+        archive_type: str,
+        after: datetime = None,
+        before: datetime = None,
+        where: dict = None,
+        prefetch: int = 0,
     ):
         """
-        Creates a record iterator across archives of the given type for records which match the given criteria
+        Creates a record iterator across archives of the given type for records which match the given criteria. If
+        prefetch is non-zero, up to that many upcoming archives are fetched concurrently while the current one is being
+        consumed, though records are still returned in archive order.
+        """
+
+        archives = cls.iter_archive_records(org, archive_type, after, before, where=where, prefetch=prefetch)
+
+        return itertools.chain.from_iterable(records for _, records in archives)
+
+    @classmethod
+    def iter_archive_records(
+        cls,
+        org,
+        archive_type: str,
+        after: datetime = None,
+        before: datetime = None,
+        where: dict = None,
+        prefetch: int = 0,
+        ending_after: date = None,
+    ):
+        """
+        Like iter_all_records but yields tuples of each archive and an iterator of its matching records, so that callers
+        can tell when they've consumed an entire archive. Archives which end on or before ending_after are skipped.
         """
 
         if not where:
@@ -152,13 +216,75 @@ class Archive(models.Model):
             where["created_on__lte"] = before
 
         archives = cls._get_covering_period(org, archive_type, after, before)
+        if ending_after:
+            archives = [a for a in archives if a.get_end_date() > ending_after]
 
-        def generator():
-            for archive in archives:
-                for record in archive.iter_records(where=where):
-                    yield record
+        if prefetch > 0:
+            return cls._iter_prefetched(list(archives), where, prefetch, cls.PREFETCH_MAX_RECORDS)
+
+        return ((archive, archive.iter_records(where=where)) for archive in archives)
+
+    @classmethod
+    def _iter_prefetched(cls, archives: list, where: dict, num_workers: int, max_records: int):
+        """
+        Iterates over the given archives and their records, streaming upcoming archives in a thread pool. Each worker
+        passes decoded records to the reader through a bounded queue, so at most max_records records are buffered for
+        each archive in flight, and records are still returned in archive order.
+        """
 
-        return generator()
+        chunk_size = min(cls.PREFETCH_CHUNK_SIZE, max_records)
+        stopped = threading.Event()
+
+        def put(buffer: queue.Queue, cancelled: threading.Event, item) -> bool:
+            while not (stopped.is_set() or cancelled.is_set()):
+                try:
+                    buffer.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def fetch(archive, buffer: queue.Queue, cancelled: threading.Event):
+            try:
+                for chunk in itertools.batched(archive.iter_records(where=where), chunk_size):
+                    if not put(buffer, cancelled, (chunk, None)):
+                        return
+                put(buffer, cancelled, (None, None))
+            except Exception as e:
+                put(buffer, cancelled, (None, e))
+
+        def read(buffer: queue.Queue):
+            while True:
+                chunk, error = buffer.get()
+                if error:
+                    raise error
+                if chunk is None:
+                    return
+                yield from chunk
+
+        executor = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="archive-prefetch")
+        pending = deque()  # of (archive, buffer, cancelled) in archive order
+        next_index = 0
+
+        try:
+            while pending or next_index < len(archives):
+                while next_index < len(archives) and len(pending) < num_workers:
+                    archive = archives[next_index]
+                    buffer, cancelled = queue.Queue(maxsize=max(1, max_records // chunk_size)), threading.Event()
+
+                    executor.submit(fetch, archive, buffer, cancelled)
+                    pending.append((archive, buffer, cancelled))
+                    next_index += 1
+
+                archive, buffer, cancelled = pending.popleft()
+
+                yield archive, read(buffer)
+
+                # if the reader moved on without consuming all records, free up that worker
+                cancelled.set()
+        finally:
+            stopped.set()
+            executor.shutdown(wait=False, cancel_futures=True)
 
     def iter_records(self, *, where: dict = None):
         """
@@ -167,6 +293,9 @@ class Archive(models.Model):
 
         s3_client = s3.client()
 
+        if where and not self.may_match(where):
+            return iter(())
+
         if where:
             bucket, key = self.get_storage_location()
             response = s3_client.select_object_content(
@@ -187,8 +316,64 @@ class Archive(models.Model):
         else:
             bucket, key = self.get_storage_location()
             s3_obj = s3_client.get_object(Bucket=bucket, Key=key)
+
+            # if our index knows where our blocks are, they can be decompressed concurrently
+            blocks = (self._get_index() or {}).get("blocks") if self.has_index else None
+            if blocks and len(blocks) > 1:
+                return jsonlgz_iterate_blocks(s3_obj["Body"], blocks, num_workers=self.DECODE_WORKERS)
+
             return jsonlgz_iterate(s3_obj["Body"])
 
+    def may_match(self, where: dict) -> bool:
+        """
+        Checks whether this archive could contain records matching the given criteria, using our index if we have one
+        """
+        if not self.has_index:
+            return True
+
+        index = self._get_index()
+
+        return may_match(index, where) if index else True
+
+    def _get_index(self) -> dict:
+        if not hasattr(self, "_index"):
+            bucket, key = self.get_index_location()
+            try:
+                s3_obj = s3.client().get_object(Bucket=bucket, Key=key)
+                self._index = json.loads(s3_obj["Body"].read())
+            except s3.client().exceptions.NoSuchKey:  # pragma: no cover
+                self._index = None
+
+        return self._index
+
+    def build_index(self):
+        """
+        Builds the sidecar index for an existing archive, including the sizes of its blocks
+        """
+        bucket, key = self.get_storage_location()
+        s3_obj = s3.client().get_object(Bucket=bucket, Key=key)
+
+        index = IndexBuilder()
+        for record in jsonlgz_iterate(s3_obj["Body"], on_block=index.add_block):
+            index.add(record)
+
+        self._save_index(index.as_json())
+
+    def _save_index(self, index: dict):
+        bucket, key = self.get_index_location()
+
+        s3.client().put_object(
+            Bucket=bucket,
+            Key=key,
+            Body=json.dumps(index).encode("utf-8"),
+            ContentType="application/json",
+            ACL="private",
+        )
+
+        self._index = index
+        self.has_index = True
+        self.save(update_fields=("has_index",))
+
     def rewrite(self, transform, delete_old=False):
         s3_client = s3.client()
         bucket, key = self.get_storage_location()
@@ -196,8 +381,17 @@ class Archive(models.Model):
         s3_obj = s3_client.get_object(Bucket=bucket, Key=key)
         old_file = s3_obj["Body"]
 
+        # build a new index of the records as we write them
+        index = IndexBuilder()
+
+        def transform_and_index(record):
+            record = transform(record)
+            if record is not None:
+                index.add(record)
+            return record
+
         new_file = tempfile.TemporaryFile()
-        new_hash, new_size = jsonlgz_rewrite(old_file, new_file, transform)
+        new_hash, new_size = jsonlgz_rewrite(old_file, new_file, transform_and_index, on_block=index.add_block)
 
         new_file.seek(0)
 
@@ -222,70 +416,195 @@ class Archive(models.Model):
         self.size = new_size
         self.save(update_fields=("url", "hash", "size"))
 
+        had_index = self.has_index
+        self._save_index(index.as_json())
+
         if delete_old:
             s3_client.delete_object(Bucket=bucket, Key=key)
+            if had_index:
+                s3_client.delete_object(Bucket=bucket, Key=_index_key(key))
 
     def delete(self):
         # detach us from our rollups
         Archive.objects.filter(rollup=self).update(rollup=None)
 
-        # delete our archive file from storage
-        if self.url:
-            bucket, key = self.get_storage_location()
-            s3.client().delete_object(Bucket=bucket, Key=key)
+        # delete our archive file and its index from storage
+        s3.delete_objects(self._get_files())
 
         # and lastly delete ourselves
         super().delete()
 
+    def _get_files(self) -> list[tuple[str, str]]:
+        """
+        Gets the storage locations of this archive's file and its index
+        """
+        if not self.url:
+            return []
+
+        bucket, key = self.get_storage_location()
+        return [(bucket, key), (bucket, _index_key(key))] if self.has_index else [(bucket, key)]
+
     class Meta:
         unique_together = ("org", "archive_type", "start_date", "period")
 
 
-def jsonlgz_iterate(in_file):
+def _index_key(key: str) -> str:
+    return key.removesuffix(".jsonl.gz") + ".idx.json"
+
+
+def jsonlgz_iterate(in_file, *, on_block=None):
     """
-    Iterates over a records in a gzipped JSONL stream
+    Iterates over the records in a gzipped JSONL stream, which may be a single gzip member or a sequence of blocks. If
+    on_block is provided it's called with the compressed size of each block.
     """
-    in_stream = gzip.GzipFile(fileobj=in_file, mode="r")
 
     def generator():
-        for line in in_stream:
-            record = json.loads(line.decode("utf-8"))
-            yield record
+        for event, value in _jsonlgz_scan(in_file, max_buffer=0):
+            if event == "line":
+                yield json.loads(value.decode("utf-8"))
+            elif on_block:
+                on_block(value[0])
 
     return generator()
 
 
-def jsonlgz_rewrite(in_file, out_file, transform) -> tuple:
+def jsonlgz_iterate_blocks(in_file, blocks: list[int], *, num_workers: int):
     """
-    Rewrites a stream of gzipped JSONL using a transformation function and returns the new MD5 hash and size
+    Iterates over the records in a gzipped JSONL stream whose block sizes are known, decompressing upcoming blocks in a
+    thread pool whilst the current one is being consumed. Records are still returned in order.
     """
-    out_wrapped = FileAndHash(out_file)
-    out_stream = gzip.GzipFile(fileobj=out_wrapped, mode="w")
 
-    for record in jsonlgz_iterate(in_file):
-        record = transform(record)
-        if record is not None:
-            new_line = (json.dumps(record) + "\n").encode("utf-8")
-            out_stream.write(new_line)
+    def decode(data: bytes) -> list:
+        lines = zlib.decompress(data, wbits=zlib.MAX_WBITS | 16).split(b"\n")
+        return [json.loads(line.decode("utf-8")) for line in lines if line]
+
+    def generator():
+        executor = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="archive-decode")
+        pending = deque()
+        try:
+            for size in blocks:
+                pending.append(executor.submit(decode, in_file.read(size)))
+
+                if len(pending) > num_workers:
+                    yield from pending.popleft().result()
 
-    out_stream.close()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
 
-    return out_wrapped.hash, out_wrapped.size
+    return generator()
+
+
+def jsonlgz_rewrite(in_file, out_file, transform, *, on_block=None) -> tuple:
+    """
+    Rewrites a stream of gzipped JSONL using a transformation function and returns the new MD5 hash and size. Blocks
+    whose records are unchanged by the transform are copied as is without being recompressed. Changed blocks, and
+    any blocks too big to copy, are recompressed as blocks of at most BLOCK_RECORDS records.
+    """
+    out = FileAndHash(out_file)
+    records, changed, num_read = [], False, 0
+
+    def write(data: bytes):
+        out.write(data)
+        if on_block:
+            on_block(len(data))
+
+    for event, value in _jsonlgz_scan(in_file, max_buffer=BLOCK_MAX_COPY_BYTES):
+        if event == "line":
+            original = json.loads(value.decode("utf-8"))
+            record = transform(json.loads(value.decode("utf-8")))
+            num_read += 1
+
+            if record != original or num_read > BLOCK_RECORDS:
+                changed = True
+            if changed and len(records) >= BLOCK_RECORDS:
+                write(_jsonlgz_block(records))
+                records = []
+
+            if record is not None:
+                records.append(record)
+        else:
+            _, member = value
+
+            if not changed and member is not None:
+                write(member)
+            elif records:
+                write(_jsonlgz_block(records))
+
+            records, changed, num_read = [], False, 0
+
+    # if every record was removed, write an empty block so the output is still valid gzip
+    if not out.size:
+        write(_jsonlgz_block([]))
+
+    return out.hash, out.size
 
 
 def jsonlgz_encode(records: list) -> tuple:
     stream = io.BytesIO()
     wrapper = FileAndHash(stream)
-    gz = gzip.GzipFile(fileobj=wrapper, mode="wb")
 
-    for record in records:
-        gz.write(json.dumps(record).encode("utf-8"))
-        gz.write(b"\n")
-    gz.close()
+    for batch in itertools.batched(records, BLOCK_RECORDS):
+        wrapper.write(_jsonlgz_block(batch))
+
+    if not records:
+        wrapper.write(_jsonlgz_block([]))
 
     return stream, wrapper.hash.hexdigest(), wrapper.size
 
 
+def _jsonlgz_block(records) -> bytes:
+    """
+    Encodes the given records as a single block (gzip member) of JSONL
+    """
+    return gzip.compress(b"".join(json.dumps(r).encode("utf-8") + b"\n" for r in records))
+
+
+def _jsonlgz_scan(in_file, *, max_buffer: int):
+    """
+    Scans a gzipped JSONL stream, yielding ("line", bytes) for each line and ("block", (size, data)) at the end of each
+    gzip member, where data is the compressed member or None if it's bigger than max_buffer
+    """
+    decomp = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    member, size, partial, data = bytearray(), 0, b"", b""
+
+    while True:
+        if not data:
+            data = in_file.read(SCAN_CHUNK_SIZE)
+            if not data:
+                break
+
+        out = decomp.decompress(data)
+        consumed = len(data) - len(decomp.unused_data) if decomp.eof else len(data)
+        size += consumed
+
+        if member is not None:
+            member += data[:consumed]
+            if len(member) > max_buffer:
+                member = None
+
+        data = data[consumed:]
+
+        lines = (partial + out).split(b"\n")
+        partial = lines.pop()
+        for line in lines:
+            if line:
+                yield "line", line
+
+        if decomp.eof:
+            if partial:
+                yield "line", partial
+
+            yield "block", (size, bytes(member) if member is not None else None)
+
+            decomp = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+            member, size, partial = bytearray(), 0, b""
+
+    if size:
+        raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+
+
 class FileAndHash:
     """
     Stream which writes to both a child stream and a MD5 hash
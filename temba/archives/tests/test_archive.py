@@ -1,5 +1,6 @@
 import base64
 from datetime import date, datetime, timezone as tzone
+from unittest.mock import patch
 
 from temba.archives.models import Archive
 from temba.tests import TembaTest
@@ -70,6 +71,78 @@ class ArchiveTest(TembaTest):
             self.s3_calls,
         )
 
+    def test_index(self):
+        archive = self.create_archive(
+            Archive.TYPE_MSG,
+            "D",
+            date(2020, 8, 1),
+            [
+                {"id": 1, "created_on": "2020-08-01T10:00:00Z", "visibility": "visible", "direction": "in"},
+                {"id": 2, "created_on": "2020-08-01T15:00:00Z", "visibility": "archived", "direction": "in"},
+            ],
+        )
+        bucket, key = archive.get_storage_location()
+
+        self.assertFalse(archive.has_index)
+        self.assertEqual((bucket, key.replace(".jsonl.gz", ".idx.json")), archive.get_index_location())
+
+        # without an index, archive can always match
+        self.assertTrue(archive.may_match({"direction": "out"}))
+
+        archive.build_index()
+
+        archive = Archive.objects.get(id=archive.id)
+        self.assertTrue(archive.has_index)
+
+        self.s3_calls = []
+
+        # archive can be skipped entirely if index says no records can match
+        self.assertEqual([], list(archive.iter_records(where={"direction": "out"})))
+        self.assertEqual([2], [r["id"] for r in archive.iter_records(where={"visibility": "archived"})])
+
+        # index only fetched once
+        self.assertEqual(["GetObject", "SelectObjectContent"], [c[0] for c in self.s3_calls])
+
+        # index is rebuilt when archive is rewritten
+        archive.rewrite(lambda r: r if r["visibility"] == "visible" else None, delete_old=True)
+
+        self.assertEqual(
+            ["GetObject", "PutObject", "PutObject", "DeleteObject", "DeleteObject"], [c[0] for c in self.s3_calls]
+        )
+        self.assertEqual({"Bucket": bucket, "Key": key.replace(".jsonl.gz", ".idx.json")}, self.s3_calls[-1][1])
+
+        archive = Archive.objects.get(id=archive.id)
+        self.assertTrue(archive.has_index)
+        self.assertFalse(archive.may_match({"visibility": "archived"}))
+
+        # deleting the archive deletes the index too
+        bucket, key = archive.get_storage_location()
+        archive.delete()
+
+        self.assertEqual({"Bucket": bucket, "Key": key.replace(".jsonl.gz", ".idx.json")}, self.s3_calls[-1][1])
+
+    @patch("temba.archives.models.BLOCK_RECORDS", 2)
+    def test_iter_records_blocks(self):
+        records = [{"id": i} for i in range(1, 6)]
+        archive = self.create_archive(Archive.TYPE_MSG, "D", date(2024, 8, 14), records)
+        archive.build_index()
+
+        archive = Archive.objects.get(id=archive.id)
+        blocks = archive._get_index()["blocks"]
+
+        self.assertEqual(3, len(blocks))
+        self.assertEqual(archive.size, sum(blocks))
+
+        # with an index, blocks are decompressed concurrently but records still come back in order
+        self.assertEqual(records, list(archive.iter_records()))
+
+        # rewriting updates the block sizes in the index
+        archive.rewrite(lambda r: r if r["id"] > 2 else None, delete_old=True)
+
+        archive = Archive.objects.get(id=archive.id)
+        self.assertEqual(2, len(archive._get_index()["blocks"]))
+        self.assertEqual([{"id": 3}, {"id": 4}, {"id": 5}], list(archive.iter_records()))
+
     def test_iter_all_records(self):
         d1 = self.create_archive(
             Archive.TYPE_MSG,
@@ -150,6 +223,48 @@ class ArchiveTest(TembaTest):
             [4, 5],
         )
 
+        # prefetching archives concurrently doesn't change the order of records
+        assert_records(Archive.iter_all_records(self.org, Archive.TYPE_MSG, prefetch=2), [1, 2, 3, 4, 5, 6])
+        assert_records(
+            Archive.iter_all_records(
+                self.org,
+                Archive.TYPE_MSG,
+                after=datetime(2020, 7, 30, 12, 0, 0, 0, tzone.utc),
+                where={"contact__name": "Bob"},
+                prefetch=3,
+            ),
+            [4, 5, 6],
+        )
+
+        # and works even if only a single record can be buffered per archive
+        archives = list(Archive._get_covering_period(self.org, Archive.TYPE_MSG))
+        assert_records(
+            (r for _, records in Archive._iter_prefetched(archives, None, 4, max_records=1) for r in records),
+            [1, 2, 3, 4, 5, 6],
+        )
+
+        # or if the reader skips the remaining records of an archive, which frees up its worker
+        first_records = [
+            next(records)["id"] for _, records in Archive._iter_prefetched(archives, None, 1, max_records=1)
+        ]
+        self.assertEqual([r[0]["id"] for r in [list(a.iter_records()) for a in archives]], first_records)
+
+        # errors reading an archive are raised to the reader
+        with patch("temba.archives.models.Archive.iter_records", side_effect=ValueError("boom")):
+            with self.assertRaises(ValueError):
+                for _, records in Archive._iter_prefetched(archives, None, 2, max_records=10):
+                    list(records)
+
+        # can also iterate by archive, skipping archives which end before a given date
+        for prefetch in (0, 2):
+            archive_records = Archive.iter_archive_records(
+                self.org, Archive.TYPE_MSG, prefetch=prefetch, ending_after=date(2020, 8, 2)
+            )
+            self.assertEqual(
+                [(date(2020, 8, 2), [5, 6])],
+                [(a.start_date, [r["id"] for r in records]) for a, records in archive_records],
+            )
+
     def test_end_date(self):
         daily = self.create_archive(Archive.TYPE_FLOWRUN, "D", date(2018, 2, 1), [], needs_deletion=True)
         monthly = self.create_archive(Archive.TYPE_FLOWRUN, "M", date(2018, 1, 1), [])
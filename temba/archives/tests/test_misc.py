@@ -1,8 +1,12 @@
 import gzip
 import hashlib
 import io
+import json
+from datetime import datetime, timezone as tzone
+from unittest.mock import patch
 
-from temba.archives.models import jsonlgz_rewrite
+from temba.archives.index import MAX_EXACT_VALUES, build_index, may_match
+from temba.archives.models import jsonlgz_encode, jsonlgz_iterate, jsonlgz_iterate_blocks, jsonlgz_rewrite
 from temba.tests import TembaTest
 
 
@@ -54,3 +58,120 @@ class JSONLGZTest(TembaTest):
         self.assertEqual(b'{"id": 123, "name": "Jim"}\n{"id": 345, "name": "Ann"}\n', gzip.decompress(data4))
         self.assertEqual(hashlib.md5(data4).hexdigest(), hash4)
         self.assertEqual(58, size4)
+
+        # rewrite with a transform that removes every record, which should still give us valid gzip
+        data5, hash5, size5 = rewrite(gzipped, lambda r: None)
+
+        self.assertEqual(b"", gzip.decompress(data5))
+        self.assertEqual(hashlib.md5(data5).hexdigest(), hash5)
+        self.assertEqual(len(data5), size5)
+        self.assertGreater(size5, 0)
+
+    @patch("temba.archives.models.BLOCK_RECORDS", 2)
+    def test_jsonlgz_blocks(self):
+        records = [{"id": i, "name": f"Contact {i}"} for i in range(5)]
+
+        # records are encoded as blocks of 2 records each
+        stream, md5, size = jsonlgz_encode(records)
+        encoded = stream.getvalue()
+        blocks = []
+
+        self.assertEqual(records, list(jsonlgz_iterate(io.BytesIO(encoded), on_block=blocks.append)))
+        self.assertEqual(3, len(blocks))
+        self.assertEqual(size, sum(blocks))
+        self.assertEqual(gzip.decompress(encoded).count(b"\n"), 5)  # still readable as a regular gzip file
+
+        # blocks can be decompressed concurrently if we know their sizes
+        self.assertEqual(records, list(jsonlgz_iterate_blocks(io.BytesIO(encoded), blocks, num_workers=2)))
+
+        # rewriting copies unchanged blocks as is
+        def rename_3(record):
+            if record["id"] == 3:
+                record["name"] = "Bob"
+            return record
+
+        out_file = io.BytesIO()
+        new_blocks = []
+        md5, size = jsonlgz_rewrite(io.BytesIO(encoded), out_file, rename_3, on_block=new_blocks.append)
+        rewritten = out_file.getvalue()
+
+        self.assertEqual(3, len(new_blocks))
+        self.assertEqual(encoded[: blocks[0]], rewritten[: new_blocks[0]])  # first block untouched
+        self.assertEqual(encoded[-blocks[2] :], rewritten[-new_blocks[2] :])  # last block untouched
+        self.assertEqual(
+            ["Contact 0", "Contact 1", "Contact 2", "Bob", "Contact 4"],
+            [r["name"] for r in jsonlgz_iterate(io.BytesIO(rewritten))],
+        )
+
+        # a single member file with more records than fit in a block is split into blocks when rewritten
+        out_file = io.BytesIO()
+        new_blocks = []
+        legacy = gzip.compress(b"".join(json.dumps(r).encode() + b"\n" for r in records))
+        jsonlgz_rewrite(io.BytesIO(legacy), out_file, lambda r: r, on_block=new_blocks.append)
+
+        self.assertEqual(3, len(new_blocks))
+        self.assertEqual(records, list(jsonlgz_iterate(io.BytesIO(out_file.getvalue()))))
+
+        # truncated files are an error
+        with self.assertRaises(EOFError):
+            list(jsonlgz_iterate(io.BytesIO(encoded[:-4])))
+
+
+class IndexTest(TembaTest):
+    def test_build_and_match(self):
+        index = build_index(
+            [
+                {
+                    "id": 1,
+                    "created_on": "2020-08-01T10:00:00Z",
+                    "direction": "in",
+                    "visibility": "visible",
+                    "status": "handled",
+                    "flow": None,
+                    "labels": [{"uuid": "a1b2a3a4-0000-0000-0000-000000000001", "name": "Spam"}],
+                },
+                {
+                    "id": 2,
+                    "created_on": "2020-08-01T15:00:00Z",
+                    "direction": "out",
+                    "visibility": "visible",
+                    "status": "sent",
+                    "flow": {"uuid": "f1f2f3f4-0000-0000-0000-000000000001", "name": "Survey"},
+                    "labels": [],
+                },
+            ]
+        )
+
+        self.assertEqual(2, index["record_count"])
+        self.assertEqual({"values": [None, "f1f2f3f4-0000-0000-0000-000000000001"]}, index["fields"]["flow__uuid"])
+        self.assertEqual(
+            {"min": "2020-08-01T10:00:00+00:00", "max": "2020-08-01T15:00:00+00:00"}, index["fields"]["created_on"]
+        )
+
+        self.assertTrue(may_match(index, {}))
+        self.assertTrue(may_match(index, {"visibility": "visible", "direction": "in"}))
+        self.assertFalse(may_match(index, {"visibility": "archived"}))
+        self.assertTrue(may_match(index, {"status__in": ("wired", "sent")}))
+        self.assertFalse(may_match(index, {"status__in": ("queued", "errored")}))
+        self.assertTrue(may_match(index, {"flow__isnull": True}))
+        self.assertTrue(may_match(index, {"flow__uuid__in": ["f1f2f3f4-0000-0000-0000-000000000001"]}))
+        self.assertFalse(may_match(index, {"flow__uuid__in": ["f1f2f3f4-0000-0000-0000-000000000002"]}))
+        self.assertTrue(may_match(index, {"labels__uuid__any": "a1b2a3a4-0000-0000-0000-000000000001"}))
+        self.assertFalse(may_match(index, {"labels__uuid__any": "a1b2a3a4-0000-0000-0000-000000000002"}))
+        self.assertTrue(may_match(index, {"created_on__gte": datetime(2020, 8, 1, 12, 0, 0, 0, tzone.utc)}))
+        self.assertFalse(may_match(index, {"created_on__gte": datetime(2020, 8, 2, 0, 0, 0, 0, tzone.utc)}))
+        self.assertFalse(may_match(index, {"created_on__lte": datetime(2020, 7, 31, 0, 0, 0, 0, tzone.utc)}))
+
+        # conditions we can't answer from the index are assumed to match
+        self.assertTrue(may_match(index, {"type__ne": "voice", "__raw__": "s.id = 3"}))
+
+        # empty archives never match
+        self.assertFalse(may_match(build_index([]), {"visibility": "visible"}))
+
+        # high cardinality fields switch to bloom filters
+        index = build_index([{"flow": {"uuid": f"flow-{i}"}} for i in range(MAX_EXACT_VALUES + 1)])
+
+        self.assertIn("bloom", index["fields"]["flow__uuid"])
+        self.assertTrue(may_match(index, {"flow__uuid": "flow-17"}))
+        self.assertTrue(may_match(index, {"flow__isnull": False}))
+        self.assertFalse(may_match(index, {"flow__isnull": True}))
@@ -1,4 +1,3 @@
-import itertools
 import logging
 from abc import ABCMeta
 from dataclasses import dataclass
@@ -8,6 +7,7 @@ from uuid import uuid4
 
 import phonenumbers
 from django_countries.fields import CountryField
+from django_redis import get_redis_connection
 from phonenumbers import NumberParseException
 from twilio.base.exceptions import TwilioRestException
 
@@ -24,7 +24,7 @@ from django.utils.translation import gettext_lazy as _
 
 from temba import mailroom
 from temba.orgs.models import DependencyMixin, Org
-from temba.utils import analytics, dynamo, on_transaction_commit, redact
+from temba.utils import analytics, dynamo, json, on_transaction_commit, redact
 from temba.utils.models import (
     JSONAsTextField,
     LegacyUUIDMixin,
@@ -739,39 +739,14 @@ class ChannelCount(BaseSquashableCount):
     count_type = models.CharField(choices=COUNT_TYPE_CHOICES, max_length=2)
     day = models.DateField(null=True)
 
+    # squashed counts are never negative and are kept even if zero
+    squash_values = {"count": 'GREATEST(0, SUM("count"))'}
+    squash_keep_if = None
+
     @classmethod
     def get_day_count(cls, channel, count_type, day):
         return cls.objects.filter(channel=channel, count_type=count_type, day=day).order_by("day", "count_type").sum()
 
-    @classmethod
-    def get_squash_query(cls, distinct_set: dict) -> tuple:
-        if distinct_set["day"]:
-            sql = """
-            WITH removed as (
-                DELETE FROM %(table)s WHERE "channel_id" = %%s AND "count_type" = %%s AND "day" = %%s RETURNING "count"
-            )
-            INSERT INTO %(table)s("channel_id", "count_type", "day", "count", "is_squashed")
-            VALUES (%%s, %%s, %%s, GREATEST(0, (SELECT SUM("count") FROM removed)), TRUE);
-            """ % {
-                "table": cls._meta.db_table
-            }
-
-            params = (distinct_set["channel_id"], distinct_set["count_type"], distinct_set["day"]) * 2
-        else:
-            sql = """
-            WITH removed as (
-                DELETE FROM %(table)s WHERE "channel_id" = %%s AND "count_type" = %%s AND "day" IS NULL RETURNING "count"
-            )
-            INSERT INTO %(table)s("channel_id", "count_type", "day", "count", "is_squashed")
-            VALUES (%%s, %%s, NULL, GREATEST(0, (SELECT SUM("count") FROM removed)), TRUE);
-            """ % {
-                "table": cls._meta.db_table
-            }
-
-            params = (distinct_set["channel_id"], distinct_set["count_type"]) * 2
-
-        return sql, params
-
     class Meta:
         indexes = [
             models.Index(fields=("channel", "count_type", "day", "is_squashed")),
@@ -845,6 +820,8 @@ class ChannelLog(models.Model):
     """
 
     DYNAMO_TABLE = "ChannelLogs"  # unprefixed table name
+    CACHE_KEY = "channel_log:{uuid}"
+    CACHE_TTL = 60 * 15
     REDACT_MASK = "*" * 8  # used to mask redacted values
 
     LOG_TYPE_UNKNOWN = "unknown"
@@ -894,37 +871,70 @@ class ChannelLog(models.Model):
     @classmethod
     def get_by_uuid(cls, channel, uuids: list) -> list:
         """
-        Get logs from DynamoDB and converts them to non-persistent instances of this class
+        Get logs from DynamoDB and converts them to non-persistent instances of this class. Logs are immutable so the
+        decoded versions are cached in redis, with channel credentials redacted, unless the channel's org is anonymous
+        in which case contact data shouldn't be copied out of DynamoDB.
         """
         if not uuids:
             return []
 
-        client = dynamo.get_client()
-        logs = []
-
-        for uuid_batch in itertools.batched(uuids, 100):
-            resp = client.batch_get_item(
-                RequestItems={
-                    dynamo.table_name(cls.DYNAMO_TABLE): {"Keys": [{"UUID": {"S": str(u)}} for u in uuid_batch]}
-                }
+        uuids = [str(u) for u in uuids]
+        r = get_redis_connection()
+        cached = r.mget([cls.CACHE_KEY.format(uuid=u) for u in uuids])
+
+        by_uuid = {u: json.loads(c) for u, c in zip(uuids, cached) if c is not None}
+        missing = [u for u in uuids if u not in by_uuid]
+
+        if missing:
+            table = dynamo.table_name(cls.DYNAMO_TABLE)
+            items = dynamo.batch_get(table, [{"UUID": {"S": u}} for u in missing])
+
+            redact_values = channel.type.get_redact_values(channel)
+            cacheable = not channel.org.is_anon
+
+            with r.pipeline() as pipe:
+                for item in items:
+                    data = dynamo.load_jsongz(item["DataGZ"]["B"])
+                    log = {
+                        "type": item["Type"]["S"],
+                        "http_logs": [cls._redact_http_log(h, redact_values) for h in data["http_logs"] or []],
+                        "errors": data["errors"],
+                        "elapsed_ms": int(item["ElapsedMS"]["N"]),
+                        "created_on": int(item["CreatedOn"]["N"]),
+                    }
+                    by_uuid[item["UUID"]["S"]] = log
+                    if cacheable:
+                        pipe.set(cls.CACHE_KEY.format(uuid=item["UUID"]["S"]), json.dumps(log), ex=cls.CACHE_TTL)
+                pipe.execute()
+
+        logs = [
+            ChannelLog(
+                uuid=u,
+                channel=channel,
+                log_type=log["type"],
+                http_logs=log["http_logs"],
+                errors=log["errors"],
+                elapsed_ms=log["elapsed_ms"],
+                created_on=datetime.fromtimestamp(log["created_on"], tz=tzone.utc),
             )
-
-            for log in resp["Responses"][dynamo.table_name(cls.DYNAMO_TABLE)]:
-                data = dynamo.load_jsongz(log["DataGZ"]["B"])
-                logs.append(
-                    ChannelLog(
-                        uuid=log["UUID"]["S"],
-                        channel=channel,
-                        log_type=log["Type"]["S"],
-                        http_logs=data["http_logs"],
-                        errors=data["errors"],
-                        elapsed_ms=int(log["ElapsedMS"]["N"]),
-                        created_on=datetime.fromtimestamp(int(log["CreatedOn"]["N"]), tz=tzone.utc),
-                    )
-                )
+            for u, log in by_uuid.items()
+        ]
 
         return sorted(logs, key=lambda l: l.uuid)
 
+    @classmethod
+    def _redact_http_log(cls, http_log: dict, values: tuple) -> dict:
+        """
+        Redacts the given values, e.g. channel credentials, from an HTTP log
+        """
+        http_log = http_log.copy()
+        for key in ("url", "request", "response"):
+            if http_log.get(key):
+                for value in values:
+                    if value:
+                        http_log[key] = redact.text(http_log[key], value, cls.REDACT_MASK)
+        return http_log
+
     def get_display(self, *, anonymize: bool, urn) -> dict:
         """
         Gets a dict representation of this log for display that is optionally anonymized
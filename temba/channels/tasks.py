@@ -11,6 +11,7 @@ from temba import mailroom
 from temba.orgs.models import Org
 from temba.utils.analytics import track
 from temba.utils.crons import cron_task
+from temba.utils.db import partitions
 from temba.utils.models import delete_in_batches
 
 from .models import Channel, ChannelCount, ChannelEvent, ChannelLog, SyncEvent
@@ -108,14 +109,15 @@ def trim_channel_logs():
     def can_continue():
         return (timezone.now() - start) < timedelta(hours=1)
 
+    num_dropped = partitions.drop_partitions(ChannelLog._meta.db_table, before=trim_before)
     num_deleted = delete_in_batches(ChannelLog.objects.filter(created_on__lte=trim_before), post_delete=can_continue)
 
-    return {"deleted": num_deleted}
+    return {"deleted": num_deleted, "partitions_dropped": num_dropped}
 
 
 @cron_task(lock_timeout=7200)
 def squash_channel_counts():
-    ChannelCount.squash()
+    return ChannelCount.squash()
 
 
 @cron_task(lock_timeout=7200)
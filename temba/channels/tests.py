@@ -6,6 +6,8 @@ from datetime import date, datetime, timedelta, timezone as tzone
 from unittest.mock import patch
 from urllib.parse import quote
 
+from django_redis import get_redis_connection
+
 from django.conf import settings
 from django.contrib.auth.models import Group
 from django.core import mail
@@ -26,7 +28,7 @@ from temba.templates.models import TemplateTranslation
 from temba.tests import CRUDLTestMixin, MockResponse, TembaTest, matchers, mock_mailroom, override_brand
 from temba.tests.crudl import StaffRedirect
 from temba.triggers.models import Trigger
-from temba.utils import json
+from temba.utils import dynamo, json
 from temba.utils.models import generate_uuid
 from temba.utils.views.mixins import TEMBA_MENU_SELECTION
 
@@ -1391,6 +1393,44 @@ class ChannelLogTest(TembaTest):
         self.assertEqual(log2.uuid, logs[1].uuid)
         self.assertEqual(self.channel, logs[1].channel)
         self.assertEqual(ChannelLog.LOG_TYPE_MSG_STATUS, logs[1].log_type)
+        self.assertEqual([{"url": "https://foo.bar/send2"}], logs[1].http_logs)
+        self.assertEqual(12, logs[1].elapsed_ms)
+
+        # logs are now cached so fetching them again doesn't hit DynamoDB, unless they're new
+        log3 = self.create_channel_log(ChannelLog.LOG_TYPE_MSG_RECEIVE, http_logs=[], errors=[])
+
+        with patch("temba.utils.dynamo.batch_get", wraps=dynamo.batch_get) as mock_batch_get:
+            logs = ChannelLog.get_by_uuid(self.channel, [log1.uuid, log2.uuid, log3.uuid])
+
+        self.assertEqual([str(log1.uuid), str(log2.uuid), str(log3.uuid)], [str(l.uuid) for l in logs])
+        self.assertEqual([{"url": "https://foo.bar/send1"}], logs[0].http_logs)
+        self.assertEqual(ChannelLog.LOG_TYPE_MSG_RECEIVE, logs[2].log_type)
+        mock_batch_get.assert_called_once_with("TestChannelLogs", [{"UUID": {"S": str(log3.uuid)}}])
+
+        # channel credentials are redacted before logs are cached
+        log4 = self.create_channel_log(
+            ChannelLog.LOG_TYPE_MSG_SEND,
+            http_logs=[{"url": "https://foo.bar/send?token=sesame", "request": "POST /send?token=sesame"}],
+            errors=[],
+        )
+
+        with patch("temba.channels.models.ChannelType.get_redact_values", return_value=("sesame", "")):
+            logs = ChannelLog.get_by_uuid(self.channel, [log4.uuid])
+
+        expected = [{"url": "https://foo.bar/send?token=********", "request": "POST /send?token=********"}]
+        self.assertEqual(expected, logs[0].http_logs)
+        self.assertEqual(
+            expected, json.loads(get_redis_connection().get(ChannelLog.CACHE_KEY.format(uuid=log4.uuid)))["http_logs"]
+        )
+
+        # logs of anonymous orgs aren't cached
+        self.org.is_anon = True
+        self.org.save(update_fields=("is_anon",))
+        self.channel.refresh_from_db()
+        log5 = self.create_channel_log(ChannelLog.LOG_TYPE_MSG_SEND, http_logs=[], errors=[])
+
+        self.assertEqual(1, len(ChannelLog.get_by_uuid(self.channel, [log5.uuid])))
+        self.assertIsNone(get_redis_connection().get(ChannelLog.CACHE_KEY.format(uuid=log5.uuid)))
 
     def test_get_display(self):
         channel = self.create_channel("TG", "Telegram", "mybot")
@@ -1570,7 +1610,7 @@ class ChannelLogTest(TembaTest):
         )
 
         results = trim_channel_logs()
-        self.assertEqual({"deleted": 1}, results)
+        self.assertEqual({"deleted": 1, "partitions_dropped": 0}, results)
 
         # should only have one log remaining and should be l2
         self.assertEqual(1, ChannelLog.objects.all().count())
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+import temba.contacts.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contacts", "0204_alter_contactfire_fire_type"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contactimport",
+            name="records_file",
+            field=models.FileField(null=True, upload_to=temba.contacts.models.get_import_upload_path),
+        ),
+    ]
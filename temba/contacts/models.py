@@ -1,3 +1,8 @@
+import contextlib
+import csv
+import gzip
+import hashlib
+import io
 import itertools
 import logging
 from datetime import date, datetime, timedelta, timezone as tzone
@@ -16,8 +21,8 @@ from smartmin.models import SmartModel
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
-from django.db import models, transaction
-from django.db.models import Count, F, Max, Q, Sum, Value
+from django.db import connection, models, transaction
+from django.db.models import Count, Exists, F, Max, OuterRef, Q, Sum, Value
 from django.db.models.functions import Concat, Lower
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
@@ -27,8 +32,7 @@ from temba.channels.models import Channel
 from temba.locations.models import AdminBoundary
 from temba.mailroom import ContactSpec, modifiers, queue_populate_dynamic_group
 from temba.orgs.models import DependencyMixin, Export, ExportType, Org, OrgRole
-from temba.utils import format_number, on_transaction_commit
-from temba.utils.export import MultiSheetExporter
+from temba.utils import format_number, json, on_transaction_commit
 from temba.utils.models import JSONField, LegacyUUIDMixin, TembaModel, delete_in_batches
 from temba.utils.models.counts import BaseSquashableCount
 from temba.utils.text import unsnakify
@@ -602,6 +606,7 @@ class Contact(LegacyUUIDMixin, SmartModel):
 
     # maximum number of contacts to release without using a background task
     BULK_RELEASE_IMMEDIATELY_LIMIT = 50
+    BULK_RELEASE_BATCH_SIZE = 500
 
     @classmethod
     def create(
@@ -986,8 +991,7 @@ class Contact(LegacyUUIDMixin, SmartModel):
     @classmethod
     def apply_action_delete(cls, user, contacts):
         if len(contacts) <= cls.BULK_RELEASE_IMMEDIATELY_LIMIT:
-            for contact in contacts:
-                contact.release(user)
+            cls.bulk_release(user, contacts)
         else:
             from .tasks import release_contacts
 
@@ -1061,85 +1065,119 @@ class Contact(LegacyUUIDMixin, SmartModel):
         Releases this contact. Note that we clear all identifying data but don't hard delete the contact because we need
         to expose deleted contacts over the API to allow external systems to know that contacts have been deleted.
         """
-        from .tasks import full_release_contact
 
-        # do de-indexing first so if it fails for some reason, we don't go through with the delete
-        if deindex:
-            mailroom.get_client().contact_deindex(self.org, [self])
+        Contact.bulk_release(user, [self], immediately=immediately, deindex=deindex)
 
-        with transaction.atomic():
-            # prep our urns for deletion so our old path creates a new urn
-            for urn in self.urns.all():
-                path = str(uuid4())
-                urn.identity = f"{URN.DELETED_SCHEME}:{path}"
-                urn.path = path
-                urn.scheme = URN.DELETED_SCHEME
-                urn.channel = None
-                urn.save(update_fields=("identity", "path", "scheme", "channel"))
-
-            # remove from non-db trigger groups
-            for group in self.get_groups():
-                group.contacts.remove(self)
-
-            # delete any upcoming fires
-            self.fires.all().delete()
-
-            # remove from scheduled broadcasts
-            for bc in self.addressed_broadcasts.exclude(schedule=None):
-                bc.contacts.remove(self)
-
-            # now deactivate the contact itself
-            self.is_active = False
-            self.name = None
-            self.fields = None
-            self.modified_by = user
-            self.save(update_fields=("name", "is_active", "fields", "modified_by", "modified_on"))
-
-        # the hard work of removing everything this contact owns can be given to a celery task
-        if immediately:
-            self._full_release()
-        else:
-            on_transaction_commit(lambda: full_release_contact.delay(self.id))
+    @classmethod
+    def bulk_release(cls, user, contacts, *, immediately=False, deindex=True):
+        """
+        Releases the given contacts in batches, with each batch de-indexed by a single mailroom call, released in a
+        single transaction, and then fully released by a single task.
+        """
+        from .tasks import full_release_contacts
+
+        for batch in itertools.batched(contacts, cls.BULK_RELEASE_BATCH_SIZE):
+            contact_ids = [c.id for c in batch]
+
+            # do de-indexing first so if it fails for some reason, we don't go through with the delete
+            if deindex:
+                mailroom.get_client().contact_deindex(batch[0].org, list(batch))
+
+            with transaction.atomic():
+                # prep our urns for deletion so our old path creates a new urn
+                urns = list(ContactURN.objects.filter(contact_id__in=contact_ids))
+                for urn in urns:
+                    urn.path = str(uuid4())
+                    urn.identity = f"{URN.DELETED_SCHEME}:{urn.path}"
+                    urn.scheme = URN.DELETED_SCHEME
+                    urn.channel = None
+                ContactURN.objects.bulk_update(urns, fields=("identity", "path", "scheme", "channel"))
+
+                # remove from non-db trigger groups
+                ContactGroup.contacts.through.objects.filter(
+                    contact_id__in=contact_ids,
+                    contactgroup__group_type__in=(ContactGroup.TYPE_MANUAL, ContactGroup.TYPE_SMART),
+                    contactgroup__is_active=True,
+                ).delete()
+
+                # delete any upcoming fires
+                ContactFire.objects.filter(contact_id__in=contact_ids).delete()
+
+                # remove from scheduled broadcasts
+                cls.addressed_broadcasts.through.objects.filter(
+                    contact_id__in=contact_ids, broadcast__schedule__isnull=False
+                ).delete()
+
+                # now deactivate the contacts themselves
+                cls.objects.filter(id__in=contact_ids).update(
+                    is_active=False, name=None, fields=None, modified_by=user, modified_on=timezone.now()
+                )
+
+            for contact in batch:
+                contact.is_active = False
+                contact.name = None
+                contact.fields = None
+                contact.modified_by = user
+
+            # the hard work of removing everything these contacts own can be given to a celery task
+            if immediately:
+                cls._bulk_full_release(batch)
+            else:
+                on_transaction_commit(lambda ids=contact_ids: full_release_contacts.delay(ids))
 
     def _full_release(self):
         """
         Deletes everything owned by this contact
         """
 
+        Contact._bulk_full_release([self])
+
+    @classmethod
+    def _bulk_full_release(cls, contacts):
+        """
+        Deletes everything owned by the given contacts
+        """
+
+        from temba.channels.models import ChannelEvent
+        from temba.flows.models import FlowRun, FlowSession
+        from temba.ivr.models import Call
         from temba.msgs.models import Msg
+        from temba.tickets.models import Ticket
+
+        assert not any(c.is_active for c in contacts), "can't fully release a contact which hasn't been released"
 
-        assert not self.is_active, "can't fully release a contact which hasn't been released"
+        contact_ids = [c.id for c in contacts]
 
         with transaction.atomic():
             # release our tickets
-            for ticket in self.tickets.all():
+            for ticket in Ticket.objects.filter(contact_id__in=contact_ids):
                 ticket.delete()
 
             # delete our messages in batches
             while True:
-                msg_batch = list(self.msgs.all()[:1000])
+                msg_batch = list(Msg.objects.filter(contact_id__in=contact_ids)[:1000])
                 if not msg_batch:
                     break
                 Msg.bulk_delete(msg_batch)
 
-            delete_in_batches(self.runs.all())
-            delete_in_batches(self.sessions.all())
-            delete_in_batches(self.channel_events.all())
-            delete_in_batches(self.calls.all())
-            delete_in_batches(self.fires.all())
-
-            for urn in self.urns.all():
-                # delete the urn if it has no associated content.. which should be the case if it wasn't
-                # stolen from another contact
-                if not urn.msgs.all() and not urn.channel_events.all() and not urn.calls.all():
-                    urn.delete()
-                else:
-                    urn.contact = None
-                    urn.save(update_fields=("contact",))
+            delete_in_batches(FlowRun.objects.filter(contact_id__in=contact_ids))
+            delete_in_batches(FlowSession.objects.filter(contact_id__in=contact_ids))
+            delete_in_batches(ChannelEvent.objects.filter(contact_id__in=contact_ids))
+            delete_in_batches(Call.objects.filter(contact_id__in=contact_ids))
+            delete_in_batches(ContactFire.objects.filter(contact_id__in=contact_ids))
+
+            # delete urns if they have no associated content.. which should be the case if they weren't stolen from
+            # another contact, otherwise just detach them
+            urns = ContactURN.objects.filter(contact_id__in=contact_ids)
+            urns.filter(
+                Exists(Msg.objects.filter(contact_urn=OuterRef("id")))
+                | Exists(ChannelEvent.objects.filter(contact_urn=OuterRef("id")))
+                | Exists(Call.objects.filter(contact_urn=OuterRef("id")))
+            ).update(contact=None)
+            urns.delete()
 
             # take us out of broadcast addressed contacts
-            for broadcast in self.addressed_broadcasts.all():
-                broadcast.contacts.remove(self)
+            cls.addressed_broadcasts.through.objects.filter(contact_id__in=contact_ids).delete()
 
     @classmethod
     def bulk_urn_cache_initialize(cls, contacts, *, using: str = "default"):
@@ -1402,6 +1440,8 @@ class ContactGroup(LegacyUUIDMixin, TembaModel, DependencyMixin):
     org_limit_key = Org.LIMIT_GROUPS
     soft_dependent_types = {"flow", "trigger"}
 
+    CLEAR_BATCH_SIZE = 5000  # number of contacts removed per statement when clearing a group
+
     @classmethod
     def create_system_groups(cls, org):
         """
@@ -1619,7 +1659,12 @@ class ContactGroup(LegacyUUIDMixin, TembaModel, DependencyMixin):
             # do the hard work of actually clearing out contacts etc in a background task
             on_transaction_commit(lambda: release_group_task.delay(self.id))
 
-    def _full_release(self):
+    def _full_release(self, *, time_limit: timedelta = None) -> bool:
+        """
+        Does the work of releasing this group, returning whether it's complete or needs to be resumed because it ran out
+        of time.
+        """
+
         # detach from contact imports associated with this group
         ContactImport.objects.filter(group=self).update(group=None)
 
@@ -1630,13 +1675,47 @@ class ContactGroup(LegacyUUIDMixin, TembaModel, DependencyMixin):
         # delete all counts for this group
         self.counts.all().delete()
 
-        # delete the m2m related rows in batches, updating the contacts' modified_on as we go
-        ContactGroupContacts = self.contacts.through
-        memberships = ContactGroupContacts.objects.filter(contactgroup_id=self.id)
+        return self.clear_contacts(time_limit=time_limit)["complete"]
 
-        for batch in itertools.batched(memberships, 100):
-            ContactGroupContacts.objects.filter(id__in=[m.id for m in batch]).delete()
-            Contact.objects.filter(id__in=[m.contact_id for m in batch]).update(modified_on=timezone.now())
+    def clear_contacts(self, *, time_limit: timedelta = None) -> dict:
+        """
+        Removes all contacts from this group in chunks ordered by contact id, where each chunk is removed by a single
+        statement which also updates the modified_on of the removed contacts. If a time limit is given, stops once it's
+        exceeded, and calling this again resumes clearing. Returns the number removed and whether clearing is complete.
+        """
+
+        memberships_table = self.contacts.through._meta.db_table
+        sql = f"""
+        WITH removed AS (
+            DELETE FROM {memberships_table} WHERE id IN (
+                SELECT id FROM {memberships_table} WHERE contactgroup_id = %s AND contact_id > %s
+                ORDER BY contact_id LIMIT %s
+            ) RETURNING contact_id
+        ), updated AS (
+            UPDATE {Contact._meta.db_table} SET modified_on = %s WHERE id IN (SELECT contact_id FROM removed)
+        )
+        SELECT COUNT(*), MAX(contact_id) FROM removed;
+        """
+
+        start = timezone.now()
+        num_removed, last_contact_id, complete = 0, 0, False
+
+        while not complete:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, (self.id, last_contact_id, self.CLEAR_BATCH_SIZE, timezone.now()))
+                batch_removed, last_contact_id = cursor.fetchone()
+
+            num_removed += batch_removed
+            complete = batch_removed < self.CLEAR_BATCH_SIZE
+
+            if time_limit is not None and timezone.now() - start >= time_limit:
+                break
+
+        elapsed = (timezone.now() - start).total_seconds()
+
+        logger.info(f"removed {num_removed} contacts from group #{self.id} in {elapsed} seconds (complete={complete})")
+
+        return {"removed": num_removed, "complete": complete, "elapsed": elapsed}
 
     @property
     def is_smart(self):
@@ -1756,9 +1835,10 @@ class ContactExport(ExportType):
     name = _("Contacts")
     download_prefix = "contacts"
     download_template = "contacts/export_download.html"
+    formats = (Export.FORMAT_XLSX, Export.FORMAT_CSV, Export.FORMAT_JSONL)
 
     @classmethod
-    def create(cls, org, user, group=None, search=None, with_groups=()):
+    def create(cls, org, user, group=None, search=None, with_groups=(), format=Export.FORMAT_XLSX):
         export = Export.objects.create(
             org=org,
             export_type=cls.slug,
@@ -1766,6 +1846,7 @@ class ContactExport(ExportType):
                 "group_id": group.id if group else None,
                 "search": search,
                 "with_groups": [g.id for g in with_groups],
+                "format": format,
             },
             created_by=user,
         )
@@ -1848,56 +1929,59 @@ class ContactExport(ExportType):
         group = self.get_group(export)
         search = export.config.get("search")
 
-        include_group_memberships = bool(len(group_fields) > 0)
-
         if search:
             contact_ids = mailroom.get_client().contact_export(export.org, group, query=search)
         else:
             contact_ids = group.contacts.using("readonly").order_by("id").values_list("id", flat=True)
 
         # create our exporter
-        exporter = MultiSheetExporter(
-            "Contact", [f["label"] for f in fields] + [g["label"] for g in group_fields], export.org.timezone
+        exporter = export.create_exporter("Contact", [f["label"] for f in fields] + [g["label"] for g in group_fields])
+
+        # write out contacts in batches to limit memory usage, without checkpoints as contact ids may come from a search
+        # which could give different results if repeated
+        num_records = self._write_batches(
+            export,
+            exporter,
+            ((batch_ids, None) for batch_ids in itertools.batched(contact_ids, 1000)),
+            enrich=self._get_contacts,
+            serialize=lambda batch: self._get_rows(export, *batch, fields, group_fields),
         )
 
-        num_records = 0
+        return *exporter.save_file(), num_records
 
-        # write out contacts in batches to limit memory usage
-        for batch_ids in itertools.batched(contact_ids, 1000):
-            # fetch all the contacts for our batch
-            batch_contacts = (
-                Contact.objects.filter(id__in=batch_ids).prefetch_related("org", "groups").using("readonly")
-            )
+    def _get_contacts(self, batch_ids) -> tuple:
+        """
+        Fetches the contacts for a batch of ids
+        """
+        batch_contacts = Contact.objects.filter(id__in=batch_ids).prefetch_related("org", "groups").using("readonly")
 
-            # to maintain our sort, we need to lookup by id, create a map of our id->contact to aid in that
-            contact_by_id = {c.id: c for c in batch_contacts}
+        # to maintain our sort, we need to lookup by id, create a map of our id->contact to aid in that
+        contact_by_id = {c.id: c for c in batch_contacts}
 
-            Contact.bulk_urn_cache_initialize(batch_contacts, using="readonly")
+        Contact.bulk_urn_cache_initialize(batch_contacts, using="readonly")
 
-            for contact_id in batch_ids:
-                contact = contact_by_id[contact_id]
+        return batch_ids, contact_by_id
 
-                values = []
-                for field in fields:
-                    values.append(self.get_field_value(export.org, field, contact=contact))
+    def _get_rows(self, export, batch_ids, contact_by_id, fields, group_fields) -> list:
+        rows = []
 
-                group_values = []
-                if include_group_memberships:
-                    contact_groups_ids = [g.id for g in contact.groups.all()]
-                    for col in range(len(group_fields)):
-                        field = group_fields[col]
-                        group_values.append(field["group_id"] in contact_groups_ids)
+        for contact_id in batch_ids:
+            contact = contact_by_id[contact_id]
 
-                # write this contact's values
-                exporter.write_row(values + group_values)
-                num_records += 1
+            values = []
+            for field in fields:
+                values.append(self.get_field_value(export.org, field, contact=contact))
 
-            # keep bumping our modified_on to show we're alive
-            if timezone.now() - export.modified_on > timedelta(minutes=3):  # pragma: no cover
-                export.modified_on = timezone.now()
-                export.save(update_fields=("modified_on",))
+            group_values = []
+            if group_fields:
+                contact_groups_ids = [g.id for g in contact.groups.all()]
+                for col in range(len(group_fields)):
+                    field = group_fields[col]
+                    group_values.append(field["group_id"] in contact_groups_ids)
 
-        return *exporter.save_file(), num_records
+            rows.append(values + group_values)
+
+        return rows
 
     def get_field_value(self, org, field: dict, contact: Contact):
         if field["key"] == "name":
@@ -1964,6 +2048,7 @@ class ContactImport(SmartModel):
 
     org = models.ForeignKey(Org, on_delete=models.PROTECT, related_name="contact_imports")
     file = models.FileField(upload_to=get_import_upload_path)
+    records_file = models.FileField(upload_to=get_import_upload_path, null=True)  # records parsed at upload time
     original_filename = models.TextField()
     mappings = models.JSONField()
     num_records = models.IntegerField()
@@ -1974,31 +2059,21 @@ class ContactImport(SmartModel):
     finished_on = models.DateTimeField(null=True)
 
     @classmethod
-    def try_to_parse(cls, org: Org, file, filename: str) -> tuple[list, int]:
+    def try_to_parse(cls, org: Org, file, filename: str, records_out=None) -> tuple[list, int]:
         """
         Tries to parse the given file stream as an import. If successful it returns the automatic column mappings and
-        total number of records. Otherwise raises a ValidationError.
+        total number of records. Otherwise raises a ValidationError. If records_out is provided, the parsed records are
+        written to it as gzipped JSON lines so that starting the import doesn't require parsing the file again.
         """
 
-        try:
-            workbook = load_workbook(filename=file, read_only=True, data_only=True)
-        except Exception:
-            raise ValidationError(_("Import file appears to be corrupted."))
-        ws = workbook.active
-
-        # see https://openpyxl.readthedocs.io/en/latest/optimized.html#worksheet-dimensions but even with this we need
-        # to ignore empty columns after the last column with data
-        ws.reset_dimensions()
-
-        data = ws.iter_rows()
+        data = cls._read_rows(file, filename)
 
         try:
             header_row = next(data)
         except StopIteration:
             raise ValidationError(_("Import file appears to be empty."))
 
-        headers = [h.value for h in header_row]
-        headers = [str(h).strip() if h else "" for h in headers]
+        headers = [str(h).strip() if h else "" for h in header_row]
 
         # ignore empty header columns after the last column with data
         max_col = 0
@@ -2012,46 +2087,42 @@ class ContactImport(SmartModel):
 
         mappings = cls._auto_mappings(org, headers)
 
-        # iterate over rest of the rows to do row-level validation
+        # iterate over rest of the rows to do row-level validation, tracking UUIDs and URNs by their digests so that
+        # memory usage stays small for large files
         seen_uuids = set()
         seen_urns = set()
         num_records = 0
-        row_num = 1
 
-        while True:
-            row_num += 1
+        with gzip.GzipFile(fileobj=records_out, mode="wb") if records_out else contextlib.nullcontext() as spill:
+            for row_num, row, uuid, urns in cls._parse_records(org, data, mappings):
+                if uuid:
+                    uuid_digest = cls._digest(uuid)
+                    if uuid_digest in seen_uuids:
+                        raise ValidationError(
+                            _("Import file contains duplicated contact UUID '%(uuid)s' on row %(row)s."),
+                            params={"uuid": uuid, "row": row_num},
+                        )
+                    seen_uuids.add(uuid_digest)
+                for urn in urns:
+                    urn_digest = cls._digest(urn)
+                    if urn_digest in seen_urns:
+                        raise ValidationError(
+                            _("Import file contains duplicated contact URN '%(urn)s' on row %(row)s."),
+                            params={"urn": urn, "row": row_num},
+                        )
+                    seen_urns.add(urn_digest)
 
-            try:
-                raw_row = next(data)
-            except StopIteration:
-                break
+                num_records += 1
 
-            row = cls._parse_row(raw_row, len(mappings))
-            uuid, urns = cls._extract_uuid_and_urns(row, mappings)
-            if uuid:
-                if uuid in seen_uuids:
-                    raise ValidationError(
-                        _("Import file contains duplicated contact UUID '%(uuid)s' on row %(row)s."),
-                        params={"uuid": uuid, "row": row_num},
-                    )
-                seen_uuids.add(uuid)
-            for urn in urns:
-                if urn in seen_urns:
+                # check if we exceed record limit
+                if num_records > ContactImport.MAX_RECORDS:
                     raise ValidationError(
-                        _("Import file contains duplicated contact URN '%(urn)s' on row %(row)s."),
-                        params={"urn": urn, "row": row_num},
+                        _("Import files can contain a maximum of %(max)d records."),
+                        params={"max": ContactImport.MAX_RECORDS},
                     )
-                seen_urns.add(urn)
-
-            if uuid or urns:  # if we have a UUID or URN on this row it's an importable record
-                num_records += 1
 
-            # check if we exceed record limit
-            if num_records > ContactImport.MAX_RECORDS:
-                raise ValidationError(
-                    _("Import files can contain a maximum of %(max)d records."),
-                    params={"max": ContactImport.MAX_RECORDS},
-                )
+                if spill is not None:
+                    spill.write(json.dumps([row_num, row, urns]).encode() + b"\n")
 
         if num_records == 0:
             raise ValidationError(_("Import file doesn't contain any records."))
@@ -2060,21 +2131,74 @@ class ContactImport(SmartModel):
 
         return mappings, num_records
 
+    @classmethod
+    def _parse_records(cls, org: Org, data, mappings: list):
+        """
+        Generator which takes the raw rows after the header and yields tuples of 1. the row number, 2. the parsed
+        values, 3. the UUID and 4. the normalized URNs, for each row which is an importable record
+        """
+        row_num = 1  # 1-based rows like Excel uses
+
+        for raw_row in data:
+            row_num += 1
+            row = cls._parse_row(raw_row, len(mappings), tz=org.timezone)
+            uuid, urns = cls._extract_uuid_and_urns(row, mappings, org.default_country_code)
+
+            if uuid or urns:  # if we have a UUID or URN on this row it's an importable record
+                yield row_num, row, uuid, urns
+
     @staticmethod
-    def _extract_uuid_and_urns(row, mappings) -> tuple[str, list[str]]:
+    def _read_rows(file, filename: str):
         """
-        Extracts any UUIDs and URNs from the given row so they can be checked for uniqueness
+        Generator which yields the rows of the given XLSX or CSV file stream as lists of raw values
+        """
+
+        if Path(filename).suffix.lower() == ".csv":
+            stream = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+            try:
+                yield from csv.reader(stream)
+            except (UnicodeDecodeError, csv.Error):
+                raise ValidationError(_("Import file appears to be corrupted."))
+            finally:
+                stream.detach()  # so that closing the wrapper doesn't close the underlying file
+        else:
+            try:
+                workbook = load_workbook(filename=file, read_only=True, data_only=True)
+            except Exception:
+                raise ValidationError(_("Import file appears to be corrupted."))
+            ws = workbook.active
+
+            # see https://openpyxl.readthedocs.io/en/latest/optimized.html#worksheet-dimensions but even with this we
+            # need to ignore empty columns after the last column with data
+            ws.reset_dimensions()
+
+            yield from ws.iter_rows(values_only=True)
+
+    @staticmethod
+    def _digest(value: str) -> bytes:
+        """
+        Compact digest of a UUID or URN used to detect duplicates without holding every value in memory
+        """
+        return hashlib.blake2b(value.encode(), digest_size=8).digest()
+
+    @staticmethod
+    def _extract_uuid_and_urns(row, mappings, country_code: str) -> tuple[str, list[str]]:
+        """
+        Extracts any UUID and normalized URNs from the given row
         """
         uuid = ""
         urns = []
         for value, item in zip(row, mappings):
             mapping = item["mapping"]
+            if not value or value == ContactImport.EXPLICIT_CLEAR:
+                continue
+
             if mapping["type"] == "attribute" and mapping["name"] == "uuid":
                 uuid = value.lower()
-            elif mapping["type"] == "scheme" and value:
+            elif mapping["type"] == "scheme":
                 urn = URN.from_parts(mapping["scheme"], value)
                 try:
-                    urn = URN.normalize(urn)
+                    urn = URN.normalize(urn, country_code=country_code)
                 except ValueError:
                     pass
                 urns.append(urn)
@@ -2165,8 +2289,10 @@ class ContactImport(SmartModel):
         on_transaction_commit(lambda: import_contacts_task.delay(self.id))
 
     def delete(self):
-        # delete our source import file
+        # delete our source import file and the records parsed from it
         self.file.delete()
+        if self.records_file:
+            self.records_file.delete()
 
         # delete any batches associated with this import
         ContactImportBatch.objects.filter(contact_import=self).delete()
@@ -2201,15 +2327,10 @@ class ContactImport(SmartModel):
             self.save(update_fields=("group",))
 
         # parse each row, creating batch tasks for mailroom
-        workbook = load_workbook(filename=self.file, read_only=True, data_only=True)
-        ws = workbook.active
-        ws.reset_dimensions()  # see https://openpyxl.readthedocs.io/en/latest/optimized.html#worksheet-dimensions
-        data = ws.iter_rows(min_row=2)
-
         urns = []
         batches = []
 
-        for batch_specs, batch_start, batch_end in self._batches_generator(data):
+        for batch_specs, batch_start, batch_end in self._batches_generator(self._read_records()):
             batches.append(self.batches.create(specs=batch_specs, record_start=batch_start, record_end=batch_end))
 
             for spec in batch_specs:
@@ -2227,24 +2348,37 @@ class ContactImport(SmartModel):
         if not self.org.is_verified and self._detect_spamminess(urns):
             self.org.flag()
 
-    def _batches_generator(self, row_iter):
+    def _read_records(self):
+        """
+        Generator which yields tuples of the row number, parsed values and normalized URNs of each record, read from
+        the records parsed at upload time, or if there are none, by parsing the import file again
         """
-        Generator which takes an iterable of raw rows and returns tuples of 1. a batches of specs, 2. the record index
+        if self.records_file:
+            with self.records_file.open("rb") as f, gzip.GzipFile(fileobj=f, mode="rb") as spill:
+                for line in spill:
+                    yield json.loads(line)
+        else:
+            with self.file.open("rb") as f:
+                data = self._read_rows(f, self.file.name)
+                next(data, None)  # skip header row
+
+                for row_num, row, uuid, urns in self._parse_records(self.org, data, self.mappings):
+                    yield row_num, row, urns
+
+    def _batches_generator(self, records):
+        """
+        Generator which takes an iterable of records and returns tuples of 1. a batches of specs, 2. the record index
         at which the batch starts, 3. the record number at which the batch ends
         """
         record = 0
         batch_specs = []
         batch_start = record
-        row = 1  # 1-based rows like Excel uses
 
-        for raw_row in row_iter:
-            row_data = self._parse_row(raw_row, len(self.mappings), tz=self.org.timezone)
-            spec = self._row_to_spec(row_data)
-            row += 1
-            if spec:
-                spec["_import_row"] = row
-                batch_specs.append(spec)
-                record += 1
+        for row_num, row, urns in records:
+            spec = self._row_to_spec(row, urns)
+            spec["_import_row"] = row_num
+            batch_specs.append(spec)
+            record += 1
 
             if len(batch_specs) == ContactImport.BATCH_SIZE:
                 yield batch_specs, batch_start, record
@@ -2300,14 +2434,16 @@ class ContactImport(SmartModel):
         prefix, name = (parts[0], parts[1]) if len(parts) >= 2 else ("", parts[0])
         return prefix.lower(), name
 
-    def _row_to_spec(self, row: list[str]) -> dict:
+    def _row_to_spec(self, row: list[str], urns: list[str]) -> dict:
         """
-        Convert a record (dict of headers to values) to a contact spec
+        Convert a record (parsed values and normalized URNs) to a contact spec
         """
 
         spec = {}
         if self.group_id:
             spec["groups"] = [str(self.group.uuid)]
+        if urns:
+            spec["urns"] = urns
 
         for value, item in zip(row, self.mappings):
             mapping = item["mapping"]
@@ -2322,38 +2458,22 @@ class ContactImport(SmartModel):
                 if attribute in ("uuid", "language", "status"):
                     value = value.lower()
                 spec[attribute] = value
-            elif mapping["type"] == "scheme":
-                scheme = mapping["scheme"]
-                if value:
-                    if "urns" not in spec:
-                        spec["urns"] = []
-                    urn = URN.from_parts(scheme, value)
-                    try:
-                        urn = URN.normalize(urn, country_code=self.org.default_country_code)
-                    except ValueError:
-                        pass
-                    spec["urns"].append(urn)
-
             elif mapping["type"] in ("field", "new_field"):
                 if "fields" not in spec:
                     spec["fields"] = {}
                 key = mapping["key"]
                 spec["fields"][key] = value
 
-        # Make sure the row has a UUID or URNs
-        if not spec.get("uuid", "") and not spec.get("urns", []):
-            return {}
-
         return spec
 
     @classmethod
-    def _parse_row(cls, row: list[str], size: int, tz=None) -> list[str]:
+    def _parse_row(cls, row: list[Any], size: int, tz=None) -> list[str]:
         """
         Parses the raw values in the given row, returning a new list with the given size
         """
         parsed = []
         for i in range(size):
-            parsed.append(cls._parse_value(row[i].value, tz=tz) if i < len(row) else "")
+            parsed.append(cls._parse_value(row[i], tz=tz) if i < len(row) else "")
         return parsed
 
     @staticmethod
@@ -1,5 +1,5 @@
-import itertools
 import logging
+from datetime import timedelta
 
 from celery import shared_task
 
@@ -18,10 +18,7 @@ def release_contacts(user_id, contact_ids):
     """
     user = User.objects.get(pk=user_id)
 
-    for id_batch in itertools.batched(contact_ids, 100):
-        batch = Contact.objects.filter(id__in=id_batch, is_active=True).prefetch_related("urns")
-        for contact in batch:
-            contact.release(user)
+    Contact.bulk_release(user, Contact.objects.filter(id__in=contact_ids, is_active=True).select_related("org"))
 
 
 @shared_task
@@ -35,9 +32,10 @@ def import_contacts_task(import_id):
 @shared_task
 def release_group_task(group_id):
     """
-    Releases group
+    Releases group, continuing in a new task if the group is too big to release in one
     """
-    ContactGroup.objects.get(id=group_id)._full_release()
+    if not ContactGroup.objects.get(id=group_id)._full_release(time_limit=timedelta(minutes=10)):
+        release_group_task.delay(group_id)
 
 
 @cron_task(lock_timeout=7200)
@@ -45,12 +43,20 @@ def squash_group_counts():
     """
     Squashes our ContactGroupCounts into single rows per ContactGroup
     """
-    ContactGroupCount.squash()
+    return ContactGroupCount.squash()
 
 
 @shared_task
-def full_release_contact(contact_id):
-    contact = Contact.objects.filter(id=contact_id).first()
+def full_release_contacts(contact_ids):
+    contacts = list(Contact.objects.filter(id__in=contact_ids, is_active=False))
+
+    if contacts:
+        Contact._bulk_full_release(contacts)
 
-    if contact and not contact.is_active:
-        contact._full_release()
+
+@shared_task
+def full_release_contact(contact_id):
+    """
+    Deprecated, kept so that tasks queued before the switch to full_release_contacts can still be processed
+    """
+    full_release_contacts([contact_id])
@@ -12,6 +12,7 @@ from temba import mailroom
 from temba.campaigns.models import Campaign, CampaignEvent
 from temba.channels.models import ChannelEvent
 from temba.contacts.models import URN, Contact, ContactField, ContactFire, ContactGroup, ContactURN
+from temba.contacts.tasks import full_release_contact
 from temba.flows.models import Flow
 from temba.locations.models import AdminBoundary
 from temba.mailroom import modifiers
@@ -185,7 +186,7 @@ class ContactTest(TembaTest):
 
         # first try releasing with _full_release patched so we can check the state of the contact before the task
         # to do a full release has kicked off
-        with patch("temba.contacts.models.Contact._full_release"):
+        with patch("temba.contacts.models.Contact._bulk_full_release"):
             contact.release(self.admin)
 
         self.assertEqual(2, contact.urns.all().count())
@@ -233,6 +234,54 @@ class ContactTest(TembaTest):
         Flow.objects.get(id=ivr_flow.id)
         self.assertEqual(1, Ticket.objects.count())
 
+    @mock_mailroom
+    def test_full_release_contact_task(self, mr_mocks):
+        contact = self.create_contact("Ann", urns=["tel:+12065550001"])
+        self.create_incoming_msg(contact, "Hi")
+
+        with patch("temba.contacts.models.Contact._bulk_full_release"):
+            contact.release(self.admin)
+
+        self.assertEqual(1, contact.msgs.count())
+
+        # deprecated single contact task still works for tasks queued before it was replaced
+        full_release_contact(contact.id)
+
+        self.assertEqual(0, contact.urns.count())
+        self.assertEqual(0, contact.msgs.count())
+
+    @mock_mailroom
+    def test_bulk_release(self, mr_mocks):
+        ann = self.create_contact("Ann", urns=["tel:+12065550001"])
+        bob = self.create_contact("Bob", urns=["tel:+12065550002", "twitter:bobby"])
+        cat = self.create_contact("Cat", urns=["tel:+12065550003"])
+        dan = self.create_contact("Dan", urns=["tel:+12065550004"])
+        group = self.create_group("Testers", contacts=[ann, bob, cat, dan])
+        self.create_incoming_msg(ann, "Hi")
+        self.create_incoming_msg(bob, "Hello")
+
+        with patch("temba.contacts.models.Contact.BULK_RELEASE_BATCH_SIZE", 2):
+            Contact.bulk_release(self.admin, [ann, bob, cat])
+
+        # contacts are de-indexed a batch at a time
+        self.assertEqual([call(self.org, [ann, bob]), call(self.org, [cat])], mr_mocks.calls["contact_deindex"])
+
+        for contact in (ann, bob, cat):
+            contact.refresh_from_db()
+
+            self.assertFalse(contact.is_active)
+            self.assertIsNone(contact.name)
+            self.assertEqual(self.admin, contact.modified_by)
+            self.assertEqual(0, contact.urns.count())
+            self.assertEqual(0, contact.msgs.count())
+
+        self.assertEqual({dan}, set(group.contacts.all()))
+        self.assertEqual(1, dan.urns.count())
+
+        # old URNs can be reused
+        ann2 = self.create_contact("Ann 2", urns=["tel:+12065550001"])
+        self.assertEqual(1, ann2.urns.count())
+
     @mock_mailroom
     def test_status_changes_and_release(self, mr_mocks):
         flow = self.create_flow("Test")
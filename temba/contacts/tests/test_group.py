@@ -1,3 +1,6 @@
+from datetime import timedelta
+from unittest.mock import patch
+
 from django.urls import reverse
 from django.utils import timezone
 
@@ -237,6 +240,34 @@ class ContactGroupTest(TembaTest):
             },
         )
 
+    def test_clear_contacts(self):
+        group = self.create_group("Testers", contacts=[self.joe, self.frank, self.mary])
+        other = self.create_group("Others", contacts=[self.joe])
+
+        t1 = timezone.now()
+
+        with patch("temba.contacts.models.ContactGroup.CLEAR_BATCH_SIZE", 2):
+            # with no time to spare, we only get through one chunk
+            result = group.clear_contacts(time_limit=timedelta(0))
+
+            self.assertEqual(2, result["removed"])
+            self.assertFalse(result["complete"])
+            self.assertEqual({self.mary}, set(group.contacts.all()))
+
+            # calling again resumes clearing
+            result = group.clear_contacts()
+
+            self.assertEqual(1, result["removed"])
+            self.assertTrue(result["complete"])
+            self.assertEqual(set(), set(group.contacts.all()))
+
+        self.assertEqual({self.joe}, set(other.contacts.all()))  # unchanged
+
+        self.joe.refresh_from_db()
+        self.mary.refresh_from_db()
+        self.assertGreater(self.joe.modified_on, t1)
+        self.assertGreater(self.mary.modified_on, t1)
+
     @mock_mailroom
     def test_release(self, mr_mocks):
         contact1 = self.create_contact("Bob", phone="+1234567111")
@@ -50,7 +50,7 @@ class ContactImportTest(TembaTest):
 
     def test_extract_mappings(self):
         # try simple import in different formats
-        for ext in ("xlsx",):
+        for ext in ("xlsx", "csv"):
             imp = self.create_contact_import(f"media/test_imports/simple.{ext}")
             self.assertEqual(3, imp.num_records)
             self.assertEqual(
@@ -158,7 +158,11 @@ class ContactImportTest(TembaTest):
             imp.get_info(),
         )
 
-        imp.start()
+        # starting uses the records parsed at upload time rather than parsing the file again
+        with patch.object(ContactImport, "_read_rows", wraps=ContactImport._read_rows) as mock_read_rows:
+            imp.start()
+            self.assertEqual(0, mock_read_rows.call_count)
+
         batches = list(imp.batches.order_by("id"))
 
         self.assertIsNotNone(imp.started_on)
@@ -214,6 +218,23 @@ class ContactImportTest(TembaTest):
         self.assertEqual(2, batches[1].record_start)
         self.assertEqual(3, batches[1].record_end)
 
+        # imports without parsed records fall back to parsing the file
+        imp = self.create_contact_import("media/test_imports/simple.xlsx")
+        imp.records_file.delete()
+
+        with patch.object(ContactImport, "_read_rows", wraps=ContactImport._read_rows) as mock_read_rows:
+            imp.start()
+            self.assertEqual(1, mock_read_rows.call_count)
+
+        self.assertEqual(
+            [
+                {"_import_row": 2, "name": "Eric Newcomer", "urns": ["tel:+250788382382"]},
+                {"_import_row": 3, "name": "NIC POTTIER", "urns": ["tel:+250788383383"]},
+                {"_import_row": 4, "name": "jen newcomer", "urns": ["tel:+250788383385"]},
+            ],
+            [{k: v for k, v in s.items() if k != "groups"} for s in imp.batches.get().specs],
+        )
+
         # info is calculated across all batches
         self.assertEqual(
             {
@@ -485,6 +506,36 @@ class ContactImportTest(TembaTest):
             batch.specs,
         )
 
+    @mock_mailroom
+    def test_batches_from_csv(self, mr_mocks):
+        imp = self.create_contact_import("media/test_imports/simple.csv")
+        imp.start()
+        batch = imp.batches.get()
+
+        self.assertEqual(
+            [
+                {
+                    "_import_row": 2,
+                    "name": "Eric Newcomer",
+                    "urns": ["tel:+250788382382"],
+                    "groups": [str(imp.group.uuid)],
+                },
+                {
+                    "_import_row": 3,
+                    "name": "NIC POTTIER",
+                    "urns": ["tel:+250788383383"],
+                    "groups": [str(imp.group.uuid)],
+                },
+                {
+                    "_import_row": 4,
+                    "name": "jen newcomer",
+                    "urns": ["tel:+250788383385"],
+                    "groups": [str(imp.group.uuid)],
+                },
+            ],
+            batch.specs,
+        )
+
     @mock_mailroom
     def test_batches_from_xlsx_with_formulas(self, mr_mocks):
         imp = self.create_contact_import("media/test_imports/formula_data.xlsx")
@@ -30,6 +30,7 @@ class ContactImportCRUDLTest(TembaTest, CRUDLTestMixin):
         self.assertEqual(self.org, imp.org)
         self.assertEqual(3, imp.num_records)
         self.assertRegex(imp.file.name, rf"orgs/{self.org.id}/contact_imports/[\w-]{{36}}.xlsx$")
+        self.assertRegex(imp.records_file.name, rf"orgs/{self.org.id}/contact_imports/[\w-]{{36}}.gz$")
         self.assertEqual("simple.xlsx", imp.original_filename)
         self.assertIsNone(imp.started_on)
         self.assertIsNone(imp.group)
@@ -1,4 +1,5 @@
 import logging
+import tempfile
 from collections import OrderedDict
 from datetime import timedelta
 from urllib.parse import quote_plus
@@ -10,6 +11,7 @@ from django import forms
 from django.conf import settings
 from django.contrib import messages
 from django.core.exceptions import ValidationError
+from django.core.files import File
 from django.core.validators import FileExtensionValidator
 from django.db import transaction
 from django.db.models.functions import Upper
@@ -1098,21 +1100,27 @@ class ContactImportCRUDL(SmartCRUDL):
 
     class Create(SpaMixin, OrgPermsMixin, SmartCreateView):
         class Form(forms.ModelForm):
-            file = forms.FileField(validators=[FileExtensionValidator(allowed_extensions=("xlsx",))])
+            file = forms.FileField(validators=[FileExtensionValidator(allowed_extensions=("xlsx", "csv"))])
 
             def __init__(self, *args, org, **kwargs):
                 self.org = org
                 self.headers = None
                 self.mappings = None
                 self.num_records = None
+                self.records = None
 
                 super().__init__(*args, **kwargs)
 
             def clean_file(self):
                 file = self.cleaned_data["file"]
 
-                # try to parse the file saving the mappings so we don't have to repeat parsing when saving the import
-                self.mappings, self.num_records = ContactImport.try_to_parse(self.org, file.file, file.name)
+                # try to parse the file saving the mappings and parsed records so we don't have to repeat parsing when
+                # saving or starting the import
+                self.records = tempfile.TemporaryFile()
+                self.mappings, self.num_records = ContactImport.try_to_parse(
+                    self.org, file.file, file.name, records_out=self.records
+                )
+                self.records.seek(0)
 
                 return file
 
@@ -1147,6 +1155,7 @@ class ContactImportCRUDL(SmartCRUDL):
             obj.original_filename = self.form.cleaned_data["file"].name
             obj.mappings = self.form.mappings
             obj.num_records = self.form.num_records
+            obj.records_file = File(self.form.records, name="records.jsonl.gz")
             return obj
 
     class Preview(SpaMixin, OrgObjPermsMixin, SmartUpdateView):
@@ -1,6 +1,5 @@
 import itertools
 import logging
-from array import array
 from collections import defaultdict
 from dataclasses import dataclass
 from datetime import date, datetime, timezone as tzone
@@ -29,8 +28,7 @@ from temba.orgs.models import DependencyMixin, Export, ExportType, Org, User
 from temba.templates.models import Template
 from temba.tickets.models import Topic
 from temba.utils import analytics, json, on_transaction_commit, s3
-from temba.utils.export.models import MultiSheetExporter
-from temba.utils.models import JSONAsTextField, LegacyUUIDMixin, TembaModel, delete_in_batches
+from temba.utils.models import JSONAsTextField, LegacyUUIDMixin, TembaModel, delete_in_batches, iter_keyset_batches
 from temba.utils.models.counts import BaseScopedCount, BaseSquashableCount
 from temba.utils.uuid import uuid4
 
@@ -447,10 +445,10 @@ class Flow(LegacyUUIDMixin, TembaModel, DependencyMixin):
         at each step and a map of the previous visits
         """
 
-        counts = self.counts.prefix("node:").scope_totals()
+        counts = FlowActivityCount.get_scope_totals(self, "node:")
         by_node = {scope[5:]: count for scope, count in counts.items() if count}
 
-        counts = self.counts.prefix("segment:").scope_totals()
+        counts = FlowActivityCount.get_scope_totals(self, "segment:")
         by_segment = {scope[8:]: count for scope, count in counts.items() if count}
 
         return by_node, by_segment
@@ -603,7 +601,7 @@ class Flow(LegacyUUIDMixin, TembaModel, DependencyMixin):
         if hasattr(self, "_status_counts"):
             counts = self._status_counts
         else:
-            counts = self.counts.prefix("status:").scope_totals()
+            counts = FlowActivityCount.get_scope_totals(self, "status:")
 
         return defaultdict(int, {scope[7:]: count for scope, count in counts.items()})
 
@@ -906,7 +904,7 @@ class Flow(LegacyUUIDMixin, TembaModel, DependencyMixin):
             iso_dow = int(scope[11:])  # 1-7 Mon-Sun
             return 0 if iso_dow == 7 else iso_dow  # 0-6 Sun-Sat
 
-        counts = self.counts.prefix("msgsin:dow:").scope_totals()
+        counts = FlowActivityCount.get_scope_totals(self, "msgsin:dow:")
         return {parse(scope): count for scope, count in counts.items()}
 
     def get_engagement_by_hour(self, tz) -> dict[int, int]:
@@ -922,7 +920,7 @@ class Flow(LegacyUUIDMixin, TembaModel, DependencyMixin):
             """
             return (int(scope[12:]) + offset) % 24
 
-        counts = self.counts.prefix("msgsin:hour:").scope_totals()
+        counts = FlowActivityCount.get_scope_totals(self, "msgsin:hour:")
         return {parse(scope): count for scope, count in counts.items()}
 
     def release(self, user, *, interrupt_sessions: bool = True):
@@ -960,6 +958,7 @@ class Flow(LegacyUUIDMixin, TembaModel, DependencyMixin):
         self.user_dependencies.clear()
 
         self.counts.all().delete()
+        FlowActivityCount.clear_cached_totals([self.id])
 
         # queue mailroom to interrupt sessions where contact is currently in this flow
         if interrupt_sessions:
@@ -1237,6 +1236,14 @@ class FlowRevision(models.Model):
 
     LAST_TRIM_KEY = "temba:last_flow_revision_trim"
 
+    # revisions never change so migrating them always gives the same result
+    MIGRATED_CACHE_KEY = "flow_revision_migrated:{id}:{from_version}:{to_version}"
+    MIGRATED_CACHE_TTL = 60 * 60
+
+    # inspecting a revision also depends on the org's assets so results are only cached briefly
+    INSPECT_CACHE_KEY = "flow_revision_inspect:{id}:{version}:{assets_version}"
+    INSPECT_CACHE_TTL = 60 * 5
+
     flow = models.ForeignKey(Flow, on_delete=models.PROTECT, related_name="revisions")
     definition = JSONAsTextField(default=dict)
     spec_version = models.CharField(default=Flow.FINAL_LEGACY_VERSION, max_length=8)
@@ -1324,6 +1331,30 @@ class FlowRevision(models.Model):
                 validate_localization(rule["category"])
 
     def get_migrated_definition(self, to_version: str = Flow.CURRENT_SPEC_VERSION) -> dict:
+        if self.spec_version != to_version and self.id:
+            r = get_redis_connection()
+            cache_key = self.MIGRATED_CACHE_KEY.format(
+                id=self.id, from_version=self.spec_version, to_version=to_version
+            )
+            cached = r.get(cache_key)
+            if cached:
+                definition = json.loads(cached)
+            else:
+                definition = self._migrate_definition(to_version)
+                r.set(cache_key, json.dumps(definition), ex=self.MIGRATED_CACHE_TTL)
+        else:
+            definition = self._migrate_definition(to_version)
+
+        # update variables from our db into our revision
+        flow = self.flow
+        definition[Flow.DEFINITION_NAME] = flow.name
+        definition[Flow.DEFINITION_UUID] = flow.uuid
+        definition[Flow.DEFINITION_REVISION] = self.revision
+        definition[Flow.DEFINITION_EXPIRE_AFTER_MINUTES] = flow.expires_after_minutes
+
+        return definition
+
+    def _migrate_definition(self, to_version: str) -> dict:
         definition = self.definition
 
         # if it's previous to version 6, wrap the definition to
@@ -1350,15 +1381,24 @@ class FlowRevision(models.Model):
         if self.spec_version != to_version:
             definition = Flow.migrate_definition(definition, self.flow, to_version)
 
-        # update variables from our db into our revision
-        flow = self.flow
-        definition[Flow.DEFINITION_NAME] = flow.name
-        definition[Flow.DEFINITION_UUID] = flow.uuid
-        definition[Flow.DEFINITION_REVISION] = self.revision
-        definition[Flow.DEFINITION_EXPIRE_AFTER_MINUTES] = flow.expires_after_minutes
-
         return definition
 
+    def inspect(self, definition: dict, version: str) -> dict:
+        """
+        Inspects the given definition of this revision migrated to the given version. Inspection issues depend on the
+        org's assets so results are cached against the org's assets version.
+        """
+        org = self.flow.org
+        r = get_redis_connection()
+        cache_key = self.INSPECT_CACHE_KEY.format(id=self.id, version=version, assets_version=org.get_assets_version())
+        cached = r.get(cache_key)
+        if cached:
+            return json.loads(cached)
+
+        flow_info = mailroom.get_client().flow_inspect(org, definition)
+        r.set(cache_key, json.dumps(flow_info), ex=self.INSPECT_CACHE_TTL)
+        return flow_info
+
     def as_json(self):
         return {
             "id": self.id,
@@ -1383,19 +1423,10 @@ class FlowActivityCount(BaseScopedCount):
 
     @classmethod
     def prefetch_by_scope(cls, flows, *, prefix: str, to_attr: str, using: str):
-        counts = (
-            cls.objects.using(using)
-            .filter(flow__in=flows)
-            .prefix(prefix)
-            .values_list("flow_id", "scope")
-            .annotate(total=Sum("count"))
-        )
-        by_flow = defaultdict(dict)
-        for count in counts:
-            by_flow[count[0]][count[1]] = count[2]
+        totals = cls.get_cached_totals([f.id for f in flows], prefix=prefix, using=using)
 
         for flow in flows:
-            setattr(flow, to_attr, by_flow[flow.id])
+            setattr(flow, to_attr, totals[flow.id])
 
     class Meta:
         indexes = [
@@ -1436,6 +1467,7 @@ class ResultsExport(ExportType):
     name = _("Flow Results")
     download_prefix = "flow_results"
     download_template = "flows/export_download.html"
+    formats = (Export.FORMAT_XLSX, Export.FORMAT_CSV, Export.FORMAT_JSONL)
 
     @classmethod
     def create(
@@ -1449,6 +1481,7 @@ class ResultsExport(ExportType):
         with_groups=[],
         responded_only=True,
         extra_urns=[],
+        format=Export.FORMAT_XLSX,
     ):
         export = Export.objects.create(
             org=org,
@@ -1461,6 +1494,7 @@ class ResultsExport(ExportType):
                 "with_groups": [g.id for g in with_groups],
                 "responded_only": responded_only,
                 "extra_urns": extra_urns,
+                "format": format,
             },
             created_by=user,
         )
@@ -1514,22 +1548,29 @@ class ResultsExport(ExportType):
         runs_columns = self.get_runs_columns(export, extra_urn_columns, result_fields)
 
         # create our exporter
-        exporter = MultiSheetExporter("Runs", runs_columns, export.org.timezone)
-        num_records = 0
-
-        for batch in self._get_run_batches(export, start_date, end_date, flows, responded_only):
-            self._write_runs(export, exporter, batch, extra_urn_columns, result_fields)
-
-            num_records += len(batch)
-
-            export.modified_on = timezone.now()
-            export.save(update_fields=("modified_on",))
+        exporter = export.create_exporter("Runs", runs_columns)
+
+        num_records = self._write_batches(
+            export,
+            exporter,
+            self._get_run_batches(export, start_date, end_date, flows, responded_only),
+            enrich=lambda runs: self._get_contacts(export, runs),
+            serialize=lambda batch: self._get_rows(export, *batch, extra_urn_columns, result_fields),
+        )
 
         return *exporter.save_file(), num_records
 
     def _get_run_batches(self, export, start_date, end_date, flows, responded_only: bool):
         logger.info(f"Results export #{export.id} for org #{export.org.id}: fetching runs from archives to export...")
 
+        # if we're resuming, continue from the position of the last checkpoint
+        position = export.get_checkpoint() or {}
+        archived_until = date.fromisoformat(position["archived_until"]) if position.get("archived_until") else None
+        after = position.get("after")
+
+        def get_position() -> dict:
+            return {"archived_until": archived_until.isoformat() if archived_until else None, "after": after}
+
         # firstly get runs from archives
         from temba.archives.models import Archive
 
@@ -1543,51 +1584,77 @@ class ResultsExport(ExportType):
         where = {"flow__uuid__in": flow_uuids}
         if responded_only:
             where["responded"] = True
-        records = Archive.iter_all_records(
-            export.org, Archive.TYPE_FLOWRUN, after=max(earliest_created_on, start_date), before=end_date, where=where
+        archives = Archive.iter_archive_records(
+            export.org,
+            Archive.TYPE_FLOWRUN,
+            after=max(earliest_created_on, start_date),
+            before=end_date,
+            where=where,
+            prefetch=self.archive_prefetch,
         )
+        resumed_until = archived_until
         seen = set()
 
-        for record_batch in itertools.batched(records, 1000):
-            matching = []
-            for record in record_batch:
-                seen.add(record["id"])
-                matching.append(record)
-            yield matching
-
-        # secondly get runs from database
-        runs = (
-            FlowRun.objects.filter(created_on__gte=start_date, created_on__lte=end_date, flow__in=flows)
-            .order_by("modified_on")
-            .using("readonly")
-        )
+        for archive, records in archives:
+            # if we're resuming, archives we've already exported still need reading to know which runs to skip in the
+            # database, and if they've since been rolled up, we skip the records we've already written
+            if after or (resumed_until and archive.get_end_date() <= resumed_until):
+                seen.update(r["id"] for r in records)
+                continue
+
+            skip_before = resumed_until if resumed_until and archive.start_date < resumed_until else None
+
+            batches = itertools.batched(records, 1000)
+            record_batch = next(batches, None)
+
+            while record_batch is not None:
+                next_batch = next(batches, None)
+
+                matching = []
+                for record in record_batch:
+                    seen.add(record["id"])
+
+                    # run archives are by modified date
+                    if (
+                        skip_before
+                        and iso8601.parse_date(record["modified_on"]).astimezone(tzone.utc).date() < skip_before
+                    ):
+                        continue
+
+                    matching.append(record)
+
+                # can only checkpoint once we've written an entire archive
+                if next_batch is None:
+                    archived_until = archive.get_end_date()
+                    yield matching, get_position()
+                else:
+                    yield matching, None
+
+                record_batch = next_batch
+
+        # secondly get runs from database, paging by id rather than modified_on so that runs modified whilst we're
+        # exporting can't move past our position and be skipped
+        runs = FlowRun.objects.filter(created_on__gte=start_date, created_on__lte=end_date, flow__in=flows)
         if responded_only:
             runs = runs.filter(responded=True)
-        run_ids = array(str("l"), runs.values_list("id", flat=True))
 
-        logger.info(
-            f"Results export #{export.id} for org #{export.org.id}: found {len(run_ids)} runs in database to export"
+        runs = runs.using("readonly").prefetch_related(
+            Prefetch("contact", Contact.objects.only("uuid", "name")),
+            Prefetch("flow", Flow.objects.only("uuid", "name")),
         )
 
-        for id_batch in itertools.batched(run_ids, 1000):
-            run_batch = (
-                FlowRun.objects.filter(id__in=id_batch)
-                .order_by("modified_on", "id")
-                .prefetch_related(
-                    Prefetch("contact", Contact.objects.only("uuid", "name")),
-                    Prefetch("flow", Flow.objects.only("uuid", "name")),
-                )
-                .using("readonly")
-            )
+        logger.info(f"Results export #{export.id} for org #{export.org.id}: fetching runs from database to export...")
+
+        for run_batch in iter_keyset_batches(runs, keys=("id",), after=(after,) if after else None):
+            after = run_batch[-1].id
 
             # convert this batch of runs to same format as records in our archives
-            yield [run.as_archive_json() for run in run_batch if run.id not in seen]
+            yield [run.as_archive_json() for run in run_batch if run.id not in seen], get_position()
 
-    def _write_runs(self, export, exporter, runs, extra_urn_columns, result_fields):
+    def _get_contacts(self, export, runs) -> tuple:
         """
-        Writes a batch of run JSON blobs to the export
+        Looks up all the contacts referenced in a batch of run JSON blobs
         """
-        # get all the contacts referenced in this batch
         contact_uuids = {r["contact"]["uuid"] for r in runs}
         contacts = (
             Contact.objects.filter(org=export.org, uuid__in=contact_uuids)
@@ -1595,10 +1662,17 @@ class ResultsExport(ExportType):
             .prefetch_related("groups")
             .using("readonly")
         )
-        contacts_by_uuid = {str(c.uuid): c for c in contacts}
 
         Contact.bulk_urn_cache_initialize(contacts, using="readonly")
 
+        return runs, {str(c.uuid): c for c in contacts}
+
+    def _get_rows(self, export, runs, contacts_by_uuid, extra_urn_columns, result_fields) -> list:
+        """
+        Converts a batch of run JSON blobs to rows of values
+        """
+        rows = []
+
         for run in runs:
             contact = contacts_by_uuid.get(run["contact"]["uuid"])
 
@@ -1640,7 +1714,9 @@ class ResultsExport(ExportType):
             ]
             runs_sheet_row += result_values
 
-            exporter.write_row(runs_sheet_row)
+            rows.append(runs_sheet_row)
+
+        return rows
 
     def get_download_context(self, export) -> dict:
         flows = self.get_flows(export)
@@ -20,9 +20,11 @@ logger = logging.getLogger(__name__)
 
 @cron_task(lock_timeout=7200)
 def squash_flow_counts():
-    FlowActivityCount.squash()
-    FlowResultCount.squash()
-    FlowStartCount.squash()
+    return {
+        "activity": FlowActivityCount.squash(),
+        "results": FlowResultCount.squash(),
+        "starts": FlowStartCount.squash(),
+    }
 
 
 @cron_task()
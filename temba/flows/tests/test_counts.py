@@ -1,4 +1,5 @@
 from datetime import date, timezone as tzone
+from unittest.mock import patch
 
 from django.db import connection
 from django.utils import timezone
@@ -216,7 +217,12 @@ class FlowActivityCountTest(TembaTest):
         self.assertEqual(0, flow2.counts.filter(scope="foo:2").sum())
         self.assertEqual(5, flow2.counts.filter(scope="foo:3").sum())
 
-        squash_flow_counts()
+        # squash with a small batch size so that sets are squashed over multiple statements
+        with patch.object(FlowActivityCount, "squash_batch_size", 4):
+            result = squash_flow_counts()
+
+        self.assertEqual(6, result["activity"]["sets"])
+        self.assertEqual(10, result["activity"]["rows"])
 
         self.assertEqual({"foo:1", "foo:2", "foo:3"}, set(flow1.counts.values_list("scope", flat=True)))
 
@@ -237,9 +243,14 @@ class FlowActivityCountTest(TembaTest):
         # flow2/foo:3 should be gone because it squashed to zero
         self.assertEqual({"foo:1"}, set(flow2.counts.values_list("scope", flat=True)))
 
-        # test that model being asked to squash a set that matches no rows doesn't insert anytihng
+        # test that a batch squash of sets with no rows doesn't insert or delete anything
         with connection.cursor() as cursor:
-            sql, params = FlowActivityCount.get_squash_query({"flow_id": flow1.id, "scope": "foo:9"})
-            cursor.execute(sql, params)
+            cursor.execute(FlowActivityCount.get_batch_squash_query(), ([flow1.id], ["foo:4"]))
+            self.assertEqual((0,), cursor.fetchone())
+
+        # and that squashing when there are no unsquashed rows does nothing
+        result = squash_flow_counts()
+        self.assertEqual(0, result["activity"]["sets"])
+        self.assertEqual(0, result["activity"]["rows"])
 
         self.assertEqual({"foo:1", "foo:2", "foo:3"}, set(flow1.counts.values_list("scope", flat=True)))
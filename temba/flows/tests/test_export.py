@@ -13,6 +13,7 @@ from temba.orgs.models import Export
 from temba.tests import TembaTest, mock_mailroom
 from temba.tests.engine import MockSessionWriter
 from temba.utils import json
+from temba.utils.models import iter_keyset_batches
 from temba.utils.uuid import uuid4
 
 
@@ -177,7 +178,7 @@ class ResultsExportTest(TembaTest):
         for run in (contact1_run1, contact2_run1, contact3_run1, contact1_run2, contact2_run2):
             run.refresh_from_db()
 
-        with self.assertNumQueries(23):
+        with self.assertNumQueries(17):
             workbook = self._export(
                 flow,
                 start_date=today - timedelta(days=7),
@@ -317,7 +318,7 @@ class ResultsExportTest(TembaTest):
         )
 
         # test without unresponded
-        with self.assertNumQueries(21):
+        with self.assertNumQueries(17):
             workbook = self._export(
                 flow,
                 start_date=today - timedelta(days=7),
@@ -392,7 +393,7 @@ class ResultsExportTest(TembaTest):
         )
 
         # test export with a contact field
-        with self.assertNumQueries(25):
+        with self.assertNumQueries(19):
             workbook = self._export(
                 flow,
                 start_date=today - timedelta(days=7),
@@ -557,7 +558,7 @@ class ResultsExportTest(TembaTest):
 
         contact1_run1, contact2_run1 = flow.runs.order_by("id")
 
-        with self.assertNumQueries(17):
+        with self.assertNumQueries(16):
             workbook = self._export(flow, start_date=today - timedelta(days=7), end_date=today)
 
         tz = self.org.timezone
@@ -626,6 +627,39 @@ class ResultsExportTest(TembaTest):
             ["Contact UUID", "Contact Name", "URN Scheme", "URN Value", "Started", "Modified", "Exited", "Run UUID"],
         )
 
+    def test_runs_modified_during_export(self):
+        flow = self.create_flow("Test")
+        today = timezone.now().astimezone(self.org.timezone).date()
+
+        for contact in [self.contact, self.contact2, self.contact3]:
+            flow.runs.create(
+                org=contact.org,
+                contact=contact,
+                status=FlowRun.STATUS_WAITING,
+                path=[],
+                results={},
+                created_on=timezone.now() - timedelta(hours=1),
+                modified_on=timezone.now() - timedelta(hours=1),
+            )
+
+        run1, run2, run3 = flow.runs.order_by("id")
+
+        # modify the last run after the first batch has been fetched, like a contact still active in the flow
+        def iter_and_modify(qs, **kwargs):
+            for i, batch in enumerate(iter_keyset_batches(qs, **{**kwargs, "batch_size": 1})):
+                yield batch
+                if i == 0:
+                    FlowRun.objects.filter(id=run3.id).update(modified_on=timezone.now())
+
+        with patch("temba.flows.models.iter_keyset_batches", iter_and_modify):
+            workbook = self._export(flow, start_date=today - timedelta(days=7), end_date=today)
+
+        (sheet_runs,) = workbook.worksheets
+        self.assertEqual(4, len(list(sheet_runs.rows)))  # header + 3 runs
+        self.assertEqual(
+            [str(run1.uuid), str(run2.uuid), str(run3.uuid)], [r[7].value for r in list(sheet_runs.rows)[1:]]
+        )
+
     def test_replaced_rulesets(self):
         today = timezone.now().astimezone(self.org.timezone).date()
 
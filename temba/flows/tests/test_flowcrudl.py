@@ -5,13 +5,14 @@ from unittest.mock import patch
 
 from django_redis import get_redis_connection
 
-from django.test.utils import override_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
 
 from temba import mailroom
 from temba.campaigns.models import Campaign, CampaignEvent
 from temba.contacts.models import URN
-from temba.flows.models import Flow, FlowLabel, FlowStart, FlowUserConflictException, ResultsExport
+from temba.flows.models import Flow, FlowLabel, FlowRevision, FlowStart, FlowUserConflictException, ResultsExport
 from temba.msgs.models import SystemLabel
 from temba.orgs.models import Export
 from temba.templates.models import TemplateTranslation
@@ -782,6 +783,46 @@ class FlowCRUDLTest(TembaTest, CRUDLTestMixin):
         # should only have been migrated to that version
         self.assertEqual("13.0.0", response.json()["definition"]["spec_version"])
 
+        # migrated definitions and inspection results are cached so fetching again doesn't need mailroom
+        with patch("temba.mailroom.client.client.MailroomClient.flow_migrate") as mock_migrate:
+            with patch("temba.mailroom.client.client.MailroomClient.flow_inspect") as mock_inspect:
+                response = self.client.get(f"{revisions_url}{revisions[1].id}/?version=13.0.0")
+
+                self.assertEqual("13.0.0", response.json()["definition"]["spec_version"])
+                self.assertEqual(1, response.json()["definition"]["revision"])
+                mock_migrate.assert_not_called()
+                mock_inspect.assert_not_called()
+
+        # unless the org's assets have changed since, as that can change inspection issues
+        self.create_field("age", "Age")
+
+        with patch("temba.mailroom.client.client.MailroomClient.flow_inspect") as mock_inspect:
+            mock_inspect.return_value = {"results": [], "dependencies": [], "parent_refs": [], "issues": []}
+
+            response = self.client.get(f"{revisions_url}{revisions[1].id}/?version=13.0.0")
+
+            self.assertEqual([], response.json()["issues"])
+            mock_inspect.assert_called_once()
+
+        # summaries of revisions are fetched in a single query without their definitions
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(revisions_url)
+
+        self.assertEqual(2, len(response.json()["results"]))
+        revision_sql = [q["sql"] for q in queries if 'FROM "flows_flowrevision"' in q["sql"]]
+        self.assertEqual(1, len(revision_sql))
+        self.assertNotIn('"flows_flowrevision"."definition"', revision_sql[0])
+
+        # and the number of queries doesn't grow with the number of revisions
+        FlowRevision.objects.create(
+            flow=flow, definition=flow_def, spec_version=Flow.CURRENT_SPEC_VERSION, revision=3, created_by=self.editor
+        )
+
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(revisions_url)
+
+        self.assertEqual(3, len(response.json()["results"]))
+
         # check 404 for invalid revision number
         response = self.requestView(f"{revisions_url}12345678/", self.admin)
         self.assertEqual(404, response.status_code)
@@ -1013,7 +1054,7 @@ class FlowCRUDLTest(TembaTest, CRUDLTestMixin):
             ],
             response.json()["blockers"],
         )
-        self.org.counts.prefix("msgs:folder:").delete()
+        self.org.counts.create(scope=f"msgs:folder:{SystemLabel.TYPE_OUTBOX}", count=-1_000_001)
 
         # check warning for lots of contacts
         preview_url = reverse("flows.flow_preview_start", args=[flow.id])
@@ -1847,6 +1888,7 @@ class FlowCRUDLTest(TembaTest, CRUDLTestMixin):
                 "with_fields": [gender.id],
                 "extra_urns": [],
                 "responded_only": False,
+                "format": "xlsx",
             },
             export.config,
         )
@@ -1861,13 +1903,13 @@ class FlowCRUDLTest(TembaTest, CRUDLTestMixin):
         simulate_url = reverse("flows.flow_simulate", args=[flow.pk])
 
         with override_settings(MAILROOM_AUTH_TOKEN="sesame", MAILROOM_URL="https://mailroom.temba.io"):
-            with patch("requests.post") as mock_post:
+            with patch("requests.Session.post") as mock_post:
                 mock_post.return_value = MockJsonResponse(400, {"session": {}})
                 response = self.client.post(simulate_url, json.dumps(payload), content_type="application/json")
                 self.assertEqual(500, response.status_code)
 
             # start a flow
-            with patch("requests.post") as mock_post:
+            with patch("requests.Session.post") as mock_post:
                 mock_post.return_value = MockJsonResponse(200, {"session": {}})
                 response = self.client.post(simulate_url, json.dumps(payload), content_type="application/json")
                 self.assertEqual(200, response.status_code)
@@ -1893,12 +1935,12 @@ class FlowCRUDLTest(TembaTest, CRUDLTestMixin):
                 "flow": {},
             }
 
-            with patch("requests.post") as mock_post:
+            with patch("requests.Session.post") as mock_post:
                 mock_post.return_value = MockJsonResponse(400, {"session": {}})
                 response = self.client.post(simulate_url, json.dumps(payload), content_type="application/json")
                 self.assertEqual(500, response.status_code)
 
-            with patch("requests.post") as mock_post:
+            with patch("requests.Session.post") as mock_post:
                 mock_post.return_value = MockJsonResponse(200, {"session": {}})
                 response = self.client.post(simulate_url, json.dumps(payload), content_type="application/json")
                 self.assertEqual(200, response.status_code)
@@ -1923,7 +1965,7 @@ class FlowCRUDLTest(TembaTest, CRUDLTestMixin):
         simulate_url = reverse("flows.flow_simulate", args=[flow.id])
 
         with override_settings(MAILROOM_AUTH_TOKEN="sesame", MAILROOM_URL="https://mailroom.temba.io"):
-            with patch("requests.post") as mock_post:
+            with patch("requests.Session.post") as mock_post:
                 mock_post.return_value = MockJsonResponse(200, {"session": {}})
                 response = self.client.post(
                     simulate_url, {"version": 2, "trigger": {}, "flow": {}}, content_type="application/json"
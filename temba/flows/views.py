@@ -284,7 +284,7 @@ class FlowCRUDL(SmartCRUDL):
                 definition = revision.get_migrated_definition(to_version=requested_version)
 
                 # get our metadata
-                flow_info = mailroom.get_client().flow_inspect(flow.org, definition)
+                flow_info = revision.inspect(definition, requested_version)
                 return JsonResponse(
                     {
                         "definition": definition,
@@ -293,10 +293,9 @@ class FlowCRUDL(SmartCRUDL):
                     }
                 )
 
-            # orderwise return summaries of the latest 100
-            return JsonResponse(
-                {"results": [rev.as_json() for rev in flow.revisions.all().order_by("-revision")[:100]]}
-            )
+            # orderwise return summaries of the latest 100, without loading their definitions
+            revisions = flow.revisions.defer("definition").select_related("created_by").order_by("-revision")[:100]
+            return JsonResponse({"results": [rev.as_json() for rev in revisions]})
 
         def post(self, request, *args, **kwargs):
             # try to parse our body
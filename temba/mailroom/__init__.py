@@ -1,3 +1,8 @@
+import asyncio
+import functools
+
+from asgiref.sync import async_to_sync
+
 from django.conf import settings
 
 from .client.exceptions import *  # noqa
@@ -6,6 +11,35 @@ from .queue import *  # noqa
 
 
 def get_client():
+    return _get_client(settings.MAILROOM_URL, settings.MAILROOM_AUTH_TOKEN, settings.MAILROOM_POOL_SIZE)
+
+
+@functools.cache
+def _get_client(url: str, auth_token: str, pool_size: int):
+    """
+    Clients are cached per process so that their pooled connections to mailroom are reused. They can be used from any
+    thread as each thread gets its own session.
+    """
     from .client.client import MailroomClient
 
-    return MailroomClient(settings.MAILROOM_URL, settings.MAILROOM_AUTH_TOKEN)
+    return MailroomClient(url, auth_token, pool_size=pool_size)
+
+
+def get_async_client():
+    from .client.client import AsyncMailroomClient
+
+    return AsyncMailroomClient(get_client())
+
+
+def run_concurrently(*calls) -> list:
+    """
+    Runs the given async client calls concurrently from sync code, returning their results in order, e.g.
+
+        client = mailroom.get_async_client()
+        search, preview = mailroom.run_concurrently(client.contact_search(...), client.flow_start_preview(...))
+    """
+
+    async def gather():
+        return await asyncio.gather(*calls)
+
+    return async_to_sync(gather)()
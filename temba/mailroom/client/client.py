@@ -1,7 +1,12 @@
+import asyncio
+import functools
 import logging
+import threading
+import time
 from dataclasses import asdict
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from django.conf import settings
 
@@ -10,7 +15,14 @@ from temba.msgs.models import Broadcast
 from temba.utils import json
 
 from ..modifiers import Modifier
-from .exceptions import FlowValidationException, QueryValidationException, RequestException, URNValidationException
+from .exceptions import (
+    ConnectionException,
+    FlowValidationException,
+    QueryValidationException,
+    RequestException,
+    URNValidationException,
+)
+from .signals import post_mailroom_request
 from .types import (
     ContactSpec,
     Exclusions,
@@ -33,12 +45,68 @@ class MailroomClient:
 
     default_headers = {"User-Agent": "Temba"}
 
-    def __init__(self, base_url, auth_token):
+    # (connect, read) timeouts in seconds, with longer read timeouts for endpoints that can take a while, such as those
+    # which act on many contacts, messages or tickets at once
+    default_timeout = (5, 30)
+    endpoint_timeouts = {
+        "contact/deindex": (5, 120),
+        "contact/export": (5, 120),
+        "contact/interrupt": (5, 120),
+        "contact/modify": (5, 120),
+        "msg/broadcast": (5, 60),
+        "msg/handle": (5, 120),
+        "msg/resend": (5, 120),
+        "org/deindex": (5, 120),
+        "po/export": (5, 60),
+        "po/import": (5, 60),
+        "ticket/add_note": (5, 120),
+        "ticket/assign": (5, 120),
+        "ticket/change_topic": (5, 120),
+        "ticket/close": (5, 120),
+        "ticket/reopen": (5, 120),
+    }
+
+    # endpoints which don't change anything and so can be safely retried if a request fails
+    idempotent_endpoints = {
+        "",
+        "contact/export",
+        "contact/export_preview",
+        "contact/inspect",
+        "contact/parse_query",
+        "contact/search",
+        "flow/change_language",
+        "flow/clone",
+        "flow/inspect",
+        "flow/migrate",
+        "flow/start_preview",
+        "msg/broadcast_preview",
+        "po/export",
+    }
+    retry_statuses = {502, 503, 504}
+    max_retries = 2
+    retry_backoff = 0.2  # seconds before first retry, doubling for each retry after that
+
+    def __init__(self, base_url, auth_token, pool_size: int = 10):
         self.base_url = base_url
         self.headers = self.default_headers.copy()
         if auth_token:
             self.headers["Authorization"] = "Token " + auth_token
 
+        # sessions aren't thread-safe so each thread gets its own, but they all share an adapter so that connections to
+        # mailroom are pooled, kept alive and reused between requests
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            if self.base_url:
+                session.mount(self.base_url, self.adapter)
+            self._local.session = session
+        return session
+
     def version(self):
         return self._request("", post=False).get("version")
 
@@ -349,8 +417,27 @@ class MailroomClient:
         else:
             kwargs = dict(json=payload)
 
-        req_fn = requests.post if post else requests.get
-        response = req_fn("%s/mr/%s" % (self.base_url, endpoint), headers=headers, **kwargs)
+        req_fn = self.session.post if post else self.session.get
+        timeout = self.endpoint_timeouts.get(endpoint, self.default_timeout)
+        max_retries = self.max_retries if endpoint in self.idempotent_endpoints else 0
+        attempt = 0
+        start = time.perf_counter()
+
+        while True:
+            try:
+                response = req_fn("%s/mr/%s" % (self.base_url, endpoint), headers=headers, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= max_retries:
+                    self._record_request(endpoint, start, None, attempt)
+                    raise ConnectionException(endpoint, payload, e) from e
+            else:
+                if response.status_code not in self.retry_statuses or attempt >= max_retries:
+                    break
+
+            time.sleep(self.retry_backoff * (2**attempt))
+            attempt += 1
+
+        self._record_request(endpoint, start, response.status_code, attempt)
 
         if response.headers.get("Content-Type") == "application/json":
             resp_body = response.json()
@@ -374,3 +461,34 @@ class MailroomClient:
             raise RequestException(endpoint, payload, response)
 
         return resp_body
+
+    def _record_request(self, endpoint: str, start: float, status: int, retries: int):
+        elapsed = time.perf_counter() - start
+
+        logger.debug(f"mailroom request to {endpoint} returned {status} in {elapsed:.3f}s with {retries} retries")
+
+        post_mailroom_request.send(
+            sender=self.__class__, endpoint=endpoint, elapsed=elapsed, status=status, retries=retries
+        )
+
+
+class AsyncMailroomClient:
+    """
+    Asyncio variant of MailroomClient with the same methods as coroutines. Requests are made by the wrapped client in
+    worker threads, each with its own session over the client's shared connection pool, so several can be awaited
+    concurrently. Methods which return model instances query the database from the worker thread.
+    """
+
+    def __init__(self, client: MailroomClient):
+        self.client = client
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+        if name.startswith("_") or not callable(method):
+            raise AttributeError(name)
+
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+
+        return wrapper
@@ -20,6 +20,19 @@ class RequestException(Exception):
         return self.error
 
 
+class ConnectionException(RequestException):
+    """
+    Exception for requests to mailroom that fail to connect or time out. Mailroom may or may not have applied the
+    request.
+    """
+
+    def __init__(self, endpoint, request, cause: Exception):
+        self.endpoint = endpoint
+        self.request = request
+        self.response = None
+        self.error = str(cause)
+
+
 class FlowValidationException(Exception):
     """
     Request that fails because the provided flow definition is invalid.
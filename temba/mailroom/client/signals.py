@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# sent after each request to mailroom with the endpoint, elapsed seconds, response status (None if no response) and
+# number of retries, e.g. so that deployments can record latency metrics
+post_mailroom_request = Signal()
@@ -1,9 +1,13 @@
+import threading
 from datetime import datetime, timezone as tzone
 from decimal import Decimal
-from unittest.mock import patch
+from unittest.mock import call, patch
+
+import requests
 
 from django.test import override_settings
 
+from temba import mailroom
 from temba.schedules.models import Schedule
 from temba.tests import MockJsonResponse, MockResponse, TembaTest
 from temba.tickets.models import Topic
@@ -11,7 +15,14 @@ from temba.utils import json
 
 from .. import modifiers
 from .client import MailroomClient
-from .exceptions import FlowValidationException, QueryValidationException, RequestException, URNValidationException
+from .exceptions import (
+    ConnectionException,
+    FlowValidationException,
+    QueryValidationException,
+    RequestException,
+    URNValidationException,
+)
+from .signals import post_mailroom_request
 from .types import ContactSpec, Exclusions, Inclusions, RecipientsPreview, ScheduleSpec, URNResult
 
 
@@ -22,13 +33,13 @@ class MailroomClientTest(TembaTest):
         self.client = MailroomClient("http://localhost:8090", "sesame")
 
     def test_version(self):
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             mock_get.return_value = MockJsonResponse(200, {"version": "5.3.4"})
             version = self.client.version()
 
         self.assertEqual("5.3.4", version)
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_android_event(self, mock_post):
         mock_post.return_value = MockJsonResponse(200, {"id": 12345})
         response = self.client.android_event(
@@ -53,9 +64,10 @@ class MailroomClientTest(TembaTest):
                 "extra": {"duration": 45},
                 "occurred_on": "2024-04-01T16:28:30+00:00",
             },
+            timeout=(5, 30),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_android_message(self, mock_post):
         mock_post.return_value = MockJsonResponse(200, {"id": 12345})
         response = self.client.android_message(
@@ -78,9 +90,10 @@ class MailroomClientTest(TembaTest):
                 "text": "hello",
                 "received_on": "2024-04-01T16:28:30+00:00",
             },
+            timeout=(5, 30),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_android_sync(self, mock_post):
         mock_post.return_value = MockJsonResponse(200, {"id": 12345})
         response = self.client.android_sync(
@@ -95,9 +108,10 @@ class MailroomClientTest(TembaTest):
             json={
                 "channel_id": self.channel.id,
             },
+            timeout=(5, 30),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_contact_create(self, mock_post):
         ann = self.create_contact("Ann", urns=["tel:+12340000001"])
         bob = self.create_contact("Bob", urns=["tel:+12340000002"])
@@ -117,6 +131,7 @@ class MailroomClientTest(TembaTest):
                 "user_id": self.admin.id,
                 "contact": {"name": "", "language": "", "status": "", "urns": [], "fields": {}, "groups": []},
             },
+            timeout=(5, 30),
         )
 
         mock_post.reset_mock()
@@ -151,9 +166,10 @@ class MailroomClientTest(TembaTest):
                     "groups": ["d5b1770f-0fb6-423b-86a0-b4d51096b99a"],
                 },
             },
+            timeout=(5, 30),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_contact_deindex(self, mock_post):
         ann = self.create_contact("Ann", urns=["tel:+12340000001"])
         bob = self.create_contact("Bob", urns=["tel:+12340000002"])
@@ -166,9 +182,10 @@ class MailroomClientTest(TembaTest):
             "http://localhost:8090/mr/contact/deindex",
             headers={"User-Agent": "Temba", "Authorization": "Token sesame"},
             json={"org_id": self.org.id, "contact_ids": [ann.id, bob.id]},
+            timeout=(5, 120),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_contact_export(self, mock_post):
         group = self.create_group("Doctors", contacts=[])
         mock_post.return_value = MockJsonResponse(200, {"contact_ids": [123, 234]})
@@ -180,9 +197,10 @@ class MailroomClientTest(TembaTest):
             "http://localhost:8090/mr/contact/export",
             headers={"User-Agent": "Temba", "Authorization": "Token sesame"},
             json={"org_id": self.org.id, "group_id": group.id, "query": "age = 42"},
+            timeout=(5, 120),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_contact_export_preview(self, mock_post):
         group = self.create_group("Doctors", contacts=[])
         mock_post.return_value = MockJsonResponse(200, {"total": 123})
@@ -194,9 +212,10 @@ class MailroomClientTest(TembaTest):
             "http://localhost:8090/mr/contact/export_preview",
             headers={"User-Agent": "Temba", "Authorization": "Token sesame"},
             json={"org_id": self.org.id, "group_id": group.id, "query": "age = 42"},
+            timeout=(5, 30),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_contact_inspect(self, mock_post):
         ann = self.create_contact("Ann", urns=["tel:+12340000001"])
         bob = self.create_contact("Bob", urns=["tel:+12340000002"])
@@ -209,9 +228,10 @@ class MailroomClientTest(TembaTest):
             "http://localhost:8090/mr/contact/inspect",
             headers={"User-Agent": "Temba", "Authorization": "Token sesame"},
             json={"org_id": self.org.id, "contact_ids": [ann.id, bob.id]},
+            timeout=(5, 30),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_contact_interrupt(self, mock_post):
         ann = self.create_contact("Ann", urns=["tel:+12340000001"])
         mock_post.return_value = MockJsonResponse(200, {"sessions": 1})
@@ -223,9 +243,10 @@ class MailroomClientTest(TembaTest):
             "http://localhost:8090/mr/contact/interrupt",
             headers={"User-Agent": "Temba", "Authorization": "Token sesame"},
             json={"org_id": self.org.id, "user_id": self.admin.id, "contact_id": ann.id},
+            timeout=(5, 120),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_contact_modify(self, mock_post):
         ann = self.create_contact("Ann", urns=["tel:+12340000001"])
         mock_post.return_value = MockJsonResponse(
@@ -287,9 +308,10 @@ class MailroomClientTest(TembaTest):
                     {"type": "urns", "urns": ["+tel+1234567890"], "modification": "append"},
                 ],
             },
+            timeout=(5, 120),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_contact_parse_query(self, mock_post):
         mock_post.return_value = MockJsonResponse(
             200, {"query": 'name ~ "frank"', "metadata": {"attributes": ["name"]}}
@@ -302,6 +324,7 @@ class MailroomClientTest(TembaTest):
             "http://localhost:8090/mr/contact/parse_query",
             headers={"User-Agent": "Temba", "Authorization": "Token sesame"},
             json={"query": "frank", "org_id": self.org.id, "parse_only": False},
+            timeout=(5, 30),
         )
 
         mock_post.return_value = MockJsonResponse(400, {"error": "no such field age"})
@@ -309,7 +332,7 @@ class MailroomClientTest(TembaTest):
         with self.assertRaises(RequestException):
             self.client.contact_parse_query(self.org, "age > 10")
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_contact_search(self, mock_post):
         group = self.create_group("Doctors", contacts=[])
 
@@ -338,9 +361,10 @@ class MailroomClientTest(TembaTest):
                 "offset": 0,
                 "limit": 50,
             },
+            timeout=(5, 30),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_contact_urns(self, mock_post):
         mock_post.return_value = MockJsonResponse(
             200, {"urns": [{"normalized": "tel:+1234", "contact_id": 345}, {"normalized": "webchat:3a2ef3"}]}
@@ -355,12 +379,13 @@ class MailroomClientTest(TembaTest):
             "http://localhost:8090/mr/contact/urns",
             headers={"User-Agent": "Temba", "Authorization": "Token sesame"},
             json={"org_id": self.org.id, "urns": ["tel:+1234", "webchat:3a2ef3"]},
+            timeout=(5, 30),
         )
 
     def test_flow_change_language(self):
         flow_def = {"nodes": [{"val": Decimal("1.23")}]}
 
-        with patch("requests.post") as mock_post:
+        with patch("requests.Session.post") as mock_post:
             mock_post.return_value = MockJsonResponse(200, {"language": "spa"})
             migrated = self.client.flow_change_language(flow_def, language="spa")
 
@@ -379,7 +404,7 @@ class MailroomClientTest(TembaTest):
     def test_flow_inspect(self):
         flow_def = {"nodes": [{"val": Decimal("1.23")}]}
 
-        with patch("requests.post") as mock_post:
+        with patch("requests.Session.post") as mock_post:
             mock_post.return_value = MockJsonResponse(200, {"dependencies": []})
             info = self.client.flow_inspect(self.org, flow_def)
 
@@ -397,7 +422,7 @@ class MailroomClientTest(TembaTest):
     def test_flow_migrate(self):
         flow_def = {"nodes": [{"val": Decimal("1.23")}]}
 
-        with patch("requests.post") as mock_post:
+        with patch("requests.Session.post") as mock_post:
             mock_post.return_value = MockJsonResponse(200, {"name": "Migrated!"})
             migrated = self.client.flow_migrate(flow_def, to_version="13.1.0")
 
@@ -415,7 +440,7 @@ class MailroomClientTest(TembaTest):
     def test_flow_start_preview(self):
         flow = self.create_flow("Test Flow")
 
-        with patch("requests.post") as mock_post:
+        with patch("requests.Session.post") as mock_post:
             mock_resp = {"query": 'group = "Farmers" AND status = "active"', "total": 2345}
             mock_post.return_value = MockJsonResponse(200, mock_resp)
             preview = self.client.flow_start_preview(
@@ -448,9 +473,10 @@ class MailroomClientTest(TembaTest):
                     "not_seen_since_days": 30,
                 },
             },
+            timeout=(5, 30),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_msg_broadcast(self, mock_post):
         ann = self.create_contact("Ann", urns=["tel:+12340000001"])
         bob = self.create_contact("Bob", urns=["tel:+12340000002"])
@@ -503,9 +529,10 @@ class MailroomClientTest(TembaTest):
                 "template_variables": ["@contact"],
                 "schedule": {"start": "2024-06-20T16:23:30Z", "repeat_period": "D", "repeat_days_of_week": None},
             },
+            timeout=(5, 60),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_msg_broadcast_preview(self, mock_post):
         mock_resp = {"query": 'group = "Farmers" AND status = "active"', "total": 2345}
         mock_post.return_value = MockJsonResponse(200, mock_resp)
@@ -537,9 +564,10 @@ class MailroomClientTest(TembaTest):
                     "not_seen_since_days": 30,
                 },
             },
+            timeout=(5, 30),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_msg_handle(self, mock_post):
         ann = self.create_contact("Ann", urns=["tel:+12340000001"])
         msg1 = self.create_incoming_msg(ann, "Hi")
@@ -553,9 +581,10 @@ class MailroomClientTest(TembaTest):
             "http://localhost:8090/mr/msg/handle",
             headers={"User-Agent": "Temba", "Authorization": "Token sesame"},
             json={"org_id": self.org.id, "msg_ids": [msg1.id, msg2.id]},
+            timeout=(5, 120),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_msg_resend(self, mock_post):
         ann = self.create_contact("Ann", urns=["tel:+12340000001"])
         msg1 = self.create_outgoing_msg(ann, "Hi")
@@ -569,9 +598,10 @@ class MailroomClientTest(TembaTest):
             "http://localhost:8090/mr/msg/resend",
             headers={"User-Agent": "Temba", "Authorization": "Token sesame"},
             json={"org_id": self.org.id, "msg_ids": [msg1.id, msg2.id]},
+            timeout=(5, 120),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_msg_send(self, mock_post):
         ann = self.create_contact("Ann", urns=["tel:+12340000001"])
         ticket = self.create_ticket(ann)
@@ -592,9 +622,10 @@ class MailroomClientTest(TembaTest):
                 "quick_replies": [],
                 "ticket_id": ticket.id,
             },
+            timeout=(5, 30),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_org_deindex(self, mock_post):
         mock_post.return_value = MockJsonResponse(200, {})
         response = self.client.org_deindex(self.org)
@@ -605,13 +636,14 @@ class MailroomClientTest(TembaTest):
             "http://localhost:8090/mr/org/deindex",
             headers={"User-Agent": "Temba", "Authorization": "Token sesame"},
             json={"org_id": self.org.id},
+            timeout=(5, 120),
         )
 
     def test_po_export(self):
         flow1 = self.create_flow("Flow 1")
         flow2 = self.create_flow("Flow 2")
 
-        with patch("requests.post") as mock_post:
+        with patch("requests.Session.post") as mock_post:
             mock_post.return_value = MockResponse(200, 'msgid "Red"\nmsgstr "Rojo"\n\n')
             response = self.client.po_export(self.org, [flow1, flow2], "spa")
 
@@ -621,13 +653,14 @@ class MailroomClientTest(TembaTest):
             "http://localhost:8090/mr/po/export",
             headers={"User-Agent": "Temba", "Authorization": "Token sesame"},
             json={"org_id": self.org.id, "flow_ids": [flow1.id, flow2.id], "language": "spa"},
+            timeout=(5, 60),
         )
 
     def test_po_import(self):
         flow1 = self.create_flow("Flow 1")
         flow2 = self.create_flow("Flow 2")
 
-        with patch("requests.post") as mock_post:
+        with patch("requests.Session.post") as mock_post:
             mock_post.return_value = MockJsonResponse(200, {"flows": []})
             response = self.client.po_import(self.org, [flow1, flow2], "spa", b'msgid "Red"\nmsgstr "Rojo"\n\n')
 
@@ -638,9 +671,10 @@ class MailroomClientTest(TembaTest):
             headers={"User-Agent": "Temba", "Authorization": "Token sesame"},
             data={"org_id": self.org.id, "flow_ids": [flow1.id, flow2.id], "language": "spa"},
             files={"po": b'msgid "Red"\nmsgstr "Rojo"\n\n'},
+            timeout=(5, 60),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_ticket_assign(self, mock_post):
         ann = self.create_contact("Ann", urns=["tel:+12340000001"])
         bob = self.create_contact("Bob", urns=["tel:+12340000002"])
@@ -660,9 +694,10 @@ class MailroomClientTest(TembaTest):
                 "ticket_ids": [ticket1.id, ticket2.id],
                 "assignee_id": self.agent.id,
             },
+            timeout=(5, 120),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_ticket_add_note(self, mock_post):
         ann = self.create_contact("Ann", urns=["tel:+12340000001"])
         bob = self.create_contact("Bob", urns=["tel:+12340000002"])
@@ -682,9 +717,10 @@ class MailroomClientTest(TembaTest):
                 "ticket_ids": [ticket1.id, ticket2.id],
                 "note": "please handle",
             },
+            timeout=(5, 120),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_ticket_change_topic(self, mock_post):
         ann = self.create_contact("Ann", urns=["tel:+12340000001"])
         bob = self.create_contact("Bob", urns=["tel:+12340000002"])
@@ -705,9 +741,10 @@ class MailroomClientTest(TembaTest):
                 "ticket_ids": [ticket1.id, ticket2.id],
                 "topic_id": topic.id,
             },
+            timeout=(5, 120),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_ticket_close(self, mock_post):
         ann = self.create_contact("Ann", urns=["tel:+12340000001"])
         bob = self.create_contact("Bob", urns=["tel:+12340000002"])
@@ -722,9 +759,10 @@ class MailroomClientTest(TembaTest):
             "http://localhost:8090/mr/ticket/close",
             headers={"User-Agent": "Temba", "Authorization": "Token sesame"},
             json={"org_id": self.org.id, "user_id": self.admin.id, "ticket_ids": [ticket1.id, ticket2.id]},
+            timeout=(5, 120),
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_ticket_reopen(self, mock_post):
         ann = self.create_contact("Ann", urns=["tel:+12340000001"])
         bob = self.create_contact("Bob", urns=["tel:+12340000002"])
@@ -743,10 +781,12 @@ class MailroomClientTest(TembaTest):
                 "user_id": self.admin.id,
                 "ticket_ids": [ticket1.id, ticket2.id],
             },
+            timeout=(5, 120),
         )
 
-    @patch("requests.post")
-    def test_errors(self, mock_post):
+    @patch("time.sleep")
+    @patch("requests.Session.post")
+    def test_errors(self, mock_post, mock_sleep):
         group = self.create_group("Doctors", contacts=[])
 
         mock_post.return_value = MockJsonResponse(422, {"error": "node isn't valid", "code": "flow:invalid"})
@@ -793,12 +833,147 @@ class MailroomClientTest(TembaTest):
         self.assertEqual("error loading fields", e.exception.error)
 
         mock_post.return_value = MockResponse(502, "Bad Gateway")
+        mock_post.reset_mock()
 
         with self.assertRaises(RequestException) as e:
             self.client.contact_search(self.org, group, "age > 10", "-created_on")
 
         self.assertEqual("Bad Gateway", e.exception.error)
 
+        # searching is idempotent so was retried
+        self.assertEqual(3, mock_post.call_count)
+        self.assertEqual([call(0.2), call(0.4)], mock_sleep.call_args_list)
+
+    @patch("time.sleep")
+    @patch("requests.Session.post")
+    def test_retries(self, mock_post, mock_sleep):
+        group = self.create_group("Doctors", contacts=[])
+        requests_sent = []
+
+        def on_request(sender, **kwargs):
+            requests_sent.append(kwargs)
+
+        post_mailroom_request.connect(on_request)
+
+        # idempotent endpoints are retried on connection errors and gateway errors
+        mock_post.side_effect = [
+            requests.ConnectionError("no route to host"),
+            MockResponse(503, "Unavailable"),
+            MockJsonResponse(200, {"query": "", "total": 0, "contact_ids": []}),
+        ]
+
+        results = self.client.contact_search(self.org, group, "", "-created_on")
+
+        self.assertEqual(0, results.total)
+        self.assertEqual(3, mock_post.call_count)
+        self.assertEqual("contact/search", requests_sent[0]["endpoint"])
+        self.assertEqual(200, requests_sent[0]["status"])
+        self.assertEqual(2, requests_sent[0]["retries"])
+
+        # but other endpoints aren't
+        mock_post.reset_mock()
+        mock_post.side_effect = [requests.ConnectionError("no route to host")]
+
+        with self.assertRaises(ConnectionException) as e:
+            self.client.msg_resend(self.org, [])
+
+        self.assertEqual("msg/resend", e.exception.endpoint)
+        self.assertEqual("no route to host", str(e.exception))
+        self.assertIsNone(e.exception.response)
+
+        self.assertEqual(1, mock_post.call_count)
+        self.assertEqual("msg/resend", requests_sent[1]["endpoint"])
+        self.assertIsNone(requests_sent[1]["status"])
+        self.assertEqual(0, requests_sent[1]["retries"])
+
+        # timeouts are also raised as connection exceptions, which callers can handle like other request errors
+        mock_post.side_effect = [requests.ReadTimeout("read timed out")]
+
+        with self.assertRaises(RequestException):
+            self.client.ticket_close(self.org, self.admin, [])
+
+        post_mailroom_request.disconnect(on_request)
+
+    @patch("requests.Session.post")
+    def test_async_client(self, mock_post):
+        group = self.create_group("Doctors", contacts=[])
+
+        # both calls have to be in flight at the same time to get past the barrier
+        barrier = threading.Barrier(2, timeout=5)
+        sessions = set()
+
+        def respond(url, **kwargs):
+            sessions.add(mailroom.get_client().session)
+
+            if url.endswith("/contact/search"):
+                barrier.wait()
+                return MockJsonResponse(200, {"query": "age > 10", "total": 2, "contact_ids": [1, 2]})
+            elif url.endswith("/contact/parse_query"):
+                barrier.wait()
+                return MockJsonResponse(200, {"query": 'name ~ "bob"'})
+            raise QueryValidationException("invalid query", "syntax")
+
+        mock_post.side_effect = respond
+
+        client = mailroom.get_async_client()
+        self.assertIs(client.client, mailroom.get_client())
+
+        # calls can be run concurrently with results returned in order
+        results, parsed = mailroom.run_concurrently(
+            client.contact_search(self.org, group, "age > 10", "-created_on"),
+            client.contact_parse_query(self.org, "bob"),
+        )
+
+        self.assertEqual([1, 2], results.contact_ids)
+        self.assertEqual('name ~ "bob"', parsed.query)
+        self.assertEqual(2, mock_post.call_count)
+
+        # and each was made from its own thread with its own session
+        self.assertEqual(2, len(sessions))
+        self.assertNotIn(mailroom.get_client().session, sessions)
+
+        # errors are raised
+        with self.assertRaises(QueryValidationException):
+            mailroom.run_concurrently(client.contact_urns(self.org, ["tel:+1234"]))
+
+        # only public methods are exposed
+        with self.assertRaises(AttributeError):
+            client._request
+
+    def test_get_client(self):
+        # clients are shared so their connections can be reused
+        self.assertIs(mailroom.get_client(), mailroom.get_client())
+
+        with override_settings(MAILROOM_URL="http://mailroom2:8090"):
+            client = mailroom.get_client()
+            self.assertEqual("http://mailroom2:8090", client.base_url)
+
+        self.assertIsNot(client, mailroom.get_client())
+
+        # the client can be resolved from any thread, and each thread gets its own session over the shared pool
+        results = {}
+
+        def resolve(name):
+            results[name] = (mailroom.get_client(), mailroom.get_client().session)
+
+        with override_settings(MAILROOM_URL="http://mailroom2:8090"):
+            threads = [threading.Thread(target=resolve, args=(n,)) for n in ("t1", "t2")]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            client = mailroom.get_client()
+            session1, session2 = results["t1"][1], results["t2"][1]
+
+            self.assertIs(client, results["t1"][0])
+            self.assertIs(client, results["t2"][0])
+            self.assertIsNot(session1, session2)
+            self.assertIsNot(client.session, session1)
+            self.assertIs(client.session, client.session)
+            self.assertIs(client.adapter, session1.get_adapter("http://mailroom2:8090/mr/"))
+            self.assertIs(client.adapter, session2.get_adapter("http://mailroom2:8090/mr/"))
+
 
 class QueryExceptionTest(TembaTest):
     def test_str(self):
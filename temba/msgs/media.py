@@ -1,5 +1,8 @@
 import logging
 import os
+import shutil
+import time
+from contextlib import ExitStack, contextmanager
 from tempfile import NamedTemporaryFile
 
 import ffmpeg
@@ -10,27 +13,34 @@ from .models import Media
 
 logger = logging.getLogger(__name__)
 
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+
 
 def process_upload(media: Media):
     media_type, sub_type = media.content_type.split("/")
+    media.timings = {}
 
     try:
-        with public_file_storage.open(media.path, mode="rb") as stream:
-            # download the media from storage to a local temp file
-            with NamedTemporaryFile(suffix=os.path.basename(media.path), delete=True) as temp:
-                data = stream.read()
-                temp.write(data)
-                temp.flush()
-                temp.seek(0)
-
-                media.size = len(data)
-
-                if media_type == "image":
-                    _process_image_upload(media, sub_type, temp)
-                elif media_type == "audio":
-                    _process_audio_upload(media, sub_type, temp)
-                elif media_type == "video":
-                    _process_video_upload(media, sub_type, temp)
+        with _timed(media, "total"):
+            with public_file_storage.open(media.path, mode="rb") as stream:
+                # download the media from storage to a local temp file, in chunks so we never hold it all in memory
+                with NamedTemporaryFile(suffix=os.path.basename(media.path), delete=True) as temp:
+                    with _timed(media, "download"):
+                        shutil.copyfileobj(stream, temp, DOWNLOAD_CHUNK_SIZE)
+                        media.size = temp.tell()
+                        temp.flush()
+                        temp.seek(0)
+
+                    if media_type in ("image", "audio", "video"):
+                        with _timed(media, "probe"):
+                            streams = _get_streams(temp.name)
+
+                    if media_type == "image":
+                        _process_image_upload(media, sub_type, temp, streams)
+                    elif media_type == "audio":
+                        _process_audio_upload(media, sub_type, temp, streams)
+                    elif media_type == "video":
+                        _process_video_upload(media, sub_type, temp, streams)
 
         media.status = Media.STATUS_READY
     except Exception as e:
@@ -40,74 +50,76 @@ def process_upload(media: Media):
     media.save()
 
 
-def _process_image_upload(media: Media, sub_type: str, file):
-    stream_info = _get_stream_info(file.name, "v:0")
+def _process_image_upload(media: Media, sub_type: str, file, streams: dict):
+    stream_info = streams.get("video", {})
     media.width = stream_info.get("width", 0)
     media.height = stream_info.get("height", 0)
 
 
-def _process_audio_upload(media: Media, sub_type: str, file):
-    stream_info = _get_stream_info(file.name, "a:0")
+def _process_audio_upload(media: Media, sub_type: str, file, streams: dict):
+    stream_info = streams.get("audio", {})
     media.duration = int(float(stream_info.get("duration", 0)) * 1000)
 
+    alternates = []
     if sub_type != "mp3":
-        _create_alternate_audio(media, file, "audio/mp3", "mp3", codec="libmp3lame")
+        alternates.append(("audio/mp3", "mp3", {"acodec": "libmp3lame"}, {"duration": media.duration}))
     if sub_type != "mp4":
-        _create_alternate_audio(media, file, "audio/mp4", "m4a", codec="aac")
+        alternates.append(("audio/mp4", "m4a", {"acodec": "aac"}, {"duration": media.duration}))
+
+    _create_alternates(media, file, {}, alternates)
 
 
-def _process_video_upload(media: Media, sub_type: str, file):
-    stream_info = _get_stream_info(file.name, "v:0")
+def _process_video_upload(media: Media, sub_type: str, file, streams: dict):
+    stream_info = streams.get("video", {})
     media.duration = int(float(stream_info.get("duration", 0)) * 1000)
     media.width = stream_info.get("width", 0)
     media.height = stream_info.get("height", 0)
 
-    _create_video_thumbnail(media, file)
-
+    # thumbnail from the first frame
+    thumbnail = ("image/jpeg", "jpg", {"vframes": 1}, {"width": media.width, "height": media.height})
 
-def _create_alternate_audio(original: Media, file, new_content_type: str, new_extension: str, codec: str) -> str:
-    """
-    Creates a new audio version of the given audio media
-    """
+    _create_alternates(media, file, {"ss": "00:00:00"}, [thumbnail])
 
-    def transform(in_name, out_name):
-        ffmpeg.input(in_name).output(out_name, acodec=codec).overwrite_output().run()
 
-    return _create_alternate(original, file, transform, new_content_type, new_extension, duration=original.duration)
-
-
-def _create_video_thumbnail(original: Media, file) -> str:
+def _create_alternates(original: Media, file, input_args: dict, alternates: list) -> list[Media]:
     """
-    Creates a new thumbnail for the given video media
+    Creates new media instances by transforming an original into each of the given alternates, which are tuples of
+    content type, extension, ffmpeg output args and extra media fields. All alternates are generated by a single ffmpeg
+    invocation so the original is only decoded once.
     """
 
-    def transform(in_name, out_name):
-        ffmpeg.input(in_name, ss="00:00:00").output(out_name, vframes=1).overwrite_output().run()
+    if not alternates:
+        return []
 
-    return _create_alternate(
-        original, file, transform, "image/jpeg", "jpg", width=original.width, height=original.height
-    )
+    with ExitStack() as stack:
+        temps = [
+            stack.enter_context(NamedTemporaryFile(suffix="." + extension, delete=True))
+            for _, extension, _, _ in alternates
+        ]
 
+        with _timed(original, "transcode"):
+            source = ffmpeg.input(file.name, **input_args)
+            outputs = [source.output(temp.name, **args) for temp, (_, _, args, _) in zip(temps, alternates)]
+            ffmpeg.merge_outputs(*outputs).overwrite_output().run()
 
-def _create_alternate(original: Media, file, transform, new_content_type: str, new_extension: str, **kwargs) -> Media:
-    """
-    Creates a new media instance by transforming an original with an ffmpeg pipeline
-    """
+        with _timed(original, "store"):
+            return [
+                Media.create_alternate(
+                    original, _change_extension(original.filename, extension), content_type, temp, **kwargs
+                )
+                for temp, (content_type, extension, _, kwargs) in zip(temps, alternates)
+            ]
 
-    filename = _change_extension(original.filename, new_extension)
 
-    with NamedTemporaryFile(suffix="." + new_extension, delete=True) as temp:
-        transform(file.name, temp.name)
-
-        return Media.create_alternate(original, filename, new_content_type, temp, **kwargs)
-
-
-def _get_stream_info(filename: str, stream_id: str) -> dict:
+def _get_streams(filename: str) -> dict:
     """
-    Probes a file for a given stream type
+    Probes a file once for all its streams, returning the first stream of each type (audio, video) by type
     """
-    probe = ffmpeg.probe(filename, select_streams=stream_id)
-    return probe["streams"][0] if probe["streams"] else {}
+    probe = ffmpeg.probe(filename)
+    streams = {}
+    for stream in probe["streams"]:
+        streams.setdefault(stream.get("codec_type"), stream)
+    return streams
 
 
 def _change_extension(filename: str, extension: str) -> str:
@@ -115,3 +127,15 @@ def _change_extension(filename: str, extension: str) -> str:
     Changes the extension of a filename
     """
     return os.path.splitext(filename)[0] + "." + extension
+
+
+@contextmanager
+def _timed(media: Media, step: str):
+    """
+    Records how long the wrapped processing step takes in milliseconds
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        media.timings[step] = int((time.perf_counter() - start) * 1000)
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2025-01-20 15:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("msgs", "0285_delete_systemlabelcount"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="media",
+            name="timings",
+            field=models.JSONField(null=True),
+        ),
+    ]
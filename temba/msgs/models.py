@@ -3,8 +3,8 @@ import logging
 import mimetypes
 import os
 import re
-from array import array
 from dataclasses import dataclass
+from datetime import date, timezone as tzone
 from enum import Enum
 from fnmatch import fnmatch
 from urllib.parse import unquote, urlparse
@@ -23,11 +23,10 @@ from django.utils.translation import gettext_lazy as _
 from temba import mailroom
 from temba.channels.models import Channel, ChannelLog
 from temba.contacts.models import Contact, ContactGroup, ContactURN
-from temba.orgs.models import DependencyMixin, Export, ExportType, Org
+from temba.orgs.models import DependencyMixin, Export, ExportType, ItemCount, Org
 from temba.schedules.models import Schedule
-from temba.utils import languages, on_transaction_commit
-from temba.utils.export.models import MultiSheetExporter
-from temba.utils.models import JSONAsTextField, TembaModel
+from temba.utils import languages, on_transaction_commit, s3
+from temba.utils.models import JSONAsTextField, TembaModel, iter_keyset_batches
 from temba.utils.models.counts import BaseSquashableCount
 from temba.utils.s3 import public_file_storage
 from temba.utils.uuid import uuid4
@@ -71,6 +70,7 @@ class Media(models.Model):
     duration = models.IntegerField(default=0)  # milliseconds
     width = models.IntegerField(default=0)  # pixels
     height = models.IntegerField(default=0)  # pixels
+    timings = models.JSONField(null=True)  # milliseconds taken by each processing step
 
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT)
     created_on = models.DateTimeField(default=timezone.now)
@@ -162,6 +162,18 @@ class Media(models.Model):
     def filename(self) -> str:
         return os.path.basename(self.path)
 
+    @classmethod
+    def bulk_delete(cls, media):
+        """
+        Deletes the given media, and any alternates of them, along with their files in storage
+        """
+        media = list(media)
+        media += list(cls.objects.filter(original__in=media).exclude(id__in=[m.id for m in media]))
+
+        s3.delete_files(public_file_storage, [m.path for m in media])
+
+        cls.objects.filter(id__in=[m.id for m in media]).delete()
+
     def process_upload(self):
         from .media import process_upload
 
@@ -403,10 +415,12 @@ class Attachment:
         return [cls.parse(s) for s in attachments] if attachments else []
 
     @classmethod
-    def bulk_delete(cls, attachments):
-        for att in attachments:
-            parsed = urlparse(att.url)
-            default_storage.delete(unquote(parsed.path))
+    def bulk_delete(cls, attachments) -> tuple[int, list]:
+        """
+        Deletes the files of the given attachments from storage, returning the number deleted and the paths which
+        couldn't be deleted
+        """
+        return s3.delete_files(default_storage, [unquote(urlparse(att.url).path) for att in attachments])
 
     def as_json(self):
         return {"content_type": self.content_type, "url": self.url}
@@ -899,7 +913,7 @@ class SystemLabel:
 
     @classmethod
     def get_counts(cls, org):
-        counts = org.counts.prefix("msgs:folder:").scope_totals()
+        counts = ItemCount.get_scope_totals(org, "msgs:folder:")
         return {lb: counts.get(f"msgs:folder:{lb}", 0) for lb, n in cls.TYPE_CHOICES}
 
     @classmethod
@@ -990,6 +1004,7 @@ class Label(TembaModel, DependencyMixin):
         Msg.labels.through.objects.filter(label=self).delete()
 
         self.counts.all().delete()
+        LabelCount.clear_cached_totals([self.id])
 
         self.name = self._deleted_name()
         self.is_active = False
@@ -1018,13 +1033,8 @@ class LabelCount(BaseSquashableCount):
         """
         Gets total counts for all the given labels
         """
-        counts = (
-            cls.objects.filter(label__in=labels, is_archived=False)
-            .values_list("label_id")
-            .annotate(count_sum=Sum("count"))
-        )
-        counts_by_label_id = {c[0]: c[1] for c in counts}
-        return {lb: counts_by_label_id.get(lb.id, 0) for lb in labels}
+        totals = cls.get_cached_totals([lb.id for lb in labels])
+        return {lb: totals[lb.id].get("False", 0) for lb in labels}
 
 
 class OptIn(TembaModel):
@@ -1049,41 +1059,6 @@ class OptIn(TembaModel):
         constraints = [models.UniqueConstraint("org", Lower("name"), name="unique_optin_names")]
 
 
-class MsgIterator:
-    """
-    Queryset wrapper to chunk queries and reduce in-memory footprint
-    """
-
-    def __init__(self, ids, order_by=None, select_related=None, prefetch_related=None, max_obj_num=1000):
-        self._ids = ids
-        self._order_by = order_by
-        self._select_related = select_related
-        self._prefetch_related = prefetch_related
-        self._generator = self._setup()
-        self.max_obj_num = max_obj_num
-
-    def _setup(self):
-        for i in range(0, len(self._ids), self.max_obj_num):
-            chunk_queryset = Msg.objects.filter(id__in=self._ids[i : i + self.max_obj_num])
-
-            if self._order_by:
-                chunk_queryset = chunk_queryset.order_by(*self._order_by)
-
-            if self._select_related:
-                chunk_queryset = chunk_queryset.select_related(*self._select_related)
-
-            if self._prefetch_related:
-                chunk_queryset = chunk_queryset.prefetch_related(*self._prefetch_related)
-
-            yield chunk_queryset
-
-    def __iter__(self):
-        return self
-
-    def __next__(self):
-        return next(self._generator)
-
-
 class MessageExport(ExportType):
     """
     Export of messages
@@ -1093,9 +1068,21 @@ class MessageExport(ExportType):
     name = _("Messages")
     download_prefix = "messages"
     download_template = "msgs/export_download.html"
+    formats = (Export.FORMAT_XLSX, Export.FORMAT_CSV, Export.FORMAT_JSONL)
 
     @classmethod
-    def create(cls, org, user, start_date, end_date, system_label=None, label=None, with_fields=(), with_groups=()):
+    def create(
+        cls,
+        org,
+        user,
+        start_date,
+        end_date,
+        system_label=None,
+        label=None,
+        with_fields=(),
+        with_groups=(),
+        format=Export.FORMAT_XLSX,
+    ):
         export = Export.objects.create(
             org=org,
             export_type=cls.slug,
@@ -1106,6 +1093,7 @@ class MessageExport(ExportType):
                 "label_uuid": str(label.uuid) if label else None,
                 "with_fields": [f.id for f in with_fields],
                 "with_groups": [g.id for g in with_groups],
+                "format": format,
             },
             created_by=user,
         )
@@ -1124,24 +1112,21 @@ class MessageExport(ExportType):
         start_date, end_date = export.get_date_range()
 
         # create our exporter
-        exporter = MultiSheetExporter(
+        exporter = export.create_exporter(
             "Messages",
             ["Date"]
             + export.get_contact_headers()
             + ["Flow", "Direction", "Text", "Attachments", "Status", "Channel", "Labels"],
-            export.org.timezone,
         )
-        num_records = 0
         logger.info(f"starting msgs export #{export.id} for org #{export.org.id}")
 
-        for batch in self._get_msg_batches(export, system_label, label, start_date, end_date):
-            self._write_msgs(export, exporter, batch)
-
-            num_records += len(batch)
-
-            # update modified_on so we can see if an export hangs
-            export.modified_on = timezone.now()
-            export.save(update_fields=("modified_on",))
+        num_records = self._write_batches(
+            export,
+            exporter,
+            self._get_msg_batches(export, system_label, label, start_date, end_date),
+            enrich=lambda msgs: self._get_contacts(export, msgs),
+            serialize=lambda batch: self._get_rows(export, *batch),
+        )
 
         return *exporter.save_file(), num_records
 
@@ -1149,26 +1134,68 @@ class MessageExport(ExportType):
         from temba.archives.models import Archive
         from temba.flows.models import Flow
 
-        # firstly get msgs from archives
-        if system_label:
-            where = SystemLabel.get_archive_query(system_label)
-        elif label:
-            where = {"visibility": "visible", "__raw__": f"'{label.uuid}' IN s.labels[*].uuid"}
-        else:
-            where = {"visibility": "visible"}
+        # if we're resuming, continue from the position of the last checkpoint
+        position = export.get_checkpoint() or {}
+        archived_until = date.fromisoformat(position["archived_until"]) if position.get("archived_until") else None
+        last_created_on = iso8601.parse_date(position["last_created_on"]) if position.get("last_created_on") else None
+        after = position.get("after")
+
+        def get_position() -> dict:
+            return {
+                "archived_until": archived_until.isoformat() if archived_until else None,
+                "last_created_on": last_created_on.isoformat() if last_created_on else None,
+                "after": after,
+            }
+
+        # firstly get msgs from archives, unless we're resuming and already got past them
+        if not after:
+            if system_label:
+                where = SystemLabel.get_archive_query(system_label)
+            elif label:
+                where = {"visibility": "visible", "labels__uuid__any": str(label.uuid)}
+            else:
+                where = {"visibility": "visible"}
+
+            archives = Archive.iter_archive_records(
+                export.org,
+                Archive.TYPE_MSG,
+                start_date,
+                end_date,
+                where=where,
+                prefetch=self.archive_prefetch,
+                ending_after=archived_until,
+            )
+            resumed_until = archived_until
+
+            for archive, records in archives:
+                # if archives we already exported have since been rolled up, skip the records we've already written
+                skip_before = resumed_until if resumed_until and archive.start_date < resumed_until else None
 
-        records = Archive.iter_all_records(export.org, Archive.TYPE_MSG, start_date, end_date, where=where)
-        last_created_on = None
+                batches = itertools.batched(records, 1000)
+                record_batch = next(batches, None)
 
-        for record_batch in itertools.batched(records, 1000):
-            matching = []
-            for record in record_batch:
-                created_on = iso8601.parse_date(record["created_on"])
-                if last_created_on is None or last_created_on < created_on:
-                    last_created_on = created_on
+                while record_batch is not None:
+                    next_batch = next(batches, None)
 
-                matching.append(record)
-            yield matching
+                    matching = []
+                    for record in record_batch:
+                        created_on = iso8601.parse_date(record["created_on"])
+                        if skip_before and created_on.astimezone(tzone.utc).date() < skip_before:
+                            continue
+
+                        if last_created_on is None or last_created_on < created_on:
+                            last_created_on = created_on
+
+                        matching.append(record)
+
+                    # can only checkpoint once we've written an entire archive
+                    if next_batch is None:
+                        archived_until = archive.get_end_date()
+                        yield matching, get_position()
+                    else:
+                        yield matching, None
+
+                    record_batch = next_batch
 
         if system_label:
             messages = SystemLabel.get_queryset(export.org, system_label)
@@ -1179,27 +1206,28 @@ class MessageExport(ExportType):
 
         messages = messages.filter(created_on__gte=start_date, created_on__lte=end_date)
 
-        messages = messages.order_by("created_on").using("readonly")
+        messages = messages.using("readonly")
         if last_created_on:
             messages = messages.filter(created_on__gt=last_created_on)
 
-        all_message_ids = array(str("l"), messages.values_list("id", flat=True))
+        messages = messages.select_related("channel", "contact_urn").prefetch_related(
+            Prefetch("contact", queryset=Contact.objects.only("uuid", "name")),
+            Prefetch("flow", queryset=Flow.objects.only("uuid", "name")),
+            Prefetch("labels", queryset=Label.objects.only("uuid", "name").order_by("name")),
+        )
+
+        keyset_after = (iso8601.parse_date(after[0]), after[1]) if after else None
+
+        for msg_batch in iter_keyset_batches(messages, keys=("created_on", "id"), after=keyset_after):
+            after = [msg_batch[-1].created_on.isoformat(), msg_batch[-1].id]
 
-        for msg_batch in MsgIterator(
-            all_message_ids,
-            order_by=("created_on",),
-            select_related=("channel", "contact_urn"),
-            prefetch_related=(
-                Prefetch("contact", queryset=Contact.objects.only("uuid", "name")),
-                Prefetch("flow", queryset=Flow.objects.only("uuid", "name")),
-                Prefetch("labels", queryset=Label.objects.only("uuid", "name").order_by("name")),
-            ),
-        ):
             # convert this batch of msgs to same format as records in our archives
-            yield [msg.as_archive_json() for msg in msg_batch]
+            yield [msg.as_archive_json() for msg in msg_batch], get_position()
 
-    def _write_msgs(self, export, exporter, msgs):
-        # get all the contacts referenced in this batch
+    def _get_contacts(self, export, msgs) -> tuple:
+        """
+        Looks up all the contacts referenced in a batch of messages
+        """
         contact_uuids = {m["contact"]["uuid"] for m in msgs}
         contacts = (
             Contact.objects.filter(org=export.org, uuid__in=contact_uuids)
@@ -1207,13 +1235,16 @@ class MessageExport(ExportType):
             .prefetch_related("groups")
             .using("readonly")
         )
-        contacts_by_uuid = {str(c.uuid): c for c in contacts}
+        return msgs, {str(c.uuid): c for c in contacts}
+
+    def _get_rows(self, export, msgs, contacts_by_uuid) -> list:
+        rows = []
 
         for msg in msgs:
             contact = contacts_by_uuid.get(msg["contact"]["uuid"])
             flow = msg.get("flow")
 
-            exporter.write_row(
+            rows.append(
                 [iso8601.parse_date(msg["created_on"])]
                 + export.get_contact_columns(contact, urn=msg["urn"])
                 + [
@@ -1224,9 +1255,11 @@ class MessageExport(ExportType):
                     msg["status"],
                     msg["channel"]["name"] if msg["channel"] else "",
                     ", ".join(msg_label["name"] for msg_label in msg["labels"]),
-                ],
+                ]
             )
 
+        return rows
+
     def get_download_context(self, export) -> dict:
         system_label, label = self.get_folder(export)
         return {"label": label} if label else {}
@@ -32,8 +32,7 @@ def fail_old_android_messages():
 
 @cron_task(lock_timeout=7200)
 def squash_msg_counts():
-    LabelCount.squash()
-    BroadcastMsgCount.squash()
+    return {"labels": LabelCount.squash(), "broadcasts": BroadcastMsgCount.squash()}
 
 
 @shared_task
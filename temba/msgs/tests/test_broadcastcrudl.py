@@ -546,7 +546,7 @@ class BroadcastCRUDLTest(TembaTest, CRUDLTestMixin):
             ],
             response.json()["blockers"],
         )
-        self.org.counts.prefix("msgs:folder:").delete()
+        self.org.counts.create(scope=f"msgs:folder:{SystemLabel.TYPE_OUTBOX}", count=-1_000_001)
 
         # if we release our send channel we can't send a broadcast
         self.channel.release(self.admin)
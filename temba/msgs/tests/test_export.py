@@ -101,7 +101,7 @@ class MessageExportTest(TembaTest):
             [m.as_archive_json() for m in (msg1, msg2, msg3, msg4, msg5, msg6)],
         )
 
-        with patch("django.core.files.storage.default_storage.delete"):
+        with patch("temba.utils.s3.delete_files"):
             msg2.delete()
             msg3.delete()
             msg4.delete()
@@ -114,7 +114,7 @@ class MessageExportTest(TembaTest):
         msg7.delete()
 
         # export all visible messages (i.e. not msg3) using export_all param
-        with self.assertNumQueries(18):
+        with self.assertNumQueries(17):
             workbook = self._export(None, None, date(2000, 9, 1), date(2022, 9, 1))
 
         expected_headers = [
@@ -439,7 +439,7 @@ class MessageExportTest(TembaTest):
         ]
 
         # export all visible messages (i.e. not msg3) using export_all param
-        with self.assertNumQueries(16):
+        with self.assertNumQueries(15):
             self.assertExcelSheet(
                 self._export(None, None, date(2000, 9, 1), date(2022, 9, 28)).worksheets[0],
                 [
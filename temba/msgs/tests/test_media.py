@@ -58,6 +58,7 @@ class MediaTest(TembaTest):
         self.assertEqual(480, media.width)
         self.assertEqual(360, media.height)
         self.assertEqual(Media.STATUS_READY, media.status)
+        self.assertEqual({"download", "probe", "total"}, set(media.timings.keys()))
 
     @mock_uuids
     def test_process_audio_wav(self):
@@ -71,6 +72,7 @@ class MediaTest(TembaTest):
         self.assertEqual(0, media.width)
         self.assertEqual(0, media.height)
         self.assertEqual(Media.STATUS_READY, media.status)
+        self.assertEqual({"download", "probe", "transcode", "store", "total"}, set(media.timings.keys()))
 
         alt1, alt2 = list(media.alternates.order_by("id"))
 
@@ -165,3 +167,4 @@ class MediaTest(TembaTest):
 
         self.assertEqual(9635, media.size)
         self.assertEqual(Media.STATUS_FAILED, media.status)
+        self.assertEqual({"download", "probe", "total"}, set(media.timings.keys()))
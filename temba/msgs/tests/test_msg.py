@@ -1,6 +1,7 @@
 from datetime import timedelta
 from unittest.mock import patch
 
+from django.core.files.storage import default_storage
 from django.utils import timezone
 
 from temba.channels.models import ChannelLog
@@ -93,8 +94,8 @@ class MsgTest(TembaTest, CRUDLTestMixin):
             msg2.as_archive_json(),
         )
 
-    @patch("django.core.files.storage.default_storage.delete")
-    def test_bulk_soft_delete(self, mock_storage_delete):
+    @patch("temba.utils.s3.delete_files")
+    def test_bulk_soft_delete(self, mock_delete_files):
         # create some messages
         msg1 = self.create_incoming_msg(
             self.joe,
@@ -121,11 +122,12 @@ class MsgTest(TembaTest, CRUDLTestMixin):
             self.assertEqual([], msg.attachments)
             self.assertEqual(Msg.VISIBILITY_DELETED_BY_USER, msg1.visibility)
 
-        mock_storage_delete.assert_any_call("/attachments/1/a/b.jpg")
-        mock_storage_delete.assert_any_call("/attachments/1/c/d e.jpg")
+        mock_delete_files.assert_called_once_with(
+            default_storage, ["/attachments/1/a/b.jpg", "/attachments/1/c/d e.jpg"]
+        )
 
-    @patch("django.core.files.storage.default_storage.delete")
-    def test_bulk_delete(self, mock_storage_delete):
+    @patch("temba.utils.s3.delete_files")
+    def test_bulk_delete(self, mock_delete_files):
         # create some messages
         msg1 = self.create_incoming_msg(
             self.joe,
@@ -142,8 +144,9 @@ class MsgTest(TembaTest, CRUDLTestMixin):
 
         self.assertEqual(1, Msg.objects.all().count())
 
-        mock_storage_delete.assert_any_call("/attachments/1/a/b.jpg")
-        mock_storage_delete.assert_any_call("/attachments/1/c/d e.jpg")
+        mock_delete_files.assert_called_once_with(
+            default_storage, ["/attachments/1/a/b.jpg", "/attachments/1/c/d e.jpg"]
+        )
 
     def test_archive_and_release(self):
         msg1 = self.create_incoming_msg(self.joe, "Incoming")
@@ -400,7 +400,13 @@ class MsgCRUDLTest(TembaTest, CRUDLTestMixin):
         self.assertEqual(date(2022, 6, 28), export.start_date)
         self.assertEqual(date(2022, 9, 28), export.end_date)
         self.assertEqual(
-            {"with_groups": [testers.id], "with_fields": [gender.id], "label_uuid": None, "system_label": "I"},
+            {
+                "with_groups": [testers.id],
+                "with_fields": [gender.id],
+                "label_uuid": None,
+                "system_label": "I",
+                "format": "xlsx",
+            },
             export.config,
         )
 
@@ -424,6 +430,7 @@ class MsgCRUDLTest(TembaTest, CRUDLTestMixin):
                 "with_fields": [gender.id],
                 "label_uuid": str(label.uuid),
                 "system_label": None,
+                "format": "xlsx",
             },
             export.config,
         )
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orgs", "0169_delete_usersettings"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="export",
+            name="timings",
+            field=models.JSONField(null=True),
+        ),
+    ]
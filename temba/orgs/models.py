@@ -1,3 +1,4 @@
+import contextlib
 import itertools
 import logging
 import os
@@ -14,6 +15,7 @@ import pycountry
 import pytz
 from django_redis import get_redis_connection
 from packaging.version import Version
+from redis.exceptions import LockError
 from smartmin.models import SmartModel
 from timezone_field import TimeZoneField
 
@@ -26,6 +28,8 @@ from django.core.files import File
 from django.core.files.storage import default_storage
 from django.db import models, transaction
 from django.db.models import Count, Prefetch, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.encoding import force_str
 from django.utils.functional import cached_property
@@ -36,9 +40,10 @@ from temba import mailroom
 from temba.archives.models import Archive
 from temba.locations.models import AdminBoundary
 from temba.users.models import User
-from temba.utils import json, languages, on_transaction_commit
+from temba.utils import json, languages, on_transaction_commit, s3
 from temba.utils.dates import datetime_to_str
 from temba.utils.email import EmailSender
+from temba.utils.export import CSVExporter, JSONLExporter, MultiSheetExporter, Pipeline, StreamingExporter
 from temba.utils.models import JSONField, TembaUUIDMixin, delete_in_batches
 from temba.utils.models.counts import BaseScopedCount
 from temba.utils.text import generate_secret
@@ -240,6 +245,9 @@ class Org(SmartModel):
     EARLIEST_IMPORT_VERSION = "3"
     CURRENT_EXPORT_VERSION = "13"
 
+    ASSETS_VERSION_KEY = "org_assets_version:{org_id}"
+    ASSETS_VERSION_TTL = 60 * 60 * 24  # must outlive anything cached against an assets version
+
     FEATURE_USERS = "users"  # can invite users to this org
     FEATURE_NEW_ORGS = "new_orgs"  # can create new workspace with same login
     FEATURE_CHILD_ORGS = "child_orgs"  # can create child workspaces of this org
@@ -556,9 +564,14 @@ class Org(SmartModel):
         for campaign in new_campaigns:
             campaign.schedule_events_async()
 
-        # with all the flows and dependencies committed, we can now have mailroom do full validation
-        for flow in new_flows:
-            flow_info = mailroom.get_client().flow_inspect(self, flow.get_definition())
+        # with all the flows and dependencies committed, we can now have mailroom do full validation, inspecting the
+        # flows concurrently as they're independent of each other
+        client = mailroom.get_async_client()
+        flow_infos = mailroom.run_concurrently(
+            *[client.flow_inspect(self, flow.get_definition()) for flow in new_flows]
+        )
+
+        for flow, flow_info in zip(new_flows, flow_infos):
             flow.has_issues = len(flow_info[Flow.INSPECT_ISSUES]) > 0
             flow.save(update_fields=("has_issues",))
 
@@ -932,7 +945,6 @@ class Org(SmartModel):
         Generates a dict of all exportable flows and campaigns for this org with each object's immediate dependencies
         """
         from temba.campaigns.models import Campaign, CampaignEvent
-        from temba.contacts.models import ContactField, ContactGroup
         from temba.flows.models import Flow
 
         campaign_prefetches = (
@@ -957,30 +969,41 @@ class Org(SmartModel):
             all_flows = all_flows.filter(is_archived=False)
             all_campaigns = all_campaigns.filter(is_archived=False)
 
+        # load the flow and group dependencies of all flows in bulk from the dependency tables that are maintained
+        # when flows are saved, rather than querying them flow by flow
+        flows_by_id = {f.id: f for f in all_flows}
+        flow_deps = list(
+            Flow.flow_dependencies.through.objects.filter(from_flow__in=all_flows).values_list(
+                "from_flow_id", "to_flow_id"
+            )
+        )
+        group_deps = list(
+            Flow.group_dependencies.through.objects.filter(flow__in=all_flows).values_list("flow_id", "contactgroup_id")
+        )
+
+        # dependencies can be flows which aren't exportable themselves, e.g. archived flows
+        other_flow_ids = {to_id for _, to_id in flow_deps}.difference(flows_by_id)
+        if other_flow_ids:
+            flows_by_id.update({f.id: f for f in Flow.objects.filter(id__in=other_flow_ids)})
+
+        # we're not actually interested in flow-group-flow relationships - only relationships that go through a
+        # campaign, so any dependency on a group is replaced with that group's associated campaigns
+        campaigns_by_group = defaultdict(list)
+        if include_campaigns:
+            for campaign in self.campaigns.filter(is_active=True).select_related("group"):
+                campaigns_by_group[campaign.group_id].append(campaign)
+
         # build dependency graph for all flows and campaigns
         dependencies = defaultdict(set)
         for flow in all_flows:
-            dependencies[flow] = flow.get_export_dependencies()
+            dependencies[flow] = set()
+        for flow_id, dep_id in flow_deps:
+            dependencies[flows_by_id[flow_id]].add(flows_by_id[dep_id])
+        for flow_id, group_id in group_deps:
+            dependencies[flows_by_id[flow_id]].update(campaigns_by_group[group_id])
         for campaign in all_campaigns:
             dependencies[campaign] = set([e.flow for e in campaign.flow_events])
 
-        # replace any dependency on a group with that group's associated campaigns - we're not actually interested
-        # in flow-group-flow relationships - only relationships that go through a campaign
-        campaigns_by_group = defaultdict(list)
-        if include_campaigns:
-            for campaign in self.campaigns.filter(is_active=True).select_related("group"):
-                campaigns_by_group[campaign.group].append(campaign)
-
-        for c, deps in dependencies.items():
-            if isinstance(c, Flow):
-                for d in list(deps):
-                    # not interested in groups or fields for now
-                    if isinstance(d, ContactField):
-                        deps.remove(d)
-                    if isinstance(d, ContactGroup):
-                        deps.remove(d)
-                        deps.update(campaigns_by_group[d])
-
         if include_triggers:
             all_triggers = self.triggers.filter(is_archived=False, is_active=True).select_related("flow")
             for trigger in all_triggers:
@@ -1003,23 +1026,17 @@ class Org(SmartModel):
             include_campaigns=include_campaigns, include_triggers=include_triggers, include_archived=include_archived
         )
 
-        primary_components = set(itertools.chain(flows, campaigns))
+        # walk the graph from each of the given components, without recursion as chains of flows can be long
         all_components = set()
+        to_visit = list(itertools.chain(flows, campaigns))
 
-        def add_component(c):
-            if c in all_components:
-                return
-
-            all_components.add(c)
-            if c in primary_components:
-                primary_components.remove(c)
-
-            for d in dependencies[c]:
-                add_component(d)
+        while to_visit:
+            component = to_visit.pop()
+            if component in all_components:
+                continue
 
-        while primary_components:
-            component = next(iter(primary_components))
-            add_component(component)
+            all_components.add(component)
+            to_visit.extend(dependencies[component])
 
         return all_components
 
@@ -1083,20 +1100,68 @@ class Org(SmartModel):
         for org_user in self.users.all():
             self.remove_user(org_user)
 
-    def delete(self) -> dict:
+    def delete(self, *, time_limit: timedelta = None) -> dict:
         """
-        Does an actual delete of this org, returning counts of what was deleted.
+        Does an actual delete of this org, returning counts of what was deleted. Data is deleted in steps, in dependency
+        order, with progress saved to the org's config so that an interrupted deletion resumes where it stopped. If a
+        time limit is given, deletion stops once it's exceeded, leaving the org to be deleted further by another call.
         """
 
-        from temba.msgs.models import Msg
-
         assert not self.is_active and self.released_on, "can't delete org which hasn't been released"
         assert self.released_on < timezone.now() - timedelta(days=7), "can't delete org which was released recently"
         assert not self.deleted_on, "can't delete org twice"
 
         user = self.modified_by
-        counts = defaultdict(int)
+        deadline = timezone.now() + time_limit if time_limit is not None else None
+        progress = self.config.get("deletion", {})
+        completed = progress.get("completed", [])
+        counts = defaultdict(int, progress.get("counts", {}))
+
+        def checkpoint() -> bool:
+            """
+            Saves deletion progress, returning whether we have time to continue
+            """
+            self.config["deletion"] = {"completed": completed, "counts": counts}
+            self.save(update_fields=("config",))
+
+            return not deadline or timezone.now() < deadline
+
+        steps = (
+            ("misc", self._delete_misc),
+            ("messages", self._delete_messages),
+            ("campaigns", self._delete_campaigns),
+            ("runs", self._delete_runs),
+            ("tickets", self._delete_tickets),
+            ("contacts", self._delete_contacts),
+            ("assets", self._delete_assets),
+            ("other", self._delete_other),
+        )
+
+        for name, step in steps:
+            if name in completed:
+                continue
+
+            # steps which delete in batches return false if they ran out of time before finishing
+            if step(user, counts, checkpoint) is False:
+                return counts
+
+            completed.append(name)
+
+            if not checkpoint():
+                return counts
+
+        # now that contacts are no longer in the database, we can start de-indexing them from search
+        mailroom.get_client().org_deindex(self)
+
+        # save when we were actually deleted
+        self.modified_on = timezone.now()
+        self.deleted_on = timezone.now()
+        self.config = {}
+        self.save()
 
+        return counts
+
+    def _delete_misc(self, user, counts, checkpoint):
         delete_in_batches(self.notifications.all())
         delete_in_batches(self.incidents.all())
         delete_in_batches(self.invitations.all())
@@ -1112,13 +1177,21 @@ class Org(SmartModel):
             label.release(user)
             label.delete()
 
+    def _delete_messages(self, user, counts, checkpoint) -> bool:
+        from temba.msgs.models import Msg
+
         while True:
             msg_batch = list(self.msgs.all()[:1000])
             if not msg_batch:
-                break
+                return True
+
             Msg.bulk_delete(msg_batch)
             counts["messages"] += len(msg_batch)
 
+            if not checkpoint():
+                return False
+
+    def _delete_campaigns(self, user, counts, checkpoint):
         # delete all our campaigns and associated events
         for c in self.campaigns.all():
             c.delete()
@@ -1128,9 +1201,15 @@ class Org(SmartModel):
         for flow in self.flows.all():
             flow.release(user, interrupt_sessions=False)
 
-        # delete runs and keep the count
-        counts["runs"] = delete_in_batches(self.runs.all())
+    def _delete_runs(self, user, counts, checkpoint) -> bool:
+        def pre_delete(run_ids):
+            counts["runs"] += len(run_ids)
+
+        delete_in_batches(self.runs.all(), pre_delete=pre_delete, post_delete=checkpoint)
 
+        return not self.runs.exists()
+
+    def _delete_tickets(self, user, counts, checkpoint):
         # delete contact-related data
         delete_in_batches(self.http_logs.all())
         delete_in_batches(self.ticket_events.all())
@@ -1139,15 +1218,35 @@ class Org(SmartModel):
         delete_in_batches(self.teams.all())
         delete_in_batches(self.airtime_transfers.all())
 
-        # delete our contacts
-        for contact in self.contacts.all():
-            # release synchronously and don't deindex as that will happen for the whole org
-            contact.release(user, immediately=True, deindex=False)
-            contact.delete()
-            counts["contacts"] += 1
+    def _delete_contacts(self, user, counts, checkpoint) -> bool:
+        """
+        Deletes contacts in batches, with the data they own deleted by set-based deletes over each batch. Messages,
+        runs and tickets have already been deleted for the whole org.
+        """
+        from temba.channels.models import ChannelEvent
+        from temba.contacts.models import ContactFire, ContactNote
+        from temba.flows.models import FlowSession
+        from temba.ivr.models import Call
+
+        def pre_delete(contact_ids):
+            FlowSession.objects.filter(contact_id__in=contact_ids).delete()
+            ChannelEvent.objects.filter(contact_id__in=contact_ids).delete()
+            Call.objects.filter(contact_id__in=contact_ids).delete()
+            ContactFire.objects.filter(contact_id__in=contact_ids).delete()
+            ContactNote.objects.filter(contact_id__in=contact_ids).delete()
+
+            # URNs can be referenced by other contacts' events so are detached here and deleted after all contacts
+            self.urns.filter(contact_id__in=contact_ids).update(contact=None)
 
+            counts["contacts"] += len(contact_ids)
+
+        delete_in_batches(self.contacts.all(), pre_delete=pre_delete, post_delete=checkpoint)
+
+        return not self.contacts.exists()
+
+    def _delete_assets(self, user, counts, checkpoint):
         # delete any remaining orphaned URNs
-        self.urns.all().delete()
+        delete_in_batches(self.urns.all())
 
         # delete our fields
         for field in self.fields.all():
@@ -1182,8 +1281,14 @@ class Org(SmartModel):
         for bcast in self.broadcasts.filter(parent=None):
             bcast.delete(user, soft=False)
 
+    def _delete_other(self, user, counts, checkpoint):
+        from temba.msgs.models import Media
+
         Archive.delete_for_org(self)
 
+        while media_batch := list(self.media.filter(original=None)[:1000]):
+            Media.bulk_delete(media_batch)
+
         # delete other related objects
         delete_in_batches(self.api_tokens.all(), pk="key")
         delete_in_batches(self.schedules.all())
@@ -1193,17 +1298,6 @@ class Org(SmartModel):
         # needs to come after deletion of other things as those insert new negative counts
         delete_in_batches(self.counts.all())
 
-        # now that contacts are no longer in the database, we can start de-indexing them from search
-        mailroom.get_client().org_deindex(self)
-
-        # save when we were actually deleted
-        self.modified_on = timezone.now()
-        self.deleted_on = timezone.now()
-        self.config = {}
-        self.save()
-
-        return counts
-
     def as_environment_def(self):
         """
         Returns this org as an environment definition as used by the flow engine
@@ -1219,6 +1313,21 @@ class Org(SmartModel):
             "input_collation": self.input_collation,
         }
 
+    def get_assets_version(self) -> int:
+        """
+        Gets a version number for this org's flow dependencies which changes whenever one of them is saved or deleted
+        """
+        return int(get_redis_connection().get(self.ASSETS_VERSION_KEY.format(org_id=self.id)) or 0)
+
+    @classmethod
+    def bump_assets_version(cls, org_id: int):
+        key = cls.ASSETS_VERSION_KEY.format(org_id=org_id)
+
+        with get_redis_connection().pipeline() as pipe:
+            pipe.incr(key)
+            pipe.expire(key, cls.ASSETS_VERSION_TTL)
+            pipe.execute()
+
     def __repr__(self):
         return f'<Org: id={self.id} name="{self.name}">'
 
@@ -1226,6 +1335,12 @@ class Org(SmartModel):
         return self.name
 
 
+@receiver([post_save, post_delete])
+def _dependency_changed(sender, instance, **kwargs):
+    if isinstance(instance, DependencyMixin) and getattr(instance, "org_id", None):
+        Org.bump_assets_version(instance.org_id)
+
+
 class OrgMembership(models.Model):
     org = models.ForeignKey(Org, on_delete=models.CASCADE)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -1363,6 +1478,17 @@ class ExportType:
     download_prefix: str
     download_template = "orgs/export_download.html"
 
+    # formats this type can be written in, the first being the default
+    formats = ("xlsx",)
+
+    # number of archives to fetch concurrently for types which read from archives
+    archive_prefetch = 4
+
+    # minimum number of rows to write between checkpoints of exports in streaming formats, and minimum size of each
+    # chunk so that chunks can be joined on S3 with a multipart copy
+    checkpoint_rows = 100_000
+    checkpoint_min_bytes = s3.MULTIPART_MIN_PART_SIZE
+
     @classmethod
     def has_recent_unfinished(cls, org) -> bool:
         """
@@ -1382,6 +1508,51 @@ class ExportType:
     def get_download_context(self, export) -> dict:  # pragma: no cover
         return {}
 
+    def _write_batches(self, export, exporter, batches, *, enrich, serialize) -> int:
+        """
+        Writes batches of items to the given exporter via a pipeline of fetching batches, enriching them (e.g. looking up
+        their contacts) and serializing them to lists of row values, returning the number of rows written. Stages run
+        concurrently with each other and with writing, and the time spent in each is recorded on the export.
+
+        Batches are provided as tuples of the items and a position from which the remaining batches could be fetched if
+        the export is resumed, or None if the export can't be resumed from that point. For exports written to streaming
+        formats, we periodically save these positions as checkpoints.
+        """
+
+        def carry_position(func):
+            return lambda item: (func(item[0]), item[1])
+
+        pipeline = Pipeline(
+            batches,
+            [("enrich", carry_position(enrich)), ("serialize", carry_position(serialize))],
+            threaded=settings.EXPORTS_PIPELINED,
+        )
+        checkpointable = isinstance(exporter, StreamingExporter)
+        num_records = export.config.get("checkpoint", {}).get("num_records", 0)
+        num_since_checkpoint = 0
+
+        for rows, position in pipeline:
+            for row in rows:
+                exporter.write_row(row)
+
+            num_records += len(rows)
+            num_since_checkpoint += len(rows)
+
+            if (
+                checkpointable
+                and position is not None
+                and num_since_checkpoint >= self.checkpoint_rows
+                and exporter.chunk_bytes >= self.checkpoint_min_bytes
+            ):
+                export.save_checkpoint(exporter, position, num_records)
+                num_since_checkpoint = 0
+            else:
+                export.heartbeat()
+
+        export.timings = {name: round(secs, 3) for name, secs in pipeline.timings.items()}
+
+        return num_records
+
 
 class DefinitionExport(ExportType):
     """
@@ -1460,6 +1631,13 @@ class Export(TembaUUIDMixin, models.Model):
         (STATUS_FAILED, _("Failed")),
     )
 
+    FORMAT_XLSX = "xlsx"
+    FORMAT_CSV = "csv"
+    FORMAT_JSONL = "jsonl"
+
+    # formats which are streamed to storage and so can be written in chunks and resumed from checkpoints
+    STREAMING_EXPORTERS = {FORMAT_CSV: CSVExporter, FORMAT_JSONL: JSONLExporter}
+
     # log progress after this number of exported objects have been exported
     LOG_PROGRESS_PER_ROWS = 10000
 
@@ -1476,16 +1654,43 @@ class Export(TembaUUIDMixin, models.Model):
     # additional type specific filtering and extra columns
     config = models.JSONField(default=dict)
 
+    # seconds spent in each stage of writing the export
+    timings = models.JSONField(null=True)
+
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name="exports")
     created_on = models.DateTimeField(default=timezone.now)
     modified_on = models.DateTimeField(default=timezone.now)
 
+    # exports which haven't had a heartbeat for this long are considered stalled and are restarted
+    STALLED_AFTER = timedelta(hours=1)
+
+    PERFORM_LOCK_KEY = "export-perform:%d"
+
+    _perform_lock = None
+
     def start(self):
         from .tasks import perform_export
 
         perform_export.delay(self.id)
 
     def perform(self):
+        # lock so that an export which was restarted because it looked stalled, but is actually still running, can't be
+        # performed twice at the same time.. the lock is extended by each heartbeat
+        r = get_redis_connection()
+        lock = r.lock(self.PERFORM_LOCK_KEY % self.id, timeout=self.STALLED_AFTER.total_seconds())
+        if not lock.acquire(blocking=False):
+            logger.warning(f"Export #{self.id} is already being performed")
+            return
+
+        self._perform_lock = lock
+        try:
+            self._perform()
+        finally:
+            self._perform_lock = None
+            with contextlib.suppress(LockError):
+                lock.release()
+
+    def _perform(self):
         from temba.notifications.types.builtin import ExportFinishedNotificationType
 
         assert self.status != self.STATUS_PROCESSING, "can't start an export that's already processing"
@@ -1496,16 +1701,22 @@ class Export(TembaUUIDMixin, models.Model):
         try:
             temp_file, extension, num_records = self.type.write(self)
 
-            # save file to storage
-            path = f"orgs/{self.org.id}/{self.type.slug}_exports/{self.uuid}.{extension}"
-            default_storage.save(path, File(temp_file))
-
-            # remove temporary file
-            if hasattr(temp_file, "delete"):
-                if temp_file.delete is False:  # pragma: no cover
+            path = self._get_storage_path(extension)
+
+            # streaming exporters write directly to storage so won't give us a temporary file, but may have written
+            # multiple chunks that need joining together
+            if not temp_file:
+                self._join_chunks(extension)
+            else:
+                # save file to storage
+                default_storage.save(path, File(temp_file))
+
+                # remove temporary file
+                if hasattr(temp_file, "delete"):
+                    if temp_file.delete is False:  # pragma: no cover
+                        os.unlink(temp_file.name)
+                else:  # pragma: no cover
                     os.unlink(temp_file.name)
-            else:  # pragma: no cover
-                os.unlink(temp_file.name)
 
         except Exception as e:  # pragma: no cover
             self.status = self.STATUS_FAILED
@@ -1515,7 +1726,7 @@ class Export(TembaUUIDMixin, models.Model):
             self.status = self.STATUS_COMPLETE
             self.num_records = num_records
             self.path = path
-            self.save(update_fields=("status", "num_records", "path", "modified_on"))
+            self.save(update_fields=("status", "num_records", "path", "config", "timings", "modified_on"))
 
             ExportFinishedNotificationType.create(self)
 
@@ -1528,6 +1739,82 @@ class Export(TembaUUIDMixin, models.Model):
             org=org, export_type=export_type, status__in=(cls.STATUS_PENDING, cls.STATUS_PROCESSING)
         )
 
+    def _get_storage_path(self, extension: str) -> str:
+        return f"orgs/{self.org.id}/{self.type.slug}_exports/{self.uuid}.{extension}"
+
+    def _get_chunk_path(self, extension: str, chunk: int) -> str:
+        # first chunk is written to the final path so if there's only one, there's nothing more to do
+        if chunk == 0:
+            return self._get_storage_path(extension)
+
+        return f"orgs/{self.org.id}/{self.type.slug}_exports/{self.uuid}.part{chunk}.{extension}"
+
+    def get_format(self) -> str:
+        return self.config.get("format", self.type.formats[0])
+
+    def create_exporter(self, base_sheet_name: str, headers: list):
+        """
+        Creates an exporter for writing rows in the format of this export
+        """
+        fmt = self.get_format()
+        tz = self.org.timezone
+
+        assert fmt in self.type.formats, f"format {fmt} not supported by {self.type.slug} exports"
+
+        if fmt in self.STREAMING_EXPORTERS:
+            exporter_class = self.STREAMING_EXPORTERS[fmt]
+
+            # if we're resuming, continue writing to the chunk after the last checkpoint
+            chunk = self.config.get("checkpoint", {}).get("chunk", 0)
+            stream = default_storage.open(self._get_chunk_path(exporter_class.extension, chunk), "wb")
+
+            return exporter_class(stream, headers, tz, write_headers=chunk == 0)
+
+        return MultiSheetExporter(base_sheet_name, headers, tz)
+
+    def get_checkpoint(self) -> dict:
+        """
+        Gets the position saved by the last checkpoint, if this export is being resumed
+        """
+        return self.config.get("checkpoint", {}).get("position")
+
+    def heartbeat(self):
+        """
+        Records that this export is still being performed so that it isn't considered stalled
+        """
+        self.modified_on = timezone.now()
+        self.save(update_fields=("modified_on",))
+
+        if self._perform_lock:
+            self._perform_lock.reacquire()
+
+    def save_checkpoint(self, exporter, position: dict, num_records: int):
+        """
+        Saves a checkpoint so that if this export is interrupted, it can be resumed from the given position rather than
+        restarted. Rows written so far are finished off as a chunk in storage and subsequent rows go to a new chunk.
+        """
+        chunk = self.config.get("checkpoint", {}).get("chunk", 0) + 1
+
+        exporter.split(default_storage.open(self._get_chunk_path(exporter.extension, chunk), "wb"))
+
+        self.config["checkpoint"] = {"chunk": chunk, "num_records": num_records, "position": position}
+        self.save(update_fields=("config",))
+        self.heartbeat()
+
+    def _join_chunks(self, extension: str):
+        """
+        Joins any chunks written after the first onto the end of it. These are all gzip files so can be concatenated,
+        and as all but the last are at least checkpoint_min_bytes, on S3 this can be done without downloading them.
+        """
+        num_chunks = self.config.pop("checkpoint", {}).get("chunk", 0) + 1
+        if num_chunks == 1:
+            return
+
+        chunk_paths = [self._get_chunk_path(extension, c) for c in range(1, num_chunks)]
+
+        s3.concat_files(default_storage, self._get_storage_path(extension), chunk_paths)
+        s3.delete_files(default_storage, chunk_paths)
+
     def get_date_range(self) -> tuple:
         """
         Gets the since > until datetimes of items to export.
@@ -1538,11 +1825,19 @@ class Export(TembaUUIDMixin, models.Model):
         return start_date, end_date
 
     def get_contact_fields(self):
+        return self._contact_fields
+
+    def get_contact_groups(self):
+        return self._contact_groups
+
+    @cached_property
+    def _contact_fields(self) -> list:
         ids = self.config.get("with_fields", [])
         id_by_order = {id: i for i, id in enumerate(ids)}
         return sorted(self.org.fields.filter(id__in=ids), key=lambda o: id_by_order[o.id])
 
-    def get_contact_groups(self):
+    @cached_property
+    def _contact_groups(self) -> list:
         ids = self.config.get("with_groups", [])
         id_by_order = {id: i for i, id in enumerate(ids)}
         return sorted(self.org.groups.filter(id__in=ids), key=lambda o: id_by_order[o.id])
@@ -1622,7 +1917,7 @@ class Export(TembaUUIDMixin, models.Model):
         """
         Create a more user friendly filename for download
         """
-        _, extension = self.path.rsplit(".", 1)
+        _, extension = os.path.basename(self.path).split(".", 1)
         date_str = datetime.today().strftime(r"%Y%m%d")
         return f"{self.type.download_prefix}_{date_str}.{extension}"
 
@@ -1636,8 +1931,14 @@ class Export(TembaUUIDMixin, models.Model):
     def delete(self):
         self.notifications.all().delete()
 
-        if self.path:
-            default_storage.delete(self.path)
+        paths = [self.path] if self.path else []
+
+        # delete any chunks left by an unfinished export
+        if "checkpoint" in self.config:
+            extension = self.STREAMING_EXPORTERS[self.get_format()].extension
+            paths += [self._get_chunk_path(extension, c) for c in range(self.config["checkpoint"]["chunk"] + 1)]
+
+        s3.delete_files(default_storage, paths)
 
         super().delete()
 
@@ -94,13 +94,24 @@ def trim_exports():
 @cron_task(lock_timeout=7200)
 def restart_stalled_exports():
     now = timezone.now()
-    window = now - timedelta(hours=1)
+    window = now - Export.STALLED_AFTER
 
     exports = Export.objects.filter(modified_on__lte=window).exclude(
         status__in=[Export.STATUS_COMPLETE, Export.STATUS_FAILED]
     )
-    for export in exports:
-        perform_export.delay(export.id)
+    num_restarted = 0
+
+    for export in exports.only("id", "modified_on"):
+        # stalled exports get put back into pending so they can be performed again, resuming from their last
+        # checkpoint if they have one. They're claimed by updating modified_on so they're only restarted once per window
+        claimed = Export.objects.filter(id=export.id, modified_on=export.modified_on).update(
+            status=Export.STATUS_PENDING, modified_on=now
+        )
+        if claimed:
+            perform_export.delay(export.id)
+            num_restarted += 1
+
+    return {"restarted": num_restarted}
 
 
 @cron_task(lock_timeout=7200)
@@ -115,18 +126,21 @@ def expire_invitations():
     return {"expired": num_expired}
 
 
-@cron_task(lock_timeout=7 * 24 * 60 * 60)
+@cron_task(lock_timeout=24 * 60 * 60)
 def delete_released_orgs():
     # for each org that was released over 7 days ago, delete it for real
     week_ago = timezone.now() - timedelta(days=Org.DELETE_DELAY_DAYS)
+    deadline = timezone.now() + timedelta(hours=12)
 
-    num_deleted, num_failed = 0, 0
+    num_deleted, num_failed, num_incomplete = 0, 0, 0
 
     for org in Org.objects.filter(is_active=False, released_on__lt=week_ago, deleted_on=None).order_by("released_on"):
         start = timezone.now()
+        if start >= deadline:
+            break
 
         try:
-            counts = org.delete()
+            counts = org.delete(time_limit=deadline - start)
         except Exception:  # pragma: no cover
             logging.exception(f"exception while deleting '{org.name}' (#{org.id})")
             num_failed += 1
@@ -134,12 +148,19 @@ def delete_released_orgs():
 
         seconds = (timezone.now() - start).total_seconds()
         stats = " ".join([f"{k}={v}" for k, v in counts.items()])
+
+        # deletion ran out of time and will be resumed by the next run of this task
+        if not org.deleted_on:
+            logging.warning(f"partially deleted '{org.name}' (#{org.id}) in {seconds} seconds ({stats})")
+            num_incomplete += 1
+            break
+
         logging.warning(f"successfully deleted '{org.name}' (#{org.id}) in {seconds} seconds ({stats})")
         num_deleted += 1
 
-    return {"deleted": num_deleted, "failed": num_failed}
+    return {"deleted": num_deleted, "failed": num_failed, "incomplete": num_incomplete}
 
 
 @cron_task(lock_timeout=7200)
 def squash_item_counts():
-    ItemCount.squash()
+    return ItemCount.squash()
@@ -3,6 +3,8 @@ from unittest.mock import patch
 
 from django.conf import settings
 from django.core.files.storage import default_storage
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from temba import mailroom
@@ -199,6 +201,58 @@ class DefinitionExportTest(TembaTest):
         self.assertEqual(dep_graph[child], {parent})
         self.assertEqual(dep_graph[parent], {child})
 
+    def test_dependency_graph(self):
+        parent = self.create_flow("Parent")
+        child = self.create_flow("Child")
+        archived = self.create_flow("Archived")
+        archived.is_archived = True
+        archived.save(update_fields=("is_archived",))
+        grouped = self.create_flow("Grouped")
+        reminder = self.create_flow("Reminder")
+        keyword = self.create_flow("Keyword")
+        loner = self.create_flow("Loner")
+
+        farmers = self.create_group("Farmers")
+        planting_date = self.create_field("planting_date", "Planting Date", value_type=ContactField.TYPE_DATETIME)
+        campaign = Campaign.create(self.org, self.admin, "Planting", farmers)
+        CampaignEvent.create_flow_event(self.org, self.admin, campaign, planting_date, 1, "D", reminder)
+        trigger = Trigger.create(
+            self.org, self.admin, Trigger.TYPE_KEYWORD, keyword, keywords=["join"], match_type=Trigger.MATCH_FIRST_WORD
+        )
+
+        parent.flow_dependencies.add(child, archived)
+        grouped.group_dependencies.add(farmers)
+        grouped.field_dependencies.add(planting_date)
+
+        graph = self.org.generate_dependency_graph(include_triggers=True)
+
+        self.assertEqual({child, archived}, graph[parent])
+        self.assertEqual({parent}, graph[child])
+        self.assertEqual({parent}, graph[archived])  # included as a dependency even though it's archived
+        self.assertEqual({campaign}, graph[grouped])  # group dependencies are replaced by the group's campaigns
+        self.assertEqual({grouped, reminder}, graph[campaign])
+        self.assertEqual({campaign}, graph[reminder])
+        self.assertEqual({trigger}, graph[keyword])
+        self.assertEqual({keyword}, graph[trigger])
+        self.assertEqual(set(), graph[loner])
+
+        self.assertEqual({parent, child, archived}, self.org.resolve_dependencies([child], []))
+        self.assertEqual({grouped, campaign, reminder}, self.org.resolve_dependencies([], [campaign]))
+        self.assertEqual({grouped}, self.org.resolve_dependencies([grouped], [], include_campaigns=False))
+
+        # number of queries doesn't depend on the number of flows
+        with CaptureQueriesContext(connection) as captured:
+            self.org.generate_dependency_graph(include_triggers=True)
+        num_queries = len(captured)
+
+        for i in range(5):
+            flow = self.create_flow(f"Extra {i}")
+            flow.flow_dependencies.add(child)
+            flow.group_dependencies.add(farmers)
+
+        with self.assertNumQueries(num_queries):
+            self.org.generate_dependency_graph(include_triggers=True)
+
     def test_import_dependency_types(self):
         self.import_file("test_flows/all_dependency_types.json")
 
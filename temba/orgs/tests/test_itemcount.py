@@ -1,3 +1,8 @@
+from unittest.mock import patch
+
+from django_redis import get_redis_connection
+
+from temba.orgs.models import ItemCount
 from temba.orgs.tasks import squash_item_counts
 from temba.tests import TembaTest
 
@@ -22,3 +27,99 @@ class ItemCountTest(TembaTest):
         self.assertEqual(3, self.org.counts.count())
 
         self.org.counts.all().delete()
+
+    def test_cached_totals(self):
+        self.org.counts.create(scope="foo:1", count=2)
+        self.org.counts.create(scope="foo:1", count=3)
+        self.org.counts.create(scope="bar:1", count=1)
+
+        with self.assertNumQueries(1):
+            self.assertEqual({"foo:1": 5}, ItemCount.get_scope_totals(self.org, "foo:"))
+
+        # counts are only added to cached totals once they've settled, so until then counts are read in full
+        self.org.counts.filter(scope="bar:1").delete()
+
+        self.assertEqual({}, ItemCount.get_scope_totals(self.org, "bar:"))
+
+        with patch.object(ItemCount, "totals_settle_secs", 0):
+            self.assertEqual({"foo:1": 5}, ItemCount.get_scope_totals(self.org, "foo:"))
+
+            # only new counts are read from the database and added to the cached totals
+            self.org.counts.create(scope="foo:1", count=-1)
+            self.org.counts.create(scope="foo:2", count=4)
+            self.org2.counts.create(scope="foo:1", count=7)
+
+            self.assertEqual({"foo:1": 4, "foo:2": 4}, ItemCount.get_scope_totals(self.org, "foo:"))
+            self.assertEqual({"foo:1": 7}, ItemCount.get_scope_totals(self.org2, "foo:"))
+            self.assertEqual(
+                {self.org.id: {"foo:1": 4, "foo:2": 4}, self.org2.id: {"foo:1": 7}},
+                ItemCount.get_cached_totals([self.org.id, self.org2.id]),
+            )
+
+            # deleted settled counts aren't seen until cached totals are cleared
+            self.org.counts.filter(scope="foo:2").delete()
+
+            self.assertEqual({"foo:1": 4, "foo:2": 4}, ItemCount.get_scope_totals(self.org, "foo:"))
+
+            ItemCount.clear_cached_totals([self.org.id])
+
+            self.assertEqual({"foo:1": 4}, ItemCount.get_scope_totals(self.org, "foo:"))
+
+            # squashing replaces counts with new rows and so starts new cached totals
+            squash_item_counts()
+            self.org.counts.create(scope="foo:2", count=1)
+
+            self.assertEqual({"foo:1": 4, "foo:2": 1}, ItemCount.get_scope_totals(self.org, "foo:"))
+            self.assertEqual({"foo:1": 4, "foo:2": 1}, ItemCount.get_scope_totals(self.org, "foo:"))
+
+            # while a squash of an org's counts is in progress, its cached totals aren't used or updated
+            r = get_redis_connection()
+            r.hincrby(ItemCount._get_generations_key(), self.org.id, 1)
+            self.org.counts.filter(scope="foo:2").delete()
+
+            self.assertEqual({"foo:1": 4}, ItemCount.get_scope_totals(self.org, "foo:"))
+
+            # and once it's done, new cached totals are started
+            r.hincrby(ItemCount._get_generations_key(), self.org.id, 1)
+            self.assertEqual({"foo:1": 4}, ItemCount.get_scope_totals(self.org, "foo:"))
+
+            # squashing only invalidates the cached totals of the orgs it touched
+            self.org2.counts.create(scope="foo:1", count=1)
+            self.org.counts.filter(scope="foo:1").update(count=0)  # not seen as it's already in the cached totals
+            squash_item_counts()
+
+            self.assertEqual({"foo:1": 4}, ItemCount.get_scope_totals(self.org, "foo:"))
+            self.assertEqual({"foo:1": 8}, ItemCount.get_scope_totals(self.org2, "foo:"))
+
+            ItemCount.clear_cached_totals([self.org.id])
+            self.org.counts.filter(scope="foo:1").update(count=4)
+
+            # totals are cached per prefix and filtered by prefix in the database
+            self.org.counts.create(scope="bar:1", count=3)
+            with self.assertNumQueries(1):
+                self.assertEqual({"bar:1": 3}, ItemCount.get_scope_totals(self.org, "bar:"))
+            self.assertEqual({"foo:1": 4}, ItemCount.get_scope_totals(self.org, "foo:"))
+            self.assertEqual(
+                {self.org.id: {"foo:1": 4, "bar:1": 3}, self.org2.id: {"foo:1": 8}},
+                ItemCount.get_cached_totals([self.org.id, self.org2.id]),
+            )
+            self.org.counts.filter(scope="bar:1").delete()
+
+            # if a squash starts while we're reading, totals are summed in full instead
+            self.org.counts.create(scope="foo:3", count=2)
+            gens = {self.org.id: 2}
+            with patch.object(ItemCount, "_sum_totals", wraps=ItemCount._sum_totals) as mock_sum:
+                with patch.object(ItemCount, "_get_generations", side_effect=[gens, {self.org.id: 3}]):
+                    totals = ItemCount.get_cached_totals([self.org.id], prefix="foo:")
+                self.assertEqual(1, mock_sum.call_count)
+            self.assertEqual({self.org.id: {"foo:1": 4, "foo:3": 2}}, totals)
+
+        # counts read from a replica are always summed in full and don't touch the cache
+        with patch.object(ItemCount, "_sum_totals", wraps=ItemCount._sum_totals) as mock_sum:
+            self.assertEqual(
+                {self.org.id: {"foo:1": 4, "foo:3": 2}},
+                ItemCount.get_cached_totals([self.org.id], prefix="foo:", using="readonly"),
+            )
+            self.assertEqual(1, mock_sum.call_count)
+
+        self.assertEqual({}, ItemCount.get_cached_totals([]))
@@ -3,6 +3,8 @@ from datetime import date, timedelta, timezone as tzone
 from unittest.mock import patch
 from zoneinfo import ZoneInfo
 
+from django_redis import get_redis_connection
+
 from django.db.models import F, Model
 from django.test.utils import override_settings
 from django.urls import reverse
@@ -431,10 +433,30 @@ class OrgTest(TembaTest):
 
         Export.objects.all().update(modified_on=two_hours_ago)
 
-        restart_stalled_exports()
+        self.assertEqual({"restarted": 3}, restart_stalled_exports())
+        self.assertEqual(3, mock_org_export_task.call_count)
+        self.assertEqual(3, Export.objects.filter(status=Export.STATUS_PENDING, modified_on__gt=two_hours_ago).count())
 
+        # restarted exports are claimed so aren't restarted again until they've stalled again
+        self.assertEqual({"restarted": 0}, restart_stalled_exports())
         self.assertEqual(3, mock_org_export_task.call_count)
 
+    def test_perform_export_already_running(self):
+        export = ContactExport.create(org=self.org, user=self.admin)
+
+        # an export that's still being performed elsewhere is left alone
+        with get_redis_connection().lock(Export.PERFORM_LOCK_KEY % export.id, timeout=60):
+            export.perform()
+
+        export.refresh_from_db()
+        self.assertEqual(Export.STATUS_PENDING, export.status)
+
+        export.perform()
+
+        export.refresh_from_db()
+        self.assertEqual(Export.STATUS_COMPLETE, export.status)
+        self.assertFalse(get_redis_connection().exists(Export.PERFORM_LOCK_KEY % export.id))
+
 
 class OrgDeleteTest(TembaTest):
     def create_content(self, org, user) -> list:
@@ -815,6 +837,35 @@ class OrgDeleteTest(TembaTest):
         self.org.release(self.customer_support)
         self.assertEqual(prev_released_on, self.org.released_on)
 
+    @mock_mailroom
+    def test_delete_resumed(self, mr_mocks):
+        org1_content = self.create_content(self.org, self.admin)
+        org2_content = self.create_content(self.org2, self.admin2)
+
+        self.org.release(self.customer_support)
+        Org.objects.filter(id=self.org.id).update(released_on=F("released_on") - timedelta(days=8))
+        self.org.refresh_from_db()
+
+        # with no time to spare, each call only gets through a single step or batch before saving its progress
+        counts = self.org.delete(time_limit=timedelta(0))
+
+        self.org.refresh_from_db()
+        self.assertIsNone(self.org.deleted_on)
+        self.assertEqual({"completed": ["misc"], "counts": {}}, self.org.config["deletion"])
+        self.assertEqual({}, counts)
+
+        num_calls = 1
+        while not self.org.deleted_on:
+            counts = self.org.delete(time_limit=timedelta(0))
+            num_calls += 1
+
+        self.assertGreater(num_calls, 8)
+        self.assertEqual({"messages", "runs", "contacts"}, set(counts.keys()))
+        self.assertEqual(0, self.org.contacts.count())
+
+        self.assertOrgDeleted(self.org, org1_content)
+        self.assertOrgActive(self.org2, org2_content)
+
 
 class AnonOrgTest(TembaTest):
     """
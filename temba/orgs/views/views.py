@@ -1446,17 +1446,20 @@ class OrgCRUDL(SmartCRUDL):
             unbucketed = set(dependencies.keys())
             buckets = []
 
-            # helper method to add a component and its dependencies to a bucket
+            # helper method to add a component and its dependencies to a bucket, without recursion as chains of flows
+            # can be long
             def collect_component(c, bucket):
-                if c in bucket:  # pragma: no cover
-                    return
+                to_visit = [c]
 
-                unbucketed.remove(c)
-                bucket.add(c)
+                while to_visit:
+                    c = to_visit.pop()
+                    if c not in unbucketed:
+                        continue
 
-                for d in dependencies[c]:
-                    if d in unbucketed:
-                        collect_component(d, bucket)
+                    unbucketed.remove(c)
+                    bucket.add(c)
+
+                    to_visit.extend(dependencies[c])
 
             while unbucketed:
                 component = next(iter(unbucketed))
@@ -2,6 +2,7 @@ from django.conf import settings
 from django.utils import timezone
 
 from temba.utils.crons import cron_task
+from temba.utils.db import partitions
 from temba.utils.models import delete_in_batches
 
 from .models import HTTPLog
@@ -11,6 +12,7 @@ from .models import HTTPLog
 def trim_http_logs():
     trim_before = timezone.now() - settings.RETENTION_PERIODS["httplog"]
 
+    num_dropped = partitions.drop_partitions(HTTPLog._meta.db_table, before=trim_before)
     num_deleted = delete_in_batches(HTTPLog.objects.filter(created_on__lte=trim_before))
 
-    return {"deleted": num_deleted}
+    return {"deleted": num_deleted, "partitions_dropped": num_dropped}
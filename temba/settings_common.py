@@ -676,6 +676,7 @@ CELERY_BEAT_SCHEDULE = {
     "expire-invitations": {"task": "expire_invitations", "schedule": crontab(hour=0, minute=10)},
     "fail-old-android-messages": {"task": "fail_old_android_messages", "schedule": crontab(hour=0, minute=0)},
     "interrupt-flow-sessions": {"task": "interrupt_flow_sessions", "schedule": crontab(hour=23, minute=30)},
+    "maintain-partitions": {"task": "maintain_partitions", "schedule": crontab(hour=1, minute=0)},
     "refresh-whatsapp-tokens": {"task": "refresh_whatsapp_tokens", "schedule": crontab(hour=6, minute=0)},
     "refresh-templates": {"task": "refresh_templates", "schedule": timedelta(seconds=900)},
     "send-notification-emails": {"task": "send_notification_emails", "schedule": timedelta(seconds=60)},
@@ -836,6 +837,7 @@ NON_ISO6391_LANGUAGES = {"mul", "und"}
 
 MAILROOM_URL = None
 MAILROOM_AUTH_TOKEN = None
+MAILROOM_POOL_SIZE = 10  # max number of connections kept open to mailroom per process
 
 # -----------------------------------------------------------------------------------
 # Data Model
@@ -843,6 +845,10 @@ MAILROOM_AUTH_TOKEN = None
 
 GLOBAL_VALUE_SIZE = 10_000  # max length of global values
 
+# whether exports run their fetch, enrich and serialize stages in separate threads (they use their own database
+# connections which can't see data in test transactions)
+EXPORTS_PIPELINED = not TESTING
+
 ORG_LIMIT_DEFAULTS = {
     "channels": 10,
     "fields": 250,
@@ -864,6 +870,14 @@ RETENTION_PERIODS = {
     "webhookevent": timedelta(hours=48),
 }
 
+# append-heavy tables which can be partitioned by day or week of creation using the partition_tables command, so that
+# trimming them drops whole partitions, e.g. {"channels_channellog": "day", "request_logs_httplog": "day"}
+PARTITIONED_TABLES = {}
+
+# number of periods ahead to create partitions for, so that inserts keep working if partition maintenance fails for a
+# while.. an error is logged if it gets down to half of this
+PARTITIONS_AHEAD = 7
+
 # -----------------------------------------------------------------------------------
 # 3rd Party Integrations
 # -----------------------------------------------------------------------------------
@@ -635,11 +635,13 @@ class TembaTest(SmartminTest):
 
     def create_contact_import(self, path):
         with open(path, "rb") as f:
-            mappings, num_records = ContactImport.try_to_parse(self.org, f, path)
+            records = BytesIO()
+            mappings, num_records = ContactImport.try_to_parse(self.org, f, path, records_out=records)
             return ContactImport.objects.create(
                 org=self.org,
                 original_filename=path,
                 file=SimpleUploadedFile(f.name, f.read()),
+                records_file=SimpleUploadedFile("records.jsonl.gz", records.getvalue()),
                 mappings=mappings,
                 num_records=num_records,
                 group_name=Path(path).stem.title(),
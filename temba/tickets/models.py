@@ -1,8 +1,8 @@
-import itertools
 import logging
 from abc import ABCMeta
 from datetime import date
 
+import iso8601
 import openpyxl
 
 from django.conf import settings
@@ -18,8 +18,7 @@ from temba.orgs.models import DependencyMixin, Export, ExportType, Org, OrgMembe
 from temba.users.models import User
 from temba.utils.dates import date_range
 from temba.utils.db.functions import SplitPart
-from temba.utils.export import MultiSheetExporter
-from temba.utils.models import TembaModel
+from temba.utils.models import TembaModel, iter_keyset_batches
 from temba.utils.models.counts import DailyCountModel, DailyTimingModel
 from temba.utils.uuid import is_uuid, uuid4
 
@@ -556,15 +555,20 @@ class TicketExport(ExportType):
     slug = "ticket"
     name = _("Tickets")
     download_prefix = "tickets"
+    formats = (Export.FORMAT_XLSX, Export.FORMAT_CSV, Export.FORMAT_JSONL)
 
     @classmethod
-    def create(cls, org, user, start_date, end_date, with_fields=(), with_groups=()):
+    def create(cls, org, user, start_date, end_date, with_fields=(), with_groups=(), format=Export.FORMAT_XLSX):
         return Export.objects.create(
             org=org,
             export_type=cls.slug,
             start_date=start_date,
             end_date=end_date,
-            config={"with_fields": [f.id for f in with_fields], "with_groups": [g.id for g in with_groups]},
+            config={
+                "with_fields": [f.id for f in with_fields],
+                "with_groups": [g.id for g in with_groups],
+                "format": format,
+            },
             created_by=user,
         )
 
@@ -572,43 +576,50 @@ class TicketExport(ExportType):
         headers = ["UUID", "Opened On", "Closed On", "Topic", "Assigned To"] + export.get_contact_headers()
         start_date, end_date = export.get_date_range()
 
-        # get the ticket ids, filtered and ordered by opened on
-        ticket_ids = (
+        tickets = (
             Ticket.objects.filter(org=export.org, opened_on__gte=start_date, opened_on__lte=end_date)
-            .order_by("opened_on")
-            .values_list("id", flat=True)
+            .prefetch_related("org", "contact", "contact__org", "contact__groups", "assignee", "topic")
             .using("readonly")
         )
 
-        exporter = MultiSheetExporter("Tickets", headers, export.org.timezone)
-        num_records = 0
+        exporter = export.create_exporter("Tickets", headers)
 
         # add tickets to the export in batches of 1k to limit memory usage
-        for batch_ids in itertools.batched(ticket_ids, 1000):
-            tickets = (
-                Ticket.objects.filter(id__in=batch_ids)
-                .order_by("opened_on")
-                .prefetch_related("org", "contact", "contact__org", "contact__groups", "assignee", "topic")
-                .using("readonly")
-            )
+        num_records = self._write_batches(
+            export,
+            exporter,
+            self._get_ticket_batches(export, tickets),
+            enrich=self._init_urns,
+            serialize=lambda batch: self._get_rows(export, batch),
+        )
 
-            Contact.bulk_urn_cache_initialize([t.contact for t in tickets], using="readonly")
+        return *exporter.save_file(), num_records
 
-            for ticket in tickets:
-                values = [
-                    str(ticket.uuid),
-                    ticket.opened_on,
-                    ticket.closed_on,
-                    ticket.topic.name,
-                    ticket.assignee.email if ticket.assignee else None,
-                ]
-                values += export.get_contact_columns(ticket.contact)
+    def _get_ticket_batches(self, export, tickets):
+        # if we're resuming, continue from the position of the last checkpoint
+        position = export.get_checkpoint() or {}
+        after = (iso8601.parse_date(position["after"][0]), position["after"][1]) if position.get("after") else None
 
-                exporter.write_row(values)
+        for batch in iter_keyset_batches(tickets, keys=("opened_on", "id"), after=after):
+            yield batch, {"after": [batch[-1].opened_on.isoformat(), batch[-1].id]}
 
-            num_records += len(tickets)
+    def _init_urns(self, tickets) -> list:
+        Contact.bulk_urn_cache_initialize([t.contact for t in tickets], using="readonly")
+        return tickets
 
-            export.modified_on = timezone.now()
-            export.save(update_fields=("modified_on",))
+    def _get_rows(self, export, tickets) -> list:
+        rows = []
 
-        return *exporter.save_file(), num_records
+        for ticket in tickets:
+            values = [
+                str(ticket.uuid),
+                ticket.opened_on,
+                ticket.closed_on,
+                ticket.topic.name,
+                ticket.assignee.email if ticket.assignee else None,
+            ]
+            values += export.get_contact_columns(ticket.contact)
+
+            rows.append(values)
+
+        return rows
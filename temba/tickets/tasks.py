@@ -5,5 +5,4 @@ from .models import TicketDailyCount, TicketDailyTiming
 
 @cron_task(lock_timeout=7200)
 def squash_ticket_counts():
-    TicketDailyCount.squash()
-    TicketDailyTiming.squash()
+    return {"counts": TicketDailyCount.squash(), "timings": TicketDailyTiming.squash()}
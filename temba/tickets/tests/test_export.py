@@ -1,4 +1,7 @@
+import gzip
 from datetime import date, datetime, timedelta, timezone as tzone
+from functools import partial
+from unittest.mock import patch
 
 from openpyxl import load_workbook
 
@@ -6,8 +9,10 @@ from django.core.files.storage import default_storage
 from django.utils import timezone
 
 from temba.contacts.models import ContactField, ContactURN
+from temba.orgs.models import Export
 from temba.tests import TembaTest
 from temba.tickets.models import Ticket, TicketExport, Topic
+from temba.utils.models import iter_keyset_batches
 
 
 class TicketExportTest(TembaTest):
@@ -330,3 +335,60 @@ class TicketExportTest(TembaTest):
                 ],
                 tz=self.org.timezone,
             )
+
+    @patch("temba.tickets.models.iter_keyset_batches", partial(iter_keyset_batches, batch_size=1))
+    @patch("temba.tickets.models.TicketExport.checkpoint_rows", 1)
+    @patch("temba.tickets.models.TicketExport.checkpoint_min_bytes", 0)
+    def test_export_resumed(self):
+        today = timezone.now().astimezone(self.org.timezone).date()
+        tickets = [
+            self.create_ticket(self.create_contact(f"Contact {i}"), opened_on=timezone.now() - timedelta(days=5 - i))
+            for i in range(3)
+        ]
+
+        export = TicketExport.create(
+            self.org, self.admin, start_date=today - timedelta(days=7), end_date=today, format=Export.FORMAT_CSV
+        )
+
+        # make export fail after writing the second batch
+        get_rows = TicketExport._get_rows
+        calls = []
+
+        def fail_on_third(self, export, batch):
+            calls.append(batch)
+            if len(calls) == 3:
+                raise ValueError("worker died")
+            return get_rows(self, export, batch)
+
+        with patch("temba.tickets.models.TicketExport._get_rows", fail_on_third):
+            with self.assertRaises(ValueError):
+                export.perform()
+
+        export.refresh_from_db()
+        self.assertEqual(Export.STATUS_FAILED, export.status)
+        self.assertEqual(2, export.config["checkpoint"]["chunk"])
+        self.assertEqual(2, export.config["checkpoint"]["num_records"])
+        self.assertEqual(
+            {"after": [tickets[1].opened_on.isoformat(), tickets[1].id]}, export.config["checkpoint"]["position"]
+        )
+
+        # resume the export which should only write the last ticket
+        export.status = Export.STATUS_PENDING
+        export.save(update_fields=("status",))
+        export.perform()
+
+        export.refresh_from_db()
+        self.assertEqual(Export.STATUS_COMPLETE, export.status)
+        self.assertEqual(3, export.num_records)
+        self.assertNotIn("checkpoint", export.config)
+
+        with default_storage.open(export.path, "rb") as f:
+            lines = gzip.decompress(f.read()).decode("utf-8").splitlines()
+
+        self.assertEqual(4, len(lines))
+        self.assertTrue(lines[0].startswith("UUID,Opened On"))
+        self.assertEqual([str(t.uuid) for t in tickets], [line.split(",")[0] for line in lines[1:]])
+
+        # chunks have been deleted
+        self.assertFalse(default_storage.exists(export._get_chunk_path("csv.gz", 1)))
+        self.assertFalse(default_storage.exists(export._get_chunk_path("csv.gz", 2)))
@@ -1,2 +1,3 @@
 from .decorator import cron_task  # noqa
 from .signals import post_cron_exec  # noqa
+from .stats import record_stats  # noqa
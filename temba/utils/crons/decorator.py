@@ -6,6 +6,7 @@ from django_redis import get_redis_connection
 from django.utils import timezone
 
 from .signals import post_cron_exec
+from .stats import end_stats, start_stats
 
 # for tasks using a redis lock to prevent overlapping this is the default timeout for the lock
 DEFAULT_TASK_LOCK_TIMEOUT = 900
@@ -36,12 +37,20 @@ def cron_task(*task_args, **task_kwargs):
             if r.get(lock_key):
                 result = {"skipped": True}
             else:
+                stats_token, stats = start_stats()
                 try:
                     with r.lock(lock_key, timeout=lock_timeout):
                         result = task_func(*exec_args, **exec_kwargs)
                 finally:
+                    end_stats(stats_token)
+
                     post_cron_exec.send(
-                        sender=cron_task, task_name=task_name, started=start, ended=timezone.now(), result=result
+                        sender=cron_task,
+                        task_name=task_name,
+                        started=start,
+                        ended=timezone.now(),
+                        result=result,
+                        stats=stats,
                     )
 
             return result
@@ -0,0 +1,32 @@
+from contextvars import ContextVar
+
+_current = ContextVar("cron_stats", default=None)
+
+
+def start_stats() -> tuple:
+    """
+    Starts collecting stats for the current cron task execution, returning a token for resetting and the stats dict
+    """
+    stats = {}
+    return _current.set(stats), stats
+
+
+def end_stats(token):
+    _current.reset(token)
+
+
+def record_stats(key: str, **values):
+    """
+    Adds the given values to the stats of the currently executing cron task, if there is one, so that they can be
+    included in the post_cron_exec signal payload. Stats with rows and secs also get a rows_per_sec rate.
+    """
+    stats = _current.get()
+    if stats is None:
+        return
+
+    entry = stats.setdefault(key, {})
+    for name, value in values.items():
+        entry[name] = entry.get(name, 0) + value
+
+    if entry.get("secs"):
+        entry["rows_per_sec"] = entry.get("rows", 0) / entry["secs"]
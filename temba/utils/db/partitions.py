@@ -0,0 +1,195 @@
+import re
+from datetime import datetime, timedelta, timezone as tzone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+PERIOD_DAY = "day"
+PERIOD_WEEK = "week"
+PERIOD_LENGTHS = {PERIOD_DAY: timedelta(days=1), PERIOD_WEEK: timedelta(days=7)}
+
+BOUND_REGEX = re.compile(r"FROM \((.+)\) TO \((.+)\)")
+
+
+def is_partitioned(table: str) -> bool:
+    """
+    Checks whether the given table is a partitioned table
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT EXISTS(SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass)", [table])
+        return cursor.fetchone()[0]
+
+
+def get_partitions(table: str) -> list[tuple]:
+    """
+    Gets the partitions of the given table as tuples of name, lower bound and upper bound ordered by lower bound, with
+    None used for unbounded ranges
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i
+            INNER JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = %s::regclass""",
+            [table],
+        )
+        rows = cursor.fetchall()
+
+    def parse_bound(value: str):
+        return None if value in ("MINVALUE", "MAXVALUE") else datetime.fromisoformat(value.strip("'"))
+
+    partitions = []
+    for name, bound in rows:
+        lower, upper = BOUND_REGEX.search(bound).groups()
+        partitions.append((name, parse_bound(lower), parse_bound(upper)))
+
+    return sorted(partitions, key=lambda p: p[1] or datetime.min.replace(tzinfo=tzone.utc))
+
+
+def get_periods_ahead(table: str, period: str) -> int:
+    """
+    Gets the number of whole periods after the current one which are covered by existing partitions of the given table
+    """
+    partitions = get_partitions(table)
+    if not partitions:
+        return 0
+
+    length = PERIOD_LENGTHS[period]
+    return (partitions[-1][2] - _period_start(timezone.now(), period) - length) // length
+
+
+def create_partitions(table: str, period: str, *, ahead: int = None) -> int:
+    """
+    Creates partitions of the given table for the current period and the given number of periods ahead (defaults to the
+    PARTITIONS_AHEAD setting), continuing from the last existing partition. Returns the number of partitions created.
+    """
+    ahead = settings.PARTITIONS_AHEAD if ahead is None else ahead
+    length = PERIOD_LENGTHS[period]
+    partitions = get_partitions(table)
+    until = _period_start(timezone.now(), period) + length * (ahead + 1)
+    start = partitions[-1][2] if partitions else _period_start(timezone.now(), period)
+    num_created = 0
+
+    with connection.cursor() as cursor:
+        while start < until:
+            end = _period_start(start, period) + length
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS "{table}_p{start:%Y%m%d}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+            start = end
+            num_created += 1
+
+    return num_created
+
+
+def drop_partitions(table: str, *, before: datetime) -> int:
+    """
+    Drops partitions of the given table which only contain rows older than the given time. Returns the number of
+    partitions dropped.
+    """
+    num_dropped = 0
+
+    for name, lower, upper in get_partitions(table):
+        if upper is None or upper > before:
+            break
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+            cursor.execute(f'DROP TABLE "{name}"')
+
+        num_dropped += 1
+
+    return num_dropped
+
+
+def partition_table(table: str, period: str):
+    """
+    Converts the given table into a table partitioned by range of created_on. The existing table is kept as a partition
+    for all rows up to the start of the next but one period, and is dropped as a whole once all its rows are old enough
+    to be trimmed. Only the final swap of tables takes an exclusive lock.
+    """
+    assert period in PERIOD_LENGTHS, f"invalid partition period {period}"
+
+    legacy = f"{table}_legacy"
+    cutoff = _period_start(timezone.now(), period) + PERIOD_LENGTHS[period] * 2
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname FROM pg_indexes WHERE tablename = %s AND indexdef LIKE 'CREATE UNIQUE%%'", [table]
+        )
+        unique_indexes = {r[0] for r in cursor.fetchall()} - {f"{table}_pkey", f"{table}_id_created_on"}
+        if unique_indexes:
+            raise ValueError(f"can't partition {table} because it has unique indexes besides its primary key")
+
+        # build a unique index that will back the partitioned table's primary key, and a validated check constraint
+        # that matches the bounds of the legacy partition so that attaching it doesn't require scanning it. Indexes
+        # can't be built concurrently inside a transaction.
+        concurrently = "" if connection.in_atomic_block else "CONCURRENTLY "
+        cursor.execute(
+            f'CREATE UNIQUE INDEX {concurrently}IF NOT EXISTS "{table}_id_created_on" ' f'ON "{table}" (id, created_on)'
+        )
+        cursor.execute(f'ALTER TABLE "{table}" DROP CONSTRAINT IF EXISTS "{table}_legacy_bounds"')
+        cursor.execute(
+            f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_legacy_bounds" '
+            f"CHECK (created_on < '{cutoff.isoformat()}') NOT VALID"
+        )
+        cursor.execute(f'ALTER TABLE "{table}" VALIDATE CONSTRAINT "{table}_legacy_bounds"')
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+        old_seq = cursor.fetchone()[0]
+
+        cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{legacy}"')
+        cursor.execute(
+            f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING STORAGE) '
+            f"PARTITION BY RANGE (created_on)"
+        )
+        cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_part_pkey" PRIMARY KEY (id, created_on)')
+
+        # identity columns get a new sequence which needs to continue from the old one, but serial columns keep using
+        # the old sequence which needs to be owned by the new table so that it survives the legacy table being dropped
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+        new_seq = cursor.fetchone()[0]
+        if new_seq and new_seq != old_seq:
+            cursor.execute("SELECT setval(%s, nextval(%s))", [new_seq, old_seq])
+            cursor.execute(f'ALTER TABLE "{legacy}" ALTER COLUMN id DROP IDENTITY IF EXISTS')
+        else:
+            cursor.execute(f'ALTER SEQUENCE {old_seq} OWNED BY "{table}".id')
+
+        # recreate foreign keys and non-unique indexes on the new table.. these will be matched to the existing ones on
+        # the legacy table when it's attached
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [legacy],
+        )
+        for name, definition in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{_suffixed(name)}" {definition}')
+
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexdef NOT LIKE 'CREATE UNIQUE%%'",
+            [legacy],
+        )
+        for name, definition in cursor.fetchall():
+            columns = definition.split(" USING ", maxsplit=1)[1]
+            cursor.execute(f'CREATE INDEX "{_suffixed(name)}" ON "{table}" USING {columns}')
+
+        cursor.execute(
+            f'ALTER TABLE "{table}" ATTACH PARTITION "{legacy}" '
+            f"FOR VALUES FROM (MINVALUE) TO ('{cutoff.isoformat()}')"
+        )
+        cursor.execute(f'ALTER TABLE "{legacy}" DROP CONSTRAINT "{table}_legacy_bounds"')
+
+        create_partitions(table, period)
+
+
+def _period_start(dt: datetime, period: str) -> datetime:
+    dt = dt.astimezone(tzone.utc)
+    start = datetime(dt.year, dt.month, dt.day, tzinfo=tzone.utc)
+    if period == PERIOD_WEEK:
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def _suffixed(name: str, suffix: str = "_part") -> str:
+    return name[: 63 - len(suffix)] + suffix  # postgres identifiers are limited to 63 bytes
@@ -1,7 +1,15 @@
+from datetime import datetime, timezone as tzone
+from unittest.mock import patch
+
+from django.db import connection
 from django.db.models import F, Value
+from django.test.utils import override_settings
 
+from temba.request_logs.models import HTTPLog
 from temba.tests import TembaTest
+from temba.utils.tasks import maintain_partitions
 
+from . import partitions
 from .functions import SplitPart
 
 
@@ -15,3 +23,82 @@ class FunctionsTest(TembaTest):
 
         self.assertEqual(count1.part1, "foo")
         self.assertEqual(count1.part2, "bar")
+
+
+class PartitionsTest(TembaTest):
+    def create_log(self, created_on):
+        return HTTPLog.objects.create(
+            org=self.org,
+            log_type=HTTPLog.WEBHOOK_CALLED,
+            url="http://example.com",
+            request="GET /",
+            request_time=10,
+            created_on=created_on,
+        )
+
+    @override_settings(PARTITIONED_TABLES={"request_logs_httplog": "day"}, PARTITIONS_AHEAD=2)
+    def test_partition_table(self):
+        table = HTTPLog._meta.db_table
+        log1 = self.create_log(datetime(2024, 6, 1, 10, 0, tzinfo=tzone.utc))
+        log2 = self.create_log(datetime(2024, 6, 5, 10, 0, tzinfo=tzone.utc))
+
+        self.assertFalse(partitions.is_partitioned(table))
+        self.assertEqual([], partitions.get_partitions(table))
+        self.assertEqual(0, partitions.drop_partitions(table, before=datetime(2024, 6, 5, tzinfo=tzone.utc)))
+
+        # tables can't be altered with pending deferred constraint checks
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+        with patch("django.utils.timezone.now", return_value=datetime(2024, 6, 5, 12, 0, tzinfo=tzone.utc)):
+            partitions.partition_table(table, "day")
+
+        self.assertTrue(partitions.is_partitioned(table))
+        self.assertEqual(
+            [
+                ("request_logs_httplog_legacy", None, datetime(2024, 6, 7, tzinfo=tzone.utc)),
+                (
+                    "request_logs_httplog_p20240607",
+                    datetime(2024, 6, 7, tzinfo=tzone.utc),
+                    datetime(2024, 6, 8, tzinfo=tzone.utc),
+                ),
+            ],
+            partitions.get_partitions(table),
+        )
+
+        # existing rows are still readable and new rows continue the id sequence
+        self.assertEqual({log1, log2}, set(HTTPLog.objects.all()))
+        log3 = self.create_log(datetime(2024, 6, 7, 10, 0, tzinfo=tzone.utc))
+        self.assertGreater(log3.id, log2.id)
+
+        # cron creates partitions ahead of time, and errors if the table was about to run out of partitions
+        with patch("django.utils.timezone.now", return_value=datetime(2024, 6, 8, 12, 0, tzinfo=tzone.utc)):
+            self.assertEqual(-1, partitions.get_periods_ahead(table, "day"))
+
+            with self.assertLogs("temba.utils.tasks", level="ERROR") as logs:
+                self.assertEqual({"created": 3}, maintain_partitions())
+
+            self.assertEqual(
+                ["ERROR:temba.utils.tasks:Table request_logs_httplog only has partitions for -1 day(s) ahead"],
+                logs.output,
+            )
+
+            with self.assertNoLogs("temba.utils.tasks", level="ERROR"):
+                self.assertEqual({"created": 0}, maintain_partitions())
+
+            self.assertEqual(2, partitions.get_periods_ahead(table, "day"))
+
+        self.assertEqual(5, len(partitions.get_partitions(table)))
+
+        # partitions are only dropped once all their rows are old enough
+        self.assertEqual(0, partitions.drop_partitions(table, before=datetime(2024, 6, 6, tzinfo=tzone.utc)))
+        self.assertEqual(1, partitions.drop_partitions(table, before=datetime(2024, 6, 7, 12, tzinfo=tzone.utc)))
+        self.assertEqual({log3}, set(HTTPLog.objects.all()))
+        self.assertEqual("request_logs_httplog_p20240607", partitions.get_partitions(table)[0][0])
+
+        self.assertEqual(2, partitions.drop_partitions(table, before=datetime(2024, 6, 9, tzinfo=tzone.utc)))
+        self.assertEqual(0, HTTPLog.objects.count())
+
+    def test_partition_table_with_unique_index(self):
+        with self.assertRaisesRegex(ValueError, "has unique indexes besides its primary key"):
+            partitions.partition_table("contacts_contact", "week")
@@ -1,11 +1,19 @@
+import itertools
 import json
+import logging
+import time
 import zlib
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
 from botocore.client import Config
 
 from django.conf import settings
 
+logger = logging.getLogger(__name__)
+
+BATCH_GET_MAX_KEYS = 100  # max number of keys DynamoDB allows in a single batch_get_item request
+
 _client = None
 
 
@@ -40,6 +48,40 @@ def table_name(logical_name: str) -> str:
     return settings.DYNAMO_TABLE_PREFIX + logical_name
 
 
+def batch_get(table: str, keys: list[dict], *, max_workers: int = 4, max_attempts: int = 5) -> list[dict]:
+    """
+    Fetches the items with the given keys from the given table, requesting batches of keys concurrently and retrying
+    any keys which DynamoDB leaves unprocessed (e.g. due to throttling) with exponential backoff
+    """
+
+    client = get_client()
+
+    def fetch(batch) -> list[dict]:
+        items = []
+        request = {table: {"Keys": list(batch)}}
+
+        for attempt in range(max_attempts):
+            if attempt > 0:
+                time.sleep(0.05 * 2**attempt)
+
+            resp = client.batch_get_item(RequestItems=request)
+            items.extend(resp["Responses"].get(table, []))
+            request = resp.get("UnprocessedKeys")
+
+            if not request:
+                return items
+
+        logger.error(f"unable to fetch {len(request[table]['Keys'])} items from {table} after {max_attempts} attempts")
+        return items
+
+    batches = list(itertools.batched(keys, BATCH_GET_MAX_KEYS))
+    if len(batches) <= 1:
+        return fetch(batches[0]) if batches else []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+        return list(itertools.chain.from_iterable(executor.map(fetch, batches)))
+
+
 def load_jsongz(data: bytes) -> dict:
     """
     Loads a value from gzipped JSON
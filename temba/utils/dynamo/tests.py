@@ -1,3 +1,5 @@
+from unittest.mock import MagicMock, patch
+
 from temba.tests import TembaTest
 from temba.utils import dynamo
 
@@ -15,3 +17,45 @@ class DynamoTest(TembaTest):
         data = dynamo.dump_jsongz({"foo": "bar"})
         self.assertEqual(34, len(data))
         self.assertEqual({"foo": "bar"}, dynamo.load_jsongz(data))
+
+    @patch("temba.utils.dynamo.base.time.sleep")
+    @patch("temba.utils.dynamo.base.get_client")
+    def test_batch_get(self, mock_get_client, mock_sleep):
+        client = MagicMock()
+        mock_get_client.return_value = client
+
+        self.assertEqual([], dynamo.batch_get("TestThings", []))
+
+        keys = [{"UUID": {"S": str(i)}} for i in range(150)]
+
+        def batch_get_item(RequestItems):
+            requested = RequestItems["TestThings"]["Keys"]
+
+            # leave the last key of a full batch unprocessed the first time round
+            if len(requested) == 100:
+                return {
+                    "Responses": {"TestThings": requested[:-1]},
+                    "UnprocessedKeys": {"TestThings": {"Keys": requested[-1:]}},
+                }
+            return {"Responses": {"TestThings": requested}, "UnprocessedKeys": {}}
+
+        client.batch_get_item.side_effect = batch_get_item
+
+        items = dynamo.batch_get("TestThings", keys)
+        self.assertEqual(150, len(items))
+        self.assertEqual({str(i) for i in range(150)}, {i["UUID"]["S"] for i in items})
+        self.assertEqual(3, client.batch_get_item.call_count)
+        self.assertEqual(1, mock_sleep.call_count)
+
+        # if keys are never processed, we give up after max attempts
+        client.batch_get_item.reset_mock()
+        client.batch_get_item.side_effect = lambda RequestItems: {
+            "Responses": {},
+            "UnprocessedKeys": RequestItems,
+        }
+
+        with patch("temba.utils.dynamo.base.logger.error") as mock_logger_error:
+            self.assertEqual([], dynamo.batch_get("TestThings", keys[:2], max_attempts=3))
+
+        self.assertEqual(3, client.batch_get_item.call_count)
+        mock_logger_error.assert_called_once_with("unable to fetch 2 items from TestThings after 3 attempts")
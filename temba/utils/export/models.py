@@ -1,12 +1,20 @@
+import csv
 import gc
+import gzip
+import io
 import logging
+import queue
+import threading
+import time
 from datetime import datetime
 
 from xlsxlite.writer import XLSXBook
 
 from django.core.files.temp import NamedTemporaryFile
+from django.db import connections
 from django.http import HttpResponse
 
+from temba.utils import json
 from temba.utils.text import clean_string
 
 logger = logging.getLogger(__name__)
@@ -86,6 +94,254 @@ class MultiSheetExporter:
         return temp_file, "xlsx"
 
 
+class StreamingExporter:
+    """
+    Base class for exporters which write gzipped rows straight to a binary stream, e.g. a file opened in storage which
+    is uploaded in parts as it's written. Unlike MultiSheetExporter, there is no temporary file and no limit on rows.
+    """
+
+    extension: str
+
+    def __init__(self, stream, headers: list, tz, *, write_headers: bool = True):
+        self.headers = headers
+        self.tz = tz
+
+        self._open(stream)
+
+        if write_headers:
+            self._write_headers()
+
+    def _open(self, stream):
+        self.stream = stream
+        self.counter = _CountingWriter(stream)
+        self.gzip = gzip.GzipFile(fileobj=self.counter, mode="wb")
+        self.text = io.TextIOWrapper(self.gzip, encoding="utf-8", newline="")
+
+    def _close(self):
+        self.text.close()  # also closes the gzip stream but not the stream it wraps
+        self.stream.close()
+
+    def _write_headers(self):
+        pass
+
+    def write_row(self, values):
+        assert len(values) == len(self.headers), "need same number of column values as column headers"
+
+        self._write_row(values)
+
+    def _write_row(self, values):  # pragma: no cover
+        pass
+
+    @property
+    def chunk_bytes(self) -> int:
+        """
+        Number of compressed bytes written to the current stream so far
+        """
+        return self.counter.num_bytes
+
+    def split(self, stream):
+        """
+        Finishes writing to the current stream and continues writing rows to the given stream. Each stream is a complete
+        gzip file and concatenating them gives a valid gzip file of all the rows.
+        """
+        self._close()
+        self._open(stream)
+
+    def save_file(self):
+        """
+        Finishes writing to our stream, returning no temporary file (as everything has been written) and the extension
+        """
+        self._close()
+
+        return None, self.extension
+
+
+class _CountingWriter:
+    """
+    Wraps a binary stream to count the bytes written to it
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.num_bytes = 0
+
+    def write(self, data) -> int:
+        self.num_bytes += len(data)
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+
+class CSVExporter(StreamingExporter):
+    """
+    Exporter which writes gzipped CSV
+    """
+
+    extension = "csv.gz"
+
+    def _open(self, stream):
+        super()._open(stream)
+
+        self.writer = csv.writer(self.text)
+
+    def _write_headers(self):
+        self.writer.writerow(self.headers)
+
+    def _write_row(self, values):
+        self.writer.writerow([prepare_value(v, self.tz) for v in values])
+
+
+class JSONLExporter(StreamingExporter):
+    """
+    Exporter which writes gzipped JSONL with each row as an object keyed by header
+    """
+
+    extension = "jsonl.gz"
+
+    def __init__(self, stream, headers: list, tz, *, write_headers: bool = True):
+        super().__init__(stream, headers, tz, write_headers=write_headers)
+
+        # repeated headers (e.g. contacts with multiple URNs of the same scheme) get numbered keys
+        self.keys = []
+        seen = {}
+        for header in headers:
+            seen[header] = seen.get(header, 0) + 1
+            self.keys.append(header if seen[header] == 1 else f"{header} {seen[header]}")
+
+    def _write_row(self, values):
+        row = {k: clean_string(v) if isinstance(v, str) else v for k, v in zip(self.keys, values)}
+
+        self.text.write(json.dumps(row))
+        self.text.write("\n")
+
+
+class Pipeline:
+    """
+    Runs a source of batches through a sequence of named stage functions, yielding the output of the last stage. If
+    threaded, the source and each stage run in their own thread, connected by bounded queues, so that database fetching
+    and CPU bound work can overlap with the consumer. Time spent in each stage is recorded in timings.
+    """
+
+    _END = object()
+
+    def __init__(self, source, stages: list, *, threaded: bool = True, queue_size: int = 4):
+        self.source = source
+        self.stages = stages
+        self.threaded = threaded
+        self.queue_size = queue_size
+
+        self.timings = {"fetch": 0.0, **{name: 0.0 for name, _ in stages}, "write": 0.0}
+
+    def __iter__(self):
+        return self._iter_threaded() if self.threaded else self._iter_inline()
+
+    def _iter_inline(self):
+        source = iter(self.source)
+
+        while True:
+            start = time.perf_counter()
+            batch = next(source, self._END)
+            self.timings["fetch"] += time.perf_counter() - start
+
+            if batch is self._END:
+                break
+
+            for name, func in self.stages:
+                start = time.perf_counter()
+                batch = func(batch)
+                self.timings[name] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            yield batch
+            self.timings["write"] += time.perf_counter() - start
+
+    def _iter_threaded(self):
+        stop = threading.Event()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        errors = []
+
+        def put(q, item) -> bool:
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def get(q):
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            return self._END
+
+        def run_source():
+            source = iter(self.source)
+            try:
+                while True:
+                    start = time.perf_counter()
+                    batch = next(source, self._END)
+                    self.timings["fetch"] += time.perf_counter() - start
+
+                    if batch is self._END or not put(queues[0], batch):
+                        break
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                put(queues[0], self._END)
+                connections.close_all()
+
+        def run_stage(index: int, name: str, func):
+            try:
+                while True:
+                    batch = get(queues[index])
+                    if batch is self._END:
+                        break
+
+                    start = time.perf_counter()
+                    batch = func(batch)
+                    self.timings[name] += time.perf_counter() - start
+
+                    if not put(queues[index + 1], batch):
+                        break
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                put(queues[index + 1], self._END)
+                connections.close_all()
+
+        threads = [threading.Thread(target=run_source, name="pipeline-fetch", daemon=True)]
+        for i, (name, func) in enumerate(self.stages):
+            threads.append(
+                threading.Thread(target=run_stage, args=(i, name, func), name=f"pipeline-{name}", daemon=True)
+            )
+
+        for t in threads:
+            t.start()
+
+        try:
+            while True:
+                batch = get(queues[-1])
+                if batch is self._END:
+                    break
+
+                start = time.perf_counter()
+                yield batch
+                self.timings["write"] += time.perf_counter() - start
+        finally:
+            stop.set()
+            for t in threads:
+                t.join()
+
+        if errors:
+            raise errors[0]
+
+
 def response_from_workbook(workbook, filename: str) -> HttpResponse:
     """
     Creates an HTTP response from an openpyxl workbook
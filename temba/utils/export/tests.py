@@ -1,15 +1,24 @@
+import gzip
+import io
 import os
+import threading
 from datetime import datetime
 from unittest.mock import PropertyMock, patch
 from zoneinfo import ZoneInfo
 
 from openpyxl import load_workbook
 
-from temba.contacts.models import ContactExport
-from temba.orgs.models import Export
+from django.core.files.storage import default_storage
+from django.test import TransactionTestCase, override_settings
+
+from temba.contacts.models import URN, ContactExport, ContactGroup
+from temba.orgs.models import Export, Org, OrgRole
 from temba.tests import TembaTest
+from temba.tests.mailroom import create_contact_locally
+from temba.users.models import User
+from temba.utils import json
 
-from .models import MultiSheetExporter, prepare_value
+from .models import CSVExporter, JSONLExporter, MultiSheetExporter, Pipeline, prepare_value
 
 
 class ExportTest(TembaTest):
@@ -107,3 +116,187 @@ class ExportTest(TembaTest):
         self.assertEqual(32 + 16, len(list(sheet2.columns)))
 
         os.unlink(temp_file.name)
+
+    def test_csvexporter(self):
+        stream = io.BytesIO()
+        stream.close = lambda: None  # so we can read it after saving
+
+        exporter = CSVExporter(stream, ["Name", "Age", "Joined", "Notes"], self.org.timezone)
+        exporter.write_row(["Bob", 23, datetime(2017, 2, 7, 15, 41, 23, 123_456, ZoneInfo("UTC")), "=1+2"])
+        exporter.write_row(["Jim, Jr", None, None, 'Says "hi"'])
+
+        self.assertEqual((None, "csv.gz"), exporter.save_file())
+        self.assertEqual(
+            'Name,Age,Joined,Notes\r\nBob,23,2017-02-07 17:41:23,\'=1+2\r\n"Jim, Jr",,,"Says ""hi"""\r\n',
+            gzip.decompress(stream.getvalue()).decode("utf-8"),
+        )
+
+        with self.assertRaises(AssertionError):
+            exporter.write_row(["Ann"])
+
+        # can split output across multiple streams which concatenate to a single gzip file
+        stream1, stream2 = io.BytesIO(), io.BytesIO()
+        stream1.close = stream2.close = lambda: None
+
+        exporter = CSVExporter(stream1, ["Name", "Age"], self.org.timezone)
+        exporter.write_row(["Bob", 23])
+        exporter.split(stream2)
+        exporter.write_row(["Jim", 34])
+        exporter.save_file()
+
+        self.assertEqual(
+            "Name,Age\r\nBob,23\r\nJim,34\r\n",
+            gzip.decompress(stream1.getvalue() + stream2.getvalue()).decode("utf-8"),
+        )
+
+        # and continue writing without headers
+        stream = io.BytesIO()
+        stream.close = lambda: None
+
+        exporter = CSVExporter(stream, ["Name", "Age"], self.org.timezone, write_headers=False)
+        exporter.write_row(["Ann", 45])
+        exporter.save_file()
+
+        self.assertEqual("Ann,45\r\n", gzip.decompress(stream.getvalue()).decode("utf-8"))
+
+    def test_jsonlexporter(self):
+        stream = io.BytesIO()
+        stream.close = lambda: None
+
+        exporter = JSONLExporter(stream, ["Name", "URN:Tel", "URN:Tel", "Joined"], self.org.timezone)
+        exporter.write_row(
+            ["Bob", "+250781111111", "+250782222222", datetime(2017, 2, 7, 15, 41, 23, 0, ZoneInfo("UTC"))]
+        )
+        exporter.write_row(["Jim", None, None, None])
+
+        self.assertEqual((None, "jsonl.gz"), exporter.save_file())
+
+        lines = gzip.decompress(stream.getvalue()).decode("utf-8").splitlines()
+        self.assertEqual(
+            [
+                {
+                    "Name": "Bob",
+                    "URN:Tel": "+250781111111",
+                    "URN:Tel 2": "+250782222222",
+                    "Joined": "2017-02-07T15:41:23.000Z",
+                },
+                {"Name": "Jim", "URN:Tel": None, "URN:Tel 2": None, "Joined": None},
+            ],
+            [json.loads(line) for line in lines],
+        )
+
+    def test_streamed_export(self):
+        bob = self.create_contact("Bob", phone="+250781111111")
+        jim = self.create_contact("Jim", phone="+250782222222")
+        group = self.create_group("Streamed", contacts=[bob, jim])
+
+        export = ContactExport.create(org=self.org, user=self.admin, group=group, format=Export.FORMAT_CSV)
+        self.assertEqual("csv", export.get_format())
+
+        export.perform()
+
+        self.assertEqual(Export.STATUS_COMPLETE, export.status)
+        self.assertEqual(2, export.num_records)
+        self.assertEqual(f"orgs/{self.org.id}/contact_exports/{export.uuid}.csv.gz", export.path)
+        self.assertTrue(export._get_download_filename().endswith(".csv.gz"))
+
+        with default_storage.open(export.path, "rb") as f:
+            lines = gzip.decompress(f.read()).decode("utf-8").splitlines()
+
+        self.assertEqual(3, len(lines))
+        self.assertTrue(lines[0].startswith("Contact UUID,Name,Language,Status"))
+
+        # time spent in each stage is recorded
+        self.assertEqual({"fetch", "enrich", "serialize", "write"}, set(export.timings.keys()))
+
+    def test_pipeline(self):
+        def enrich(batch):
+            return [(n, n * 2) for n in batch]
+
+        def serialize(batch):
+            return [f"{n}={m}" for n, m in batch]
+
+        for threaded in (False, True):
+            pipeline = Pipeline(
+                ([i, i + 1] for i in range(0, 100, 2)),
+                [("enrich", enrich), ("serialize", serialize)],
+                threaded=threaded,
+                queue_size=2,
+            )
+            rows = [row for batch in pipeline for row in batch]
+
+            self.assertEqual([f"{n}={n * 2}" for n in range(100)], rows)
+            self.assertEqual({"fetch", "enrich", "serialize", "write"}, set(pipeline.timings.keys()))
+
+            # errors in the source or in stages are raised to the consumer
+            def bad_source():
+                yield [1]
+                raise ValueError("bad source")
+
+            def bad_stage(batch):
+                raise ValueError("bad stage")
+
+            with self.assertRaisesRegex(ValueError, "bad source"):
+                list(Pipeline(bad_source(), [("enrich", enrich)], threaded=threaded))
+
+            with self.assertRaisesRegex(ValueError, "bad stage"):
+                list(Pipeline(bad_source(), [("enrich", bad_stage)], threaded=threaded))
+
+
+@override_settings(EXPORTS_PIPELINED=True)
+class PipelinedExportTest(TransactionTestCase):
+    """
+    Pipelined exports fetch and enrich batches in worker threads with their own database connections, which can only see
+    committed data and so can't be tested inside the transaction of a regular test case.
+    """
+
+    databases = ("default", "readonly")
+
+    def setUp(self):
+        super().setUp()
+
+        self.admin = User.objects.create_user("admin@textit.com", "Qwerty123")
+        self.org = Org.objects.create(
+            name="Nyaruka", timezone=ZoneInfo("Africa/Kigali"), created_by=self.admin, modified_by=self.admin
+        )
+        self.org.initialize(sample_flows=False)
+        self.org.add_user(self.admin, OrgRole.ADMINISTRATOR)
+
+        self.group = ContactGroup.create_manual(self.org, self.admin, "Customers")
+        self.contacts = [
+            create_contact_locally(
+                self.org, self.admin, f"Contact {i}", "eng", [URN.from_tel(f"+25078111{i:04d}")], {}, []
+            )
+            for i in range(25)
+        ]
+        self.group.contacts.add(*self.contacts)
+
+    def assertNoPipelineThreads(self):
+        self.assertEqual([], [t.name for t in threading.enumerate() if t.name.startswith("pipeline-")])
+
+    def test_export(self):
+        export = ContactExport.create(self.org, self.admin, group=self.group, format=Export.FORMAT_CSV)
+        export.perform()
+
+        export.refresh_from_db()
+        self.assertEqual(Export.STATUS_COMPLETE, export.status)
+        self.assertEqual(25, export.num_records)
+        self.assertEqual({"fetch", "enrich", "serialize", "write"}, set(export.timings.keys()))
+        self.assertNoPipelineThreads()
+
+        with default_storage.open(export.path, "rb") as f:
+            lines = gzip.decompress(f.read()).decode("utf-8").splitlines()
+
+        self.assertEqual(26, len(lines))
+        self.assertEqual([str(c.uuid) for c in self.contacts], [line.split(",")[0] for line in lines[1:]])
+
+        # an error in a worker thread is raised by the export, which is marked as failed, and all threads are stopped
+        export = ContactExport.create(self.org, self.admin, group=self.group, format=Export.FORMAT_CSV)
+
+        with patch("temba.contacts.models.Contact.bulk_urn_cache_initialize", side_effect=ValueError("db gone")):
+            with self.assertRaisesRegex(ValueError, "db gone"):
+                export.perform()
+
+        export.refresh_from_db()
+        self.assertEqual(Export.STATUS_FAILED, export.status)
+        self.assertNoPipelineThreads()
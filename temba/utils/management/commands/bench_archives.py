@@ -0,0 +1,71 @@
+import gzip
+import io
+import time
+
+from django.core.management import BaseCommand
+
+from temba.archives.models import Archive, jsonlgz_encode, jsonlgz_iterate, jsonlgz_iterate_blocks, jsonlgz_rewrite
+from temba.utils import json
+
+
+class Command(BaseCommand):  # pragma: no cover
+    help = "Benchmarks decoding and rewriting of archive files as a single gzip member compared to blocks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--records", type=int, action="store", dest="num_records", default=500_000)
+
+    def handle(self, num_records: int, *args, **kwargs):
+        self.stdout.write(f"Generating {num_records} records...")
+
+        records = [
+            {
+                "id": i,
+                "uuid": f"{i:08x}-2f1b-4c3e-9d6a-0b5e1c2d3f4a",
+                "contact": {"uuid": f"{i % 1000:08x}-4d5e-4f6a-8b7c-9d0e1f2a3b4c", "name": f"Contact {i % 1000}"},
+                "direction": "in" if i % 2 else "out",
+                "text": f"Message number {i} with some text to make it a more realistic size",
+                "visibility": "visible",
+                "created_on": "2024-08-14T10:00:00.123456Z",
+            }
+            for i in range(num_records)
+        ]
+
+        legacy = gzip.compress(b"".join(json.dumps(r).encode("utf-8") + b"\n" for r in records))
+        stream, _, _ = jsonlgz_encode(records)
+        blocked = stream.getvalue()
+        blocks = []
+        for _ in jsonlgz_iterate(io.BytesIO(blocked), on_block=blocks.append):
+            pass
+
+        self.stdout.write(f" > single member: {len(legacy):>12} bytes")
+        self.stdout.write(f" > blocks:        {len(blocked):>12} bytes in {len(blocks)} blocks")
+
+        self._bench("decode (single)", len(legacy), lambda: sum(1 for _ in jsonlgz_iterate(io.BytesIO(legacy))))
+        self._bench("decode (blocks)", len(blocked), lambda: sum(1 for _ in jsonlgz_iterate(io.BytesIO(blocked))))
+        self._bench(
+            "decode (parallel)",
+            len(blocked),
+            lambda: sum(
+                1 for _ in jsonlgz_iterate_blocks(io.BytesIO(blocked), blocks, num_workers=Archive.DECODE_WORKERS)
+            ),
+        )
+
+        # rewrite that only touches a single record
+        def redact_one(record):
+            if record["id"] == num_records // 2:
+                record["text"] = ""
+            return record
+
+        self._bench(
+            "rewrite (single)", len(legacy), lambda: jsonlgz_rewrite(io.BytesIO(legacy), io.BytesIO(), redact_one)
+        )
+        self._bench(
+            "rewrite (blocks)", len(blocked), lambda: jsonlgz_rewrite(io.BytesIO(blocked), io.BytesIO(), redact_one)
+        )
+
+    def _bench(self, name: str, num_bytes: int, func):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(f" > {name:<18} elapsed={elapsed:>8.2f}s MB/sec={num_bytes / elapsed / 1_000_000:>8.1f}")
@@ -0,0 +1,61 @@
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone as tzone
+
+from django.core.management import BaseCommand
+
+from temba.utils.export import CSVExporter, JSONLExporter, MultiSheetExporter
+
+NUM_COLS = 20
+
+
+class Command(BaseCommand):  # pragma: no cover
+    help = "Benchmarks the throughput and memory usage of the different export formats."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, action="store", dest="num_rows", default=100_000)
+
+    def handle(self, num_rows: int, *args, **kwargs):
+        headers = [f"Column {c}" for c in range(NUM_COLS)]
+        now = datetime.now(tzone.utc)
+        rows = [self._row(r, now) for r in range(1000)]
+
+        self.stdout.write(f"Writing {num_rows} rows of {NUM_COLS} columns...")
+
+        self._bench("xlsx", lambda: MultiSheetExporter("Bench", headers, tzone.utc), rows, num_rows)
+
+        for exporter_class in (CSVExporter, JSONLExporter):
+            out = tempfile.NamedTemporaryFile(delete=False)
+            self._bench(exporter_class.extension, lambda: exporter_class(out, headers, tzone.utc), rows, num_rows)
+
+    def _row(self, num: int, now) -> list:
+        values = [f"Row {num}", num, num % 2 == 0, now - timedelta(minutes=num), None]
+        return (values * (NUM_COLS // len(values) + 1))[:NUM_COLS]
+
+    def _bench(self, name: str, create_exporter, rows: list, num_rows: int):
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+
+        exporter = create_exporter()
+        for r in range(num_rows):
+            exporter.write_row(rows[r % len(rows)])
+
+        temp_file, extension = exporter.save_file()
+
+        elapsed = time.perf_counter() - start
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # streaming exporters don't return a temp file as they've already written to their stream
+        path = temp_file.name if temp_file else exporter.stream.name
+        size = os.path.getsize(path)
+        os.unlink(path)
+
+        self.stdout.write(
+            f" > {name:<8} rows/sec={num_rows / elapsed:>10.0f} peak_mem={peak_bytes / 1_000_000:>8.1f}MB "
+            f"file={size / 1_000_000:.1f}MB"
+        )
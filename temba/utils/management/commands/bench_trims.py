@@ -0,0 +1,92 @@
+import time
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.db import connection
+
+from temba.utils.db import partitions
+
+PLAIN_TABLE = "bench_trims_plain"
+PARTITIONED_TABLE = "bench_trims_partitioned"
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):  # pragma: no cover
+    help = "Benchmarks trimming old rows by batched deletes compared to dropping partitions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, action="store", dest="num_rows", default=1_000_000)
+        parser.add_argument("--days", type=int, action="store", dest="num_days", default=10)
+
+    def handle(self, num_rows: int, num_days: int, *args, **kwargs):
+        self.stdout.write(f"Creating tables with {num_rows} rows over {num_days} days...")
+
+        with connection.cursor() as cursor:
+            for table in (PLAIN_TABLE, PARTITIONED_TABLE):
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+            cursor.execute(
+                f"CREATE TABLE {PLAIN_TABLE} (id bigserial PRIMARY KEY, created_on timestamptz NOT NULL, data text)"
+            )
+            cursor.execute(f"CREATE INDEX ON {PLAIN_TABLE} (created_on)")
+            cursor.execute(
+                f"""INSERT INTO {PLAIN_TABLE} (created_on, data)
+                SELECT date_trunc('day', NOW()) - (%s - (i * %s / %s)) * INTERVAL '1 day', repeat('x', 200)
+                FROM generate_series(0, %s - 1) i""",
+                [num_days, num_days, num_rows, num_rows],
+            )
+            cursor.execute(
+                f"""CREATE TABLE {PARTITIONED_TABLE} (id bigint NOT NULL, created_on timestamptz NOT NULL, data text,
+                PRIMARY KEY (id, created_on)) PARTITION BY RANGE (created_on)"""
+            )
+            cursor.execute(f"CREATE INDEX ON {PARTITIONED_TABLE} (created_on)")
+            cursor.execute(
+                f"SELECT generate_series(MIN(created_on), MAX(created_on), INTERVAL '1 day') FROM {PLAIN_TABLE}"
+            )
+            for (day,) in cursor.fetchall():
+                cursor.execute(
+                    f"CREATE TABLE {PARTITIONED_TABLE}_p{day:%Y%m%d} PARTITION OF {PARTITIONED_TABLE} "
+                    f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+                )
+
+            cursor.execute(f"INSERT INTO {PARTITIONED_TABLE} SELECT * FROM {PLAIN_TABLE}")
+            cursor.execute("SELECT date_trunc('day', NOW()) - make_interval(days => %s)", [num_days // 2])
+            trim_before = cursor.fetchone()[0]
+
+        self.stdout.write(f"Trimming rows older than {trim_before.isoformat()}...")
+
+        self._bench("batches", PLAIN_TABLE, lambda: self._trim_by_batches(trim_before))
+        self._bench(
+            "partitions", PARTITIONED_TABLE, lambda: partitions.drop_partitions(PARTITIONED_TABLE, before=trim_before)
+        )
+
+        with connection.cursor() as cursor:
+            for table in (PLAIN_TABLE, PARTITIONED_TABLE):
+                cursor.execute(f"DROP TABLE {table}")
+
+    def _trim_by_batches(self, trim_before):
+        with connection.cursor() as cursor:
+            while True:
+                cursor.execute(
+                    f"DELETE FROM {PLAIN_TABLE} WHERE id IN "
+                    f"(SELECT id FROM {PLAIN_TABLE} WHERE created_on < %s LIMIT %s)",
+                    [trim_before, BATCH_SIZE],
+                )
+                if cursor.rowcount < BATCH_SIZE:
+                    break
+
+    def _bench(self, name: str, table: str, trim):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            before_count = cursor.fetchone()[0]
+
+            start = time.perf_counter()
+            trim()
+            elapsed = time.perf_counter() - start
+
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            num_trimmed = before_count - cursor.fetchone()[0]
+
+        self.stdout.write(
+            f" > {name:<10} trimmed={num_trimmed:>10} elapsed={elapsed:>8.2f}s rows/sec={num_trimmed / elapsed:>12.0f}"
+        )
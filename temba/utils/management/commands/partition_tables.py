@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from temba.utils.db import partitions
+
+
+class Command(BaseCommand):
+    help = "Converts tables configured in PARTITIONED_TABLES into partitioned tables if they aren't already."
+
+    def handle(self, *args, **kwargs):
+        for table, period in settings.PARTITIONED_TABLES.items():
+            if period not in partitions.PERIOD_LENGTHS:
+                raise CommandError(f"Invalid partition period '{period}' for {table}")
+
+            if partitions.is_partitioned(table):
+                self.stdout.write(f"Skipping {table} which is already partitioned")
+                continue
+
+            self.stdout.write(f"Partitioning {table} by {period}...", ending="")
+            self.stdout.flush()
+
+            partitions.partition_table(table, period)
+
+            self.stdout.write(self.style.SUCCESS(" OK"))
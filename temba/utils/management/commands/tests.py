@@ -1,6 +1,7 @@
 from io import StringIO
 
-from django.core.management import call_command
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.test.utils import override_settings
 
 from temba.tests import TembaTest
@@ -37,3 +38,24 @@ class MigrateDynamoTest(TembaTest):
         call_command("migrate_dynamo", stdout=out)
 
         self.assertIn("Skipping TempChannelLogs", out.getvalue())
+
+
+class PartitionTablesTest(TembaTest):
+    @override_settings(PARTITIONED_TABLES={"request_logs_httplog": "day"})
+    def test_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+        out = StringIO()
+        call_command("partition_tables", stdout=out)
+
+        self.assertIn("Partitioning request_logs_httplog by day... OK", out.getvalue())
+
+        out = StringIO()
+        call_command("partition_tables", stdout=out)
+
+        self.assertIn("Skipping request_logs_httplog which is already partitioned", out.getvalue())
+
+        with override_settings(PARTITIONED_TABLES={"request_logs_httplog": "month"}):
+            with self.assertRaisesRegex(CommandError, "Invalid partition period 'month' for request_logs_httplog"):
+                call_command("partition_tables", stdout=StringIO())
@@ -1,3 +1,4 @@
+import time
 import types
 from enum import Enum
 
@@ -5,8 +6,10 @@ from smartmin.models import SmartModel
 
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 
+from temba.utils.crons import record_stats
 from temba.utils.fields import NameValidator
 from temba.utils.uuid import is_uuid, uuid4
 
@@ -25,17 +28,36 @@ def patch_queryset_count(qs, function):
     qs.count = types.MethodType(lambda s: function(), qs)
 
 
-def delete_in_batches(qs, *, batch_size: int = 1000, pk: str = "id", pre_delete=None, post_delete=None) -> int:
+def delete_in_batches(
+    qs,
+    *,
+    batch_size: int = 1000,
+    target_secs: float = 0.5,
+    pk: str = "id",
+    pre_delete=None,
+    post_delete=None,
+) -> int:
     """
     Deletes objects from the given queryset in batches returning the number deleted. Callback functions can be provided
     as `pre_delete` and `post_delete` which will be called pre and post batch deletion respectively. If `post_delete`
     returns falsey then batch processing stops.
+
+    Batches are selected by walking the primary key range so each selection continues from the end of the previous
+    batch. If `target_secs` is set then the batch size is adjusted between a tenth and ten times the given batch size so
+    that each batch takes roughly that long. Stats are recorded for the current cron task, if there is one.
     """
 
-    num_deleted = 0
+    qs = qs.order_by(pk)
+    min_size, max_size = max(1, batch_size // 10), batch_size * 10
+    size = batch_size
+    last = None
+    num_deleted, num_batches = 0, 0
+    started = time.perf_counter()
 
     while True:
-        pk_batch = list(qs.values_list(pk, flat=True)[:batch_size])
+        batch_started = time.perf_counter()
+        batch_qs = qs.filter(**{f"{pk}__gt": last}) if last is not None else qs
+        pk_batch = list(batch_qs.values_list(pk, flat=True)[:size])
         if not pk_batch:
             break
 
@@ -44,13 +66,67 @@ def delete_in_batches(qs, *, batch_size: int = 1000, pk: str = "id", pre_delete=
 
         qs.model.objects.filter(**{f"{pk}__in": pk_batch}).delete()
         num_deleted += len(pk_batch)
+        num_batches += 1
+        last = pk_batch[-1]
+
+        if target_secs:
+            # scale towards the target time, but by no more than a factor of 2 each time so one slow batch doesn't
+            # collapse the batch size
+            elapsed = max(time.perf_counter() - batch_started, 0.001)
+            size = int(min(max_size, max(min_size, size * min(2.0, max(0.5, target_secs / elapsed)))))
 
         if post_delete and not post_delete():
             break
 
+    record_stats(
+        f"delete:{qs.model._meta.db_table}",
+        rows=num_deleted,
+        batches=num_batches,
+        secs=time.perf_counter() - started,
+    )
+
     return num_deleted
 
 
+def iter_keyset_batches(qs, *, keys: tuple = ("created_on", "id"), batch_size: int = 1000, after: tuple = None):
+    """
+    Iterates over the given queryset in batches ordered by the given keys, using keyset pagination so that each batch is
+    a range query continuing from the last object of the previous batch. Unlike fetching ids up front, memory use doesn't
+    grow with the size of the queryset. The last key should be unique and all keys should be immutable fields, or at
+    least fields which can't change while iterating. Any select_related or prefetch_related on the queryset is applied
+    to each batch. If after is provided, iteration starts after the object with those key values.
+    """
+
+    qs = qs.order_by(*keys)
+    last = after
+
+    while True:
+        batch_qs = qs
+        if last is not None:
+            batch_qs = batch_qs.filter(_keyset_after(keys, last))
+
+        batch = list(batch_qs[:batch_size])
+        if batch:
+            yield batch
+
+        if len(batch) < batch_size:
+            break
+
+        last = tuple(getattr(batch[-1], k) for k in keys)
+
+
+def _keyset_after(keys: tuple, values: tuple) -> Q:
+    """
+    Builds a Q object for rows after the given values of the given keys, e.g. (a > x) OR (a = x AND b > y)
+    """
+    condition = Q(**{f"{keys[-1]}__gt": values[-1]})
+
+    for key, value in zip(reversed(keys[:-1]), reversed(values[:-1])):
+        condition = Q(**{f"{key}__gt": value}) | (Q(**{key: value}) & condition)
+
+    return condition
+
+
 def update_if_changed(obj, **kwargs) -> bool:
     """
     Updates the given model instance with the given values, saving it if a change was made.
@@ -1,5 +1,9 @@
+import time
+
+from django_redis import get_redis_connection
+
 from django.db import connection, models
-from django.db.models import Q, Sum
+from django.db.models import Max, Q, Sum, Value
 
 from temba.utils.db.queries import or_list
 
@@ -23,6 +27,14 @@ class BaseSquashableCount(models.Model):
 
     squash_over = ()
     squash_max_distinct = 5000
+    squash_batch_size = 500  # number of distinct sets squashed by each statement
+
+    # SQL expressions for the values of squashed rows, and the condition for a squashed row to be kept
+    squash_values = {"count": 'SUM("count")'}
+    squash_keep_if = 'SUM("count") != 0'
+
+    totals_cache_ttl = 60 * 60  # cached totals are rebuilt at least this often
+    totals_settle_secs = 10  # counts are only cached once any counts with lower ids must have been committed
 
     id = models.BigAutoField(auto_created=True, primary_key=True)
     count = models.IntegerField()
@@ -39,49 +51,241 @@ class BaseSquashableCount(models.Model):
         return cls.objects.filter(is_squashed=False)
 
     @classmethod
-    def squash(cls) -> int:
+    def squash(cls) -> dict:
         """
         Squashes all distinct sets of counts with unsquashed rows into a single row if they sum to non-zero or just
-        deletes them if they sum to zero. Returns the number of sets squashed.
+        deletes them if they sum to zero. Sets are squashed in batches with a single statement per batch. Returns the
+        number of sets and rows squashed, and the rate at which rows were squashed.
         """
 
-        num_sets = 0
-        squash_over = cls.get_squash_over()
-        distinct_sets = (
-            cls.get_unsquashed()
-            .values(*squash_over)
-            .order_by(*squash_over)
-            .distinct(*squash_over)[: cls.squash_max_distinct]
-        )
+        start = time.perf_counter()
+        num_sets, num_rows = 0, 0
+        keys_sql = cls.get_batch_keys_query()
+        squash_sql = cls.get_batch_squash_query()
+
+        while num_sets < cls.squash_max_distinct:
+            batch_size = min(cls.squash_batch_size, cls.squash_max_distinct - num_sets)
 
-        for distinct_set in distinct_sets:
             with connection.cursor() as cursor:
-                sql, params = cls.get_squash_query(distinct_set)
+                cursor.execute(keys_sql, (batch_size,))
+                keys = cursor.fetchall()
+
+            if not keys:
+                break
 
-                cursor.execute(sql, params)
+            # squashing replaces counts with new rows, so cached totals of the owners in this batch can't be used until
+            # it's committed, and then they need new cached totals
+            owner_ids = list({k[0] for k in keys})
+            cls._start_squashing(owner_ids)
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(squash_sql, [list(values) for values in zip(*keys)])
+                    num_rows += cursor.fetchone()[0]
+            finally:
+                cls._end_squashing(owner_ids)
 
-            num_sets += 1
+            num_sets += len(keys)
 
-        return num_sets
+            if len(keys) < batch_size:
+                break
+
+        elapsed = time.perf_counter() - start
+
+        return {"sets": num_sets, "rows": num_rows, "rows_per_sec": round(num_rows / elapsed) if elapsed else 0}
+
+    @classmethod
+    def get_batch_keys_query(cls) -> str:
+        """
+        Gets the SQL to select the next batch of distinct sets with unsquashed rows, which takes the batch size as a
+        parameter
+        """
+        table = cls._meta.db_table
+        key_cols = ", ".join([f'"{col}"' for col in cls.get_squash_over()])
+
+        return f'SELECT DISTINCT {key_cols} FROM {table} WHERE NOT "is_squashed" ORDER BY {key_cols} LIMIT %s'
 
     @classmethod
-    def get_squash_query(cls, distinct_set: dict) -> tuple:
+    def get_batch_squash_query(cls) -> str:
+        """
+        Gets the SQL to squash a batch of distinct sets, which takes an array of values for each column that counts are
+        squashed over as parameters, and returns the number of rows squashed
+        """
+        table = cls._meta.db_table
         squash_over = cls.get_squash_over()
-        delete_cond = " AND ".join([f'"{col}" = %s' for col in squash_over])
-        insert_cols = ", ".join([f'"{col}"' for col in squash_over])
-        insert_vals = ", ".join(["%s"] * len(squash_over))
+        fields = {f.column: f for f in cls._meta.concrete_fields}
+        nullable = {c for c, f in fields.items() if f.null}
 
-        sql = f"""
-        WITH removed as (
-            DELETE FROM {cls._meta.db_table} WHERE {delete_cond} RETURNING "count"
+        key_cols = ", ".join([f'"{col}"' for col in squash_over])
+        key_arrays = ", ".join([f"%s::{fields[col].db_type(connection)}[]" for col in squash_over])
+        join_cond = " AND ".join(
+            [f't."{c}" IS NOT DISTINCT FROM k."{c}"' if c in nullable else f't."{c}" = k."{c}"' for c in squash_over]
+        )
+        value_cols = ", ".join([f'"{col}"' for col in cls.squash_values.keys()])
+        value_exprs = ", ".join(cls.squash_values.values())
+        having = f"HAVING {cls.squash_keep_if}" if cls.squash_keep_if else ""
+
+        return f"""
+        WITH keys AS (
+            SELECT * FROM UNNEST({key_arrays}) AS k({key_cols})
+        ), removed AS (
+            DELETE FROM {table} t USING keys k WHERE {join_cond} RETURNING t.*
+        ), inserted AS (
+            INSERT INTO {table}({key_cols}, {value_cols}, "is_squashed")
+            SELECT {key_cols}, {value_exprs}, TRUE FROM removed GROUP BY {key_cols} {having}
         )
-        INSERT INTO {cls._meta.db_table}({insert_cols}, "count", "is_squashed")
-        SELECT {insert_vals}, s.total, TRUE FROM (
-            SELECT COALESCE(SUM("count"), 0) AS "total" FROM removed
-        ) s WHERE s.total != 0;
+        SELECT COUNT(*) FROM removed;
+        """
+
+    @classmethod
+    def get_cached_totals(cls, owner_ids, *, prefix: str = None, using: str = "default") -> dict[int, dict[str, int]]:
+        """
+        Gets totals for each of the given owners, grouped by the second column that counts are squashed over, e.g.
+        {flow_id: {scope: total}}, and optionally limited to groups with the given prefix. Totals are cached in redis
+        per owner and prefix along with the highest count id they include, so that only counts inserted since then need
+        to be summed in the database. Because counts can commit out of id order, that id only advances to an id that
+        was seen at least totals_settle_secs ago.
         """
+        owner_ids = list(dict.fromkeys(owner_ids))
+        if not owner_ids:
+            return {}
+
+        # replicas can be behind the cached totals so reads from them are always summed in full
+        if using != "default":
+            return cls._sum_totals(owner_ids, prefix=prefix, using=using)
+
+        r = get_redis_connection()
+        generations = cls._get_generations(r, owner_ids)
 
-        return sql, tuple(distinct_set[col] for col in squash_over) * 2
+        # owners whose counts are being squashed can't use cached totals
+        squashing = [oid for oid in owner_ids if generations[oid] % 2]
+        cacheable = [oid for oid in owner_ids if not generations[oid] % 2]
+
+        totals = cls._sum_totals(squashing, prefix=prefix, using=using) if squashing else {}
+        if cacheable:
+            totals.update(cls._get_cached_totals(r, cacheable, generations, prefix=prefix))
+
+        return {oid: totals[oid] for oid in owner_ids}
+
+    @classmethod
+    def _get_cached_totals(cls, r, owner_ids, generations: dict, *, prefix: str) -> dict[int, dict[str, int]]:
+        owner_col, group_col = cls.get_squash_over()
+        keys = {oid: cls._get_totals_key(oid, generations[oid], prefix) for oid in owner_ids}
+
+        with r.pipeline(transaction=False) as pipe:
+            for key in keys.values():
+                pipe.hgetall(key)
+            cached = pipe.execute()
+
+        now = int(time.time())
+        totals, states, settle_to = {}, {}, {}
+        for oid, values in zip(owner_ids, cached):
+            totals[oid] = {k.decode(): int(v) for k, v in values.items()}
+            states[oid] = {k: totals[oid].pop(k) for k in ("_max_id", "_pending_id", "_pending_on") if k in totals[oid]}
+
+            # a pending id can be settled once any counts with lower ids must have been committed
+            if states[oid] and now - states[oid]["_pending_on"] >= cls.totals_settle_secs:
+                settle_to[oid] = states[oid]["_pending_id"]
+
+        conds = [Q(**{owner_col: oid, "id__gt": states[oid].get("_max_id", 0)}) for oid in owner_ids]
+        settle_conds = [Q(**{owner_col: oid, "id__lte": max_id}) for oid, max_id in settle_to.items()]
+        new_counts = cls.objects.filter(or_list(conds))
+        if prefix:
+            new_counts = new_counts.filter(**{f"{group_col}__startswith": prefix})
+        new_counts = new_counts.values_list(owner_col, group_col).annotate(
+            count_sum=Sum("count"),
+            settled_sum=Sum("count", filter=or_list(settle_conds)) if settle_conds else Value(0),
+            max_id=Max("id"),
+        )
+
+        results = {oid: dict(totals[oid]) for oid in owner_ids}
+        max_ids = {}
+        for oid, group, count_sum, settled_sum, max_id in new_counts:
+            group = str(group)
+            results[oid][group] = results[oid].get(group, 0) + count_sum
+            if settled_sum:
+                totals[oid][group] = totals[oid].get(group, 0) + settled_sum
+            max_ids[oid] = max(max_ids.get(oid, 0), max_id)
+
+        # if an owner's counts were squashed while we were reading them, they can't be combined with cached totals
+        new_generations = cls._get_generations(r, owner_ids)
+        changed = [oid for oid in owner_ids if new_generations[oid] != generations[oid]]
+        if changed:
+            results.update(cls._sum_totals(changed, prefix=prefix, using="default"))
+
+        # update owners which have settled counts or which have no pending id, with the highest id we've seen
+        to_update = [oid for oid in owner_ids if oid not in changed and (oid in settle_to or not states[oid])]
+        if to_update:
+            with r.pipeline(transaction=True) as pipe:
+                for oid in to_update:
+                    max_id = settle_to.get(oid, states[oid].get("_max_id", 0))
+                    state = {"_max_id": max_id, "_pending_id": max(max_id, max_ids.get(oid, 0)), "_pending_on": now}
+                    pipe.delete(keys[oid])
+                    pipe.hset(keys[oid], mapping={**totals[oid], **state})
+                    pipe.expire(keys[oid], cls.totals_cache_ttl)
+                pipe.execute()
+
+        return results
+
+    @classmethod
+    def _sum_totals(cls, owner_ids, *, prefix: str, using: str) -> dict[int, dict[str, int]]:
+        owner_col, group_col = cls.get_squash_over()
+        counts = cls.objects.using(using).filter(**{f"{owner_col}__in": owner_ids})
+        if prefix:
+            counts = counts.filter(**{f"{group_col}__startswith": prefix})
+
+        totals = {oid: {} for oid in owner_ids}
+        for oid, group, count_sum in counts.values_list(owner_col, group_col).annotate(count_sum=Sum("count")):
+            totals[oid][str(group)] = count_sum
+        return totals
+
+    @classmethod
+    def clear_cached_totals(cls, owner_ids):
+        """
+        Clears cached totals for the given owners, e.g. when their counts are deleted
+        """
+        cls._bump_generations(list(owner_ids), 2)  # keeps the generation odd if the owner is being squashed
+
+    @classmethod
+    def _start_squashing(cls, owner_ids):
+        """
+        Makes the generations of the given owners odd so their cached totals aren't used while they're being squashed
+        """
+        generations = cls._bump_generations(owner_ids, 1)
+
+        # a squash that was killed can leave a generation odd, in which case it's now even and needs another bump
+        cls._bump_generations([oid for oid in owner_ids if not generations[oid] % 2], 1)
+
+    @classmethod
+    def _end_squashing(cls, owner_ids):
+        """
+        Makes the generations of the given owners even again so that they get new cached totals
+        """
+        cls._bump_generations(owner_ids, 1)
+
+    @classmethod
+    def _bump_generations(cls, owner_ids, amount: int) -> dict[int, int]:
+        if not owner_ids:
+            return {}
+
+        r = get_redis_connection()
+        key = cls._get_generations_key()
+        with r.pipeline(transaction=False) as pipe:
+            for oid in owner_ids:
+                pipe.hincrby(key, oid, amount)
+            return dict(zip(owner_ids, pipe.execute()))
+
+    @classmethod
+    def _get_generations(cls, r, owner_ids) -> dict[int, int]:
+        values = r.hmget(cls._get_generations_key(), owner_ids)
+        return {oid: int(v or 0) for oid, v in zip(owner_ids, values)}
+
+    @classmethod
+    def _get_generations_key(cls) -> str:
+        return f"count_totals:{cls._meta.db_table}:generations"
+
+    @classmethod
+    def _get_totals_key(cls, owner_id: int, generation: int, prefix: str) -> str:
+        return f"count_totals:{cls._meta.db_table}:{owner_id}:{generation}:{prefix or ''}"
 
     class Meta:
         abstract = True
@@ -118,6 +322,13 @@ class BaseScopedCount(BaseSquashableCount):
 
     objects = ScopedCountQuerySet.as_manager()
 
+    @classmethod
+    def get_scope_totals(cls, owner, prefix: str) -> dict[str, int]:
+        """
+        Gets cached totals by scope for the given owner, limited to scopes with the given prefix
+        """
+        return cls.get_cached_totals([owner.id], prefix=prefix)[owner.id]
+
     class Meta:
         abstract = True
 
@@ -199,17 +410,8 @@ class DailyTimingModel(DailyCountModel):
 
     seconds = models.BigIntegerField()
 
-    @classmethod
-    def get_squash_query(cls, distinct_set: dict) -> tuple:
-        sql = f"""
-        WITH removed as (
-            DELETE FROM {cls._meta.db_table} WHERE count_type = %s AND scope = %s AND day = %s RETURNING count, seconds
-        )
-        INSERT INTO {cls._meta.db_table}(count_type, scope, day, count, seconds, is_squashed)
-        VALUES (%s, %s, %s, GREATEST(0, (SELECT SUM(count) FROM removed)), GREATEST(0, (SELECT SUM(seconds) FROM removed)), TRUE);
-        """
-
-        return sql, (distinct_set["count_type"], distinct_set["scope"], distinct_set["day"]) * 2
+    squash_values = {"count": 'GREATEST(0, SUM("count"))', "seconds": 'GREATEST(0, SUM("seconds"))'}
+    squash_keep_if = None
 
     @classmethod
     def _get_count_set(cls, count_type: str, scopes: dict, since, until):
@@ -1,4 +1,5 @@
 from decimal import Decimal
+from unittest.mock import patch
 
 from django.contrib.auth.models import Group
 from django.core import checks
@@ -9,8 +10,9 @@ from temba.contacts.models import Contact
 from temba.flows.models import Flow
 from temba.tests import TembaTest
 from temba.users.models import User
+from temba.utils.crons import cron_task, post_cron_exec
 
-from .base import delete_in_batches, patch_queryset_count, update_if_changed
+from .base import delete_in_batches, iter_keyset_batches, patch_queryset_count, update_if_changed
 from .es import IDSliceQuerySet
 from .fields import JSONAsTextField
 
@@ -46,12 +48,107 @@ class ModelsTest(TembaTest):
             return state["count"] < 2
 
         delete_in_batches(
-            Group.objects.filter(name__startswith="ZZ"), batch_size=3, pre_delete=pre_delete, post_delete=post_delete
+            Group.objects.filter(name__startswith="ZZ"),
+            batch_size=3,
+            target_secs=None,
+            pre_delete=pre_delete,
+            post_delete=post_delete,
         )
 
         self.assertTrue(Group.objects.filter(id=to_keep.id).exists())
         self.assertEqual(4, Group.objects.filter(id__in=[g.id for g in to_delete]).count())
 
+    def test_delete_in_batches_adaptive(self):
+        clock = {"now": 0.0, "batch_secs": 1.0}
+        batch_sizes = []
+
+        def pre_delete(ids):
+            batch_sizes.append(len(ids))
+            clock["now"] += clock["batch_secs"]
+
+        with patch("temba.utils.models.base.time.perf_counter", lambda: clock["now"]):
+            # batches slower than the target get smaller, but no smaller than a tenth of the initial size
+            [Group.objects.create(name=f"YY{i}") for i in range(10)]
+            num_deleted = delete_in_batches(
+                Group.objects.filter(name__startswith="YY"), batch_size=4, target_secs=0.5, pre_delete=pre_delete
+            )
+
+            self.assertEqual(10, num_deleted)
+            self.assertEqual([4, 2, 1, 1, 1, 1], batch_sizes)
+
+            # batches faster than the target get bigger, but no bigger than ten times the initial size
+            clock["batch_secs"] = 0.0
+            batch_sizes.clear()
+            [Group.objects.create(name=f"YY{i}") for i in range(60)]
+            delete_in_batches(
+                Group.objects.filter(name__startswith="YY"), batch_size=4, target_secs=0.5, pre_delete=pre_delete
+            )
+
+            self.assertEqual([4, 8, 16, 32], batch_sizes)
+            self.assertFalse(Group.objects.filter(name__startswith="YY").exists())
+
+    def test_delete_in_batches_stats(self):
+        payloads = []
+
+        def on_cron_exec(sender, task_name, stats, **kwargs):
+            payloads.append((task_name, stats))
+
+        @cron_task()
+        def test_trim():
+            delete_in_batches(Group.objects.filter(name__startswith="YY"), batch_size=3, target_secs=None)
+            delete_in_batches(Group.objects.filter(name__startswith="ZZ"), batch_size=3, target_secs=None)
+
+        [Group.objects.create(name=f"YY{i}") for i in range(5)]
+        [Group.objects.create(name=f"ZZ{i}") for i in range(2)]
+
+        post_cron_exec.connect(on_cron_exec)
+        try:
+            test_trim()
+        finally:
+            post_cron_exec.disconnect(on_cron_exec)
+
+        self.assertEqual(1, len(payloads))
+        self.assertEqual("test_trim", payloads[0][0])
+
+        stats = payloads[0][1]["delete:auth_group"]
+        self.assertEqual(7, stats["rows"])
+        self.assertEqual(3, stats["batches"])
+        self.assertGreater(stats["secs"], 0)
+        self.assertEqual(stats["rows"] / stats["secs"], stats["rows_per_sec"])
+
+        # outside of a cron task, stats aren't recorded anywhere
+        Group.objects.create(name="YY6")
+        self.assertEqual(1, delete_in_batches(Group.objects.filter(name__startswith="YY")))
+
+    def test_iter_keyset_batches(self):
+        contacts = [self.create_contact(f"Contact {i}", urns=[f"twitter:contact{i}"]) for i in range(7)]
+
+        # give some contacts the same created_on so id has to break ties
+        Contact.objects.filter(id__in=[contacts[1].id, contacts[2].id, contacts[3].id]).update(
+            created_on=contacts[1].created_on
+        )
+
+        def batch_ids(qs, **kwargs) -> list:
+            return [[c.id for c in batch] for batch in iter_keyset_batches(qs, **kwargs)]
+
+        ids = [c.id for c in contacts]
+        qs = Contact.objects.filter(id__in=ids)
+
+        self.assertEqual([ids[:3], ids[3:6], ids[6:]], batch_ids(qs, batch_size=3))
+        self.assertEqual([ids[:4], ids[4:]], batch_ids(qs.order_by("-id"), batch_size=4))
+        self.assertEqual([ids], batch_ids(qs, keys=("id",), batch_size=10))
+        self.assertEqual([ids[:2], ids[2:4]], batch_ids(qs.filter(id__in=ids[:4]), batch_size=2))
+
+        # can resume after a given position
+        after = (contacts[2].created_on, contacts[2].id)
+        self.assertEqual([ids[3:6], ids[6:]], batch_ids(qs, batch_size=3, after=after))
+        self.assertEqual([], batch_ids(Contact.objects.none()))
+
+        # each batch is a single query plus any prefetches
+        with self.assertNumQueries(6):
+            for batch in iter_keyset_batches(qs.prefetch_related("urns"), batch_size=3):
+                [list(c.urns.all()) for c in batch]
+
     def test_update_if_changed(self):
         with self.assertNumQueries(1):
             changed = update_if_changed(self.admin, first_name="Andrew", last_name="McAdmin")  # all fields changing
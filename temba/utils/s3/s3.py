@@ -1,13 +1,26 @@
+import itertools
+import logging
+import shutil
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Iterable
 from urllib.parse import urlparse
 
+from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+
 from django.conf import settings
 from django.core.files.storage import storages
 
 from temba.utils import json
 
+logger = logging.getLogger(__name__)
+
 public_file_storage = storages["public"]
 
+# S3 requires all but the last part of a multipart upload to be at least this size
+MULTIPART_MIN_PART_SIZE = 5 * 1024 * 1024
+
 
 def client():
     """
@@ -29,6 +42,116 @@ def split_url(url: str) -> tuple:
         return url_parts.netloc.split(".")[0], url_parts.path[1:]
 
 
+def delete_objects(locations: Iterable[tuple[str, str]]) -> tuple[int, list[tuple[str, str]]]:
+    """
+    Deletes the given (bucket, key) objects using multi-object deletes of up to 1000 keys per bucket, returning the
+    number deleted and the locations which couldn't be deleted
+    """
+    keys_by_bucket = defaultdict(list)
+    for bucket, key in locations:
+        keys_by_bucket[bucket].append(key)
+
+    s3_client = client()
+    num_deleted, failed = 0, []
+
+    for bucket, keys in keys_by_bucket.items():
+        for batch in itertools.batched(keys, 1000):
+            try:
+                response = s3_client.delete_objects(
+                    Bucket=bucket, Delete={"Objects": [{"Key": k} for k in batch], "Quiet": True}
+                )
+                errors = response.get("Errors", [])
+            except Exception:
+                logger.exception(f"error deleting {len(batch)} objects from bucket {bucket}")
+                errors = [{"Key": k} for k in batch]
+
+            if errors:
+                logger.warning(f"failed to delete {len(errors)} objects from bucket {bucket}")
+
+            num_deleted += len(batch) - len(errors)
+            failed.extend([(bucket, e["Key"]) for e in errors])
+
+    return num_deleted, failed
+
+
+def delete_files(storage, paths: Iterable[str], *, max_workers: int = 8) -> tuple[int, list[str]]:
+    """
+    Deletes the given paths from the given storage, returning the number deleted and the paths which couldn't be
+    deleted. S3 storages use multi-object deletes and other storages fall back to concurrent single deletes.
+    """
+    paths = list(paths)
+    if not paths:
+        return 0, []
+
+    if isinstance(storage, S3Boto3Storage):
+        paths_by_key = {storage._normalize_name(clean_name(p)): p for p in paths}
+        num_deleted, failed = delete_objects([(storage.bucket_name, k) for k in paths_by_key])
+        return num_deleted, [paths_by_key[k] for _, k in failed]
+
+    def delete(path: str) -> bool:
+        try:
+            storage.delete(path)
+            return True
+        except Exception:
+            logger.exception(f"error deleting {path} from storage")
+            return False
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(delete, paths))
+
+    return results.count(True), [p for p, ok in zip(paths, results) if not ok]
+
+
+def concat_files(storage, path: str, sources: list[str]):
+    """
+    Appends the given source files to the end of the file at the given path. On S3, if all but the last file are big
+    enough to be parts of a multipart upload, they're concatenated server-side by copying each as a part. Otherwise
+    files are streamed through to a new version of the object, which only replaces the original once complete.
+    """
+    if not sources:
+        return
+
+    if not isinstance(storage, S3Boto3Storage):
+        with open(storage.path(path), "ab") as out:
+            for source in sources:
+                with storage.open(source, "rb") as f:
+                    shutil.copyfileobj(f, out)
+        return
+
+    s3_client = client()
+    bucket = storage.bucket_name
+    keys = [storage._normalize_name(clean_name(p)) for p in [path, *sources]]
+    heads = [s3_client.head_object(Bucket=bucket, Key=k) for k in keys[:-1]]
+
+    if any(h["ContentLength"] < MULTIPART_MIN_PART_SIZE for h in heads):
+        with storage.open(path, "wb") as out:
+            for key in keys:
+                shutil.copyfileobj(s3_client.get_object(Bucket=bucket, Key=key)["Body"], out)
+        return
+
+    extra = {k: heads[0][k] for k in ("ContentType", "ContentEncoding") if heads[0].get(k)}
+    upload_id = s3_client.create_multipart_upload(Bucket=bucket, Key=keys[0], **extra)["UploadId"]
+
+    try:
+        parts = []
+        for number, key in enumerate(keys, start=1):
+            response = s3_client.upload_part_copy(
+                Bucket=bucket,
+                Key=keys[0],
+                UploadId=upload_id,
+                PartNumber=number,
+                CopySource={"Bucket": bucket, "Key": key},
+            )
+            parts.append({"PartNumber": number, "ETag": response["CopyPartResult"]["ETag"]})
+
+        s3_client.complete_multipart_upload(
+            Bucket=bucket, Key=keys[0], UploadId=upload_id, MultipartUpload={"Parts": parts}
+        )
+    except Exception:
+        s3_client.abort_multipart_upload(Bucket=bucket, Key=keys[0], UploadId=upload_id)
+        raise
+
+
 class EventStreamReader:
     """
     Util for reading payloads from an S3 event stream and reconstructing JSONL records as they become available
@@ -1,6 +1,15 @@
 from datetime import datetime
 
-LOOKUPS = {"gt": ">", "gte": ">=", "lte": "<=", "lt": "<", "in": "IN", "ne": "!=", "isnull": "IS NULL"}
+LOOKUPS = {
+    "gt": ">",
+    "gte": ">=",
+    "lte": "<=",
+    "lt": "<",
+    "in": "IN",
+    "ne": "!=",
+    "isnull": "IS NULL",
+    "any": "ANY",  # value is one of the values of a property of the items of an array, e.g. labels__uuid__any
+}
 
 
 def compile_select(*, fields=(), alias: str = "s", where: dict = None) -> str:
@@ -29,6 +38,10 @@ def _compile_condition(alias: str, field: str, val) -> str:
         op = LOOKUPS[field_parts[-1]]
         field = "__".join(field_parts[:-1])
 
+    if op == "ANY":
+        array, prop = field.rsplit("__", 1)
+        return f"{_compile_value(val)} IN {_compile_column(alias, array)}[*].{prop}"
+
     column = _compile_column(alias, field, cast="TIMESTAMP" if isinstance(val, datetime) else None)
 
     if op == "IS NULL":
@@ -1,10 +1,95 @@
+import io
+import tempfile
 from datetime import datetime, timezone as tzone
+from unittest.mock import patch
+
+from django.core.files.storage import FileSystemStorage, default_storage
 
 from temba.tests import TembaTest
-from temba.utils.s3 import compile_select, split_url
+from temba.utils.s3 import (
+    MULTIPART_MIN_PART_SIZE,
+    client,
+    compile_select,
+    concat_files,
+    delete_files,
+    delete_objects,
+    split_url,
+)
 
 
 class S3Test(TembaTest):
+    def test_delete_files(self):
+        path1 = default_storage.save("test/foo.txt", io.StringIO("foo"))
+        path2 = default_storage.save("test/bar.txt", io.StringIO("bar"))
+
+        self.assertEqual((0, []), delete_files(default_storage, []))
+        self.assertEqual((2, []), delete_files(default_storage, [path1, path2]))
+        self.assertFalse(default_storage.exists(path1))
+        self.assertFalse(default_storage.exists(path2))
+
+        # failures are reported by key
+        with patch("botocore.client.BaseClient._make_api_call") as mock_call:
+            mock_call.return_value = {"Errors": [{"Key": path2, "Code": "AccessDenied"}]}
+
+            self.assertEqual((1, [path2]), delete_files(default_storage, [path1, path2]))
+
+            mock_call.side_effect = ValueError("boom")
+
+            self.assertEqual((0, [("foo", "a"), ("foo", "b")]), delete_objects([("foo", "a"), ("foo", "b")]))
+
+        # other storages are deleted from concurrently
+        with tempfile.TemporaryDirectory() as temp_dir:
+            storage = FileSystemStorage(location=temp_dir)
+            path1 = storage.save("foo.txt", io.StringIO("foo"))
+            path2 = storage.save("bar.txt", io.StringIO("bar"))
+
+            self.assertEqual((2, []), delete_files(storage, [path1, path2]))
+            self.assertFalse(storage.exists(path1))
+
+            with patch.object(storage, "delete", side_effect=lambda p: 1 / 0 if p == "bar.txt" else None):
+                self.assertEqual((1, ["bar.txt"]), delete_files(storage, ["foo.txt", "bar.txt"]))
+
+    def test_concat_files(self):
+        path1 = default_storage.save("test/1.txt", io.BytesIO(b"foo"))
+        path2 = default_storage.save("test/2.txt", io.BytesIO(b"bar"))
+        path3 = default_storage.save("test/3.txt", io.BytesIO(b"baz"))
+
+        concat_files(default_storage, path1, [])
+        self.assertEqual(b"foo", default_storage.open(path1).read())
+
+        # small files are streamed through to a new version of the first
+        concat_files(default_storage, path1, [path2, path3])
+        self.assertEqual(b"foobarbaz", default_storage.open(path1).read())
+
+        # big enough files are copied server-side as parts of a multipart upload
+        big = b"x" * MULTIPART_MIN_PART_SIZE
+        path4 = default_storage.save("test/4.txt", io.BytesIO(big))
+        path5 = default_storage.save("test/5.txt", io.BytesIO(big))
+
+        with patch("temba.utils.s3.s3.shutil.copyfileobj") as mock_copy:
+            concat_files(default_storage, path4, [path5, path2])
+            mock_copy.assert_not_called()
+
+        self.assertEqual(big + big + b"bar", default_storage.open(path4).read())
+
+        # a failed copy aborts the upload and leaves the original as it was
+        with patch.object(client(), "upload_part_copy", side_effect=ValueError("boom")):
+            with self.assertRaises(ValueError):
+                concat_files(default_storage, path5, [path4])
+
+        self.assertEqual(big, default_storage.open(path5).read())
+        uploads = client().list_multipart_uploads(Bucket=default_storage.bucket_name, Prefix=path5)
+        self.assertEqual([], uploads.get("Uploads", []))
+
+        # other storages are appended to directly
+        with tempfile.TemporaryDirectory() as temp_dir:
+            storage = FileSystemStorage(location=temp_dir)
+            path1 = storage.save("1.txt", io.BytesIO(b"foo"))
+            path2 = storage.save("2.txt", io.BytesIO(b"bar"))
+
+            concat_files(storage, path1, [path2])
+            self.assertEqual(b"foobar", storage.open(path1).read())
+
     def test_split_url(self):
         with self.settings(AWS_S3_ADDRESSING_STYLE="virtual"):
             bucket, url = split_url("https://foo.s3.aws.amazon.com/test/this/12345")
@@ -65,3 +150,7 @@ class SelectTest(TembaTest):
             "SELECT s.* FROM s3object s WHERE '1ccf09f6-3fe8-4c0d-a073-981632be5a30' IN s.labels[*].uuid[*]",
             compile_select(where={"__raw__": "'1ccf09f6-3fe8-4c0d-a073-981632be5a30' IN s.labels[*].uuid[*]"}),
         )
+        self.assertEqual(
+            "SELECT s.* FROM s3object s WHERE '1ccf09f6-3fe8-4c0d-a073-981632be5a30' IN s.labels[*].uuid",
+            compile_select(where={"labels__uuid__any": "1ccf09f6-3fe8-4c0d-a073-981632be5a30"}),
+        )
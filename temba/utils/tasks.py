@@ -0,0 +1,28 @@
+import logging
+
+from django.conf import settings
+
+from temba.utils.crons import cron_task
+from temba.utils.db import partitions
+
+logger = logging.getLogger(__name__)
+
+
+@cron_task()
+def maintain_partitions():
+    """
+    Creates upcoming partitions for partitioned tables, logging an error if a table was getting close to running out of
+    partitions, i.e. if this task has been failing
+    """
+
+    num_created = 0
+
+    for table, period in settings.PARTITIONED_TABLES.items():
+        if partitions.is_partitioned(table):
+            ahead = partitions.get_periods_ahead(table, period)
+            if ahead < settings.PARTITIONS_AHEAD // 2:
+                logger.error(f"Table {table} only has partitions for {ahead} {period}(s) ahead")
+
+            num_created += partitions.create_partitions(table, period)
+
+    return {"created": num_created}